@@ -188,4 +188,34 @@ def create_sample_config() -> SimulationConfig:
         check_schedule=check_schedule,
         economy=economy,
         tapping=tapping_config
-    ) 
\ No newline at end of file
+    ) 
+
+def create_synthetic_config(locations_count: int = 1000, levels_count: int = 50) -> SimulationConfig:
+    """
+    Создает синтетическую конфигурацию большого размера для замеров производительности.
+    
+    Все локации обычной редкости, стоимость растет линейно с уровнем,
+    а кулдауны короткие, поэтому за одну сессию происходят сотни улучшений.
+    
+    Args:
+        locations_count: Количество локаций
+        levels_count: Количество уровней каждой локации
+        
+    Returns:
+        SimulationConfig: Синтетическая конфигурация симуляции
+    """
+    config = create_sample_config()
+    
+    config.locations = {
+        loc_id: LocationConfig(
+            rarity=LocationRarityType.COMMON,
+            levels={
+                level: LocationLevel(cost=10 + level, xp_reward=level)
+                for level in range(1, levels_count + 1)
+            }
+        )
+        for loc_id in range(1, locations_count + 1)
+    }
+    config.location_cooldowns = {level: 1 + level % 5 for level in range(1, levels_count + 1)}
+    
+    return config
\ No newline at end of file
@@ -9,10 +9,10 @@ from dash import Input, Output, State, callback, html
 
 from utils.economy import calculate_gold_per_sec
 from utils.plotting import create_subplot_figure, add_time_series, create_bar_chart
-from utils.data_processing import extract_upgrades_timeline, extract_resource_data
 from utils.export import export_gold_balance_table
 from config.dashboard_config import PLOT_COLORS, STYLE_METRICS_BOX, STYLE_FLEX_ROW
 from dashboard import app
+from dashboard.result_store import load_derived_data, load_simulation_data
 
 @app.callback(
     [Output("gold-per-sec-progression", "figure"),
@@ -105,17 +105,19 @@ def update_gold_progression(base_gold, earn_coefficient):
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_economy_analysis(data, auto_run_data):
+def update_economy_analysis(store_data, auto_run_data):
     """
     Обновляет анализ экономики.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         go.Figure: График с анализом экономики
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_figure = go.Figure()
@@ -232,7 +234,7 @@ def update_economy_analysis(data, auto_run_data):
         )
     
     # Извлекаем данные об улучшениях для второго графика
-    upgrades_timeline = extract_upgrades_timeline(history)
+    upgrades_timeline = load_derived_data(store_data, "upgrades_timeline")
     
     # Извлекаем данные о ресурсах для расчетов
     resources_data = []
@@ -346,12 +348,14 @@ def update_economy_metrics(data, auto_run_data):
     Обновляет метрики экономики.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         html.Div: Блок с метриками
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         return html.Div("Start simulation to display data", 
@@ -409,12 +413,14 @@ def update_upgrades_history(data, auto_run_data):
     Обновляет таблицу истории улучшений.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         tuple: (данные таблицы, колонки таблицы)
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_columns = [
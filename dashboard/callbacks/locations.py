@@ -8,9 +8,9 @@ import plotly.graph_objects as go
 from dash import Input, Output, State, callback, html
 
 from utils.plotting import create_subplot_figure, add_time_series, create_bar_chart
-from utils.data_processing import extract_location_data, extract_upgrades_timeline
 from utils.export import export_location_upgrades_table
 from dashboard import app
+from dashboard.result_store import load_derived_data, load_history_index, load_simulation_data
 from config.simulation_config import create_sample_config
 
 @app.callback(
@@ -19,17 +19,19 @@ from config.simulation_config import create_sample_config
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_locations_analysis(data, auto_run_data):
+def update_locations_analysis(store_data, auto_run_data):
     """
     Обновляет анализ локаций.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         go.Figure: График с анализом локаций
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_figure = go.Figure()
@@ -54,37 +56,8 @@ def update_locations_analysis(data, auto_run_data):
     if not history:
         return {}
     
-    # Извлекаем данные о локациях
-    locations_data = {}
-    for state in history:
-        for loc_id, loc_state in state["locations"].items():
-            loc_id = int(loc_id)
-            if loc_id not in locations_data:
-                locations_data[loc_id] = {
-                    "current_level": loc_state["current_level"],
-                    "available": loc_state["available"],
-                    "upgrades_count": 0,
-                    "total_cost": 0,
-                    "total_xp": 0,
-                    "total_keys": 0
-                }
-            else:
-                locations_data[loc_id].update({
-                    "current_level": loc_state["current_level"],
-                    "available": loc_state["available"]
-                })
-    
-    # Извлекаем данные об улучшениях
-    upgrades_timeline = extract_upgrades_timeline(history)
-    
-    # Обновляем данные о локациях на основе улучшений
-    for upgrade in upgrades_timeline:
-        loc_id = int(upgrade["location_id"])
-        if loc_id in locations_data:
-            locations_data[loc_id]["upgrades_count"] += 1
-            locations_data[loc_id]["total_cost"] += -upgrade["gold_change"]
-            locations_data[loc_id]["total_xp"] += upgrade["xp_change"]
-            locations_data[loc_id]["total_keys"] += upgrade["keys_change"]
+    # Извлекаем данные об улучшениях (считаются один раз на симуляцию)
+    upgrades_timeline = load_derived_data(store_data, "upgrades_timeline")
     
     # Проверяем наличие данных об улучшениях
     if not upgrades_timeline:
@@ -145,26 +118,26 @@ def update_locations_analysis(data, auto_run_data):
         )
     
     # 2. График влияния Cooldown
+    history_index = load_history_index(store_data)
     cooldown_data = {}
-    for upgrade in upgrades_timeline:
-        loc_id = upgrade["location_id"]
-        if loc_id not in cooldown_data:
-            cooldown_data[loc_id] = {
-                "upgrade_intervals": [],
-                "levels": []
-            }
+    for loc_id in timeline_data:
+        cooldown_data[loc_id] = {
+            "upgrade_intervals": [],
+            "levels": []
+        }
         
-        # Находим интервал до следующего улучшения этой локации
-        next_upgrade = next(
-            (u for u in upgrades_timeline 
-             if u["location_id"] == loc_id and u["day"] > upgrade["day"]),
-            None
-        )
-        if next_upgrade:
-            # Преобразуем интервал из дней в минуты (дни * 24 часа * 60 минут)
-            interval = (next_upgrade["day"] - upgrade["day"]) * 24
-            cooldown_data[loc_id]["upgrade_intervals"].append(interval)
-            cooldown_data[loc_id]["levels"].append(upgrade["new_level"])
+        # Улучшения локации идут по времени: следующее улучшение - первое с более поздним днем
+        location_upgrades = history_index.location_upgrades(loc_id)
+        next_position = 0
+        for position, upgrade in enumerate(location_upgrades):
+            next_position = max(next_position, position + 1)
+            while next_position < len(location_upgrades) and location_upgrades[next_position]["day"] <= upgrade["day"]:
+                next_position += 1
+            if next_position < len(location_upgrades):
+                # Интервал до следующего улучшения в часах
+                interval = (location_upgrades[next_position]["day"] - upgrade["day"]) * 24
+                cooldown_data[loc_id]["upgrade_intervals"].append(interval)
+                cooldown_data[loc_id]["levels"].append(upgrade["new_level"])
     
     for i, (loc_id, data) in enumerate(cooldown_data.items()):
         if data["upgrade_intervals"]:
@@ -242,12 +215,14 @@ def update_progress_details(data, auto_run_data):
     Обновляет таблицу с детальной информацией о прогрессе.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         list: [данные таблицы, столбцы]
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_columns = [
@@ -306,17 +281,19 @@ def update_progress_details(data, auto_run_data):
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_location_history(data, auto_run_data):
+def update_location_history(store_data, auto_run_data):
     """
     Обновляет таблицу истории улучшений локаций.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         tuple: (данные таблицы, колонки таблицы)
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_columns = [
@@ -334,7 +311,7 @@ def update_location_history(data, auto_run_data):
         return [], []
     
     # Получаем данные об улучшениях
-    upgrades_timeline = extract_upgrades_timeline(history)
+    upgrades_timeline = load_derived_data(store_data, "upgrades_timeline")
     
     if not upgrades_timeline:
         return [], []
@@ -424,12 +401,14 @@ def update_locations_parameters(data, auto_run_data):
     Обновляет таблицу параметров локаций.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         list: [данные таблицы, столбцы]
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_columns = [
@@ -461,12 +440,14 @@ def update_locations_cost_table(data, auto_run_data):
     Обновляет таблицу стоимостей локаций.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         list: [данные таблицы, столбцы, условные стили]
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run") or data is None:
         empty_columns = [{"name": "Location", "id": "location_id"}, {"name": "Status", "id": "status"}]
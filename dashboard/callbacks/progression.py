@@ -10,17 +10,14 @@ from dash import Input, Output, State, callback, html
 
 from utils.plotting import create_subplot_figure, add_time_series, create_bar_chart
 from utils.data_processing import (
-    extract_upgrades_timeline, 
     calculate_intervals,
     calculate_upgrades_per_day,
-    calculate_stagnation_periods,
-    extract_level_data,
-    extract_resource_data,
-    extract_daily_events_data
+    calculate_stagnation_periods
 )
 from utils.export import export_daily_events_table
 from config.dashboard_config import PLOT_COLORS
 from dashboard import app
+from dashboard.result_store import load_derived_data, load_simulation_data
 
 @app.callback(
     [Output("progression-pace", "figure"),
@@ -30,17 +27,19 @@ from dashboard import app
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_progression_analysis(data, auto_run_data):
+def update_progression_analysis(store_data, auto_run_data):
     """
     Обновляет анализ темпа прогрессии.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         list: [график темпа, график стагнации, статистика]
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_figure = go.Figure()
@@ -76,7 +75,7 @@ def update_progression_analysis(data, auto_run_data):
     )
     
     # Собираем данные о времени между улучшениями
-    upgrades_timeline = extract_upgrades_timeline(history)
+    upgrades_timeline = load_derived_data(store_data, "upgrades_timeline")
     intervals = calculate_intervals(upgrades_timeline)
     
     # Статистика интервалов
@@ -230,17 +229,19 @@ def update_progression_analysis(data, auto_run_data):
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_user_level_progress(data, auto_run_data):
+def update_user_level_progress(store_data, auto_run_data):
     """
     Обновляет график прогресса уровня пользователя.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         go.Figure: График прогресса уровня
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_figure = go.Figure()
@@ -266,7 +267,7 @@ def update_user_level_progress(data, auto_run_data):
         return {}
     
     # Извлекаем данные об уровне
-    level_data = extract_level_data(history)
+    level_data = load_derived_data(store_data, "level_data")
     
     # Создаем график
     fig = create_subplot_figure(
@@ -317,17 +318,19 @@ def update_user_level_progress(data, auto_run_data):
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_resources_over_time(data, auto_run_data):
+def update_resources_over_time(store_data, auto_run_data):
     """
     Обновляет график ресурсов во времени.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         go.Figure: График ресурсов
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_figure = go.Figure()
@@ -353,7 +356,7 @@ def update_resources_over_time(data, auto_run_data):
         return {}
     
     # Извлекаем данные о ресурсах
-    resource_data = extract_resource_data(history)
+    resource_data = load_derived_data(store_data, "resource_data")
     
     # Создаем график
     fig = create_subplot_figure(
@@ -476,17 +479,19 @@ def update_coins_per_level_table(user_levels_data):
      Input("auto-run-store", "data")],
     prevent_initial_call=True
 )
-def update_daily_events_table(data, auto_run_data):
+def update_daily_events_table(store_data, auto_run_data):
     """
     Обновляет таблицу с ежедневными событиями игры.
     
     Args:
-        data: Данные симуляции
+        store_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         tuple: (данные таблицы, колонки таблицы)
     """
+    data = load_simulation_data(store_data)
+    
     # Проверяем, была ли запущена симуляция
     if not auto_run_data or not auto_run_data.get("auto_run"):
         empty_columns = [
@@ -504,7 +509,7 @@ def update_daily_events_table(data, auto_run_data):
         return [], []
     
     # Получаем данные о событиях по дням
-    daily_events = extract_daily_events_data(history)
+    daily_events = load_derived_data(store_data, "daily_events")
     
     if not daily_events:
         return [], []
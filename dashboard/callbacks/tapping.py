@@ -10,127 +10,81 @@ from dash import Input, Output, State, callback, html, dcc
 from typing import Dict, List, Any, Tuple, Optional
 
 from models.config import TappingConfig
-from workflow.tapping import TappingEngine, TapDay, TapSession
+from workflow.tapping import TappingEngine, sample_energy
 from config.dashboard_config import TAPPING_COLORS, TAPPING_GRAPH_LAYOUT
 from dashboard import app
+from dashboard.result_store import load_derived_data, load_simulation_data
 from utils.export import export_tapping_stats_table
 
 @app.callback(
     [Output("tapping-stats-store", "data")],
     [Input("simulation-data-store", "data"),
      Input("auto-run-store", "data")],
-    [State("is-tapping-checkbox", "value"),
-     State("max-energy-input", "value"),
-     State("tap-speed-input", "value"),
-     State("gold-per-tap-input", "value"),
-     State("game-duration-input", "value")],
     prevent_initial_call=True
 )
-def calculate_tapping_stats(sim_data, auto_run_data, is_tapping, max_energy, tap_speed, tap_coef, game_duration):
+def calculate_tapping_stats(sim_data, auto_run_data):
     """
-    Расчет статистики тапания на основе данных симуляции.
+    Собирает статистику тапания из сессий, записанных движком симуляции.
+    
+    Тапание моделируется в основном цикле симуляции, поэтому здесь сессии
+    только группируются по дням. Кривая энергии строится позже и только
+    для сессии, выбранной на графике, по параметрам тапания, с которыми
+    шла симуляция (а не по текущим значениям формы).
     
     Args:
-        sim_data: Данные симуляции
+        sim_data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
-        is_tapping: Флаг активности тапания
-        max_energy: Максимальный запас энергии
-        tap_speed: Скорость тапания (тапов в секунду)
-        tap_coef: Множитель золота за тап (уровень персонажа * tap_coef)
-        game_duration: Длительность игровой сессии в минутах
         
     Returns:
         dict: Данные статистики тапания
     """
     # Проверка на наличие данных симуляции
-    if not auto_run_data or not auto_run_data.get("auto_run") or not sim_data or "history" not in sim_data:
-        return [{}]
-    
-    # Получаем историю симуляции
-    history = sim_data.get("history", [])
-    if not history:
+    data = load_simulation_data(sim_data)
+    if not auto_run_data or not auto_run_data.get("auto_run") or not data:
         return [{}]
     
-    # Проверка активации тапания
-    is_tapping_active = 'is_tapping' in (is_tapping or [])
-    
-    # Создаем конфигурацию тапания
-    tapping_config = TappingConfig(
-        is_tapping=is_tapping_active,
-        max_energy_capacity=max_energy,
-        tap_speed=tap_speed,
-        tap_coef=tap_coef
-    )
-    
-    # Если тапание отключено, возвращаем пустые данные
-    if not is_tapping_active:
+    # Если тапание в симуляции было отключено, возвращаем пустые данные
+    tapping_config = data.get("config", {}).get("tapping", {})
+    if not tapping_config.get("is_tapping"):
         return [{"is_tapping": False, "days": [], "stats": {}}]
     
-    # Извлекаем времена сессий и уровни пользователя из истории
-    session_times = []
-    user_levels_data = {}
-    
-    for state in history:
-        if "timestamp" in state and "balance" in state:
-            timestamp = state["timestamp"]
-            session_times.append(timestamp)
-            
-            # Сохраняем уровень пользователя для каждой сессии
-            user_level = state["balance"].get("user_level", 1)
-            day = timestamp // 86400  # Номер дня (начиная с 0)
-            user_levels_data[day] = user_level
-    
-    # Если нет данных сессий, возвращаем пустые данные
-    if not session_times:
+    sessions = load_derived_data(sim_data, "tapping_sessions")
+    if not sessions:
         return [{"is_tapping": False, "days": [], "stats": {}}]
     
-    # Получаем начальный уровень пользователя
-    base_user_level = user_levels_data.get(0, 1)  # Уровень в первый день, если есть
-    
-    # Отладочный вывод информации о уровнях пользователя
-    print("DEBUG: User levels by day:")
-    for day, level in sorted(user_levels_data.items()):
-        print(f"  Day {day+1}: User level {level}")
-    
-    # Создаем движок тапания и запускаем симуляцию с передачей уровней пользователя по дням
-    tapping_engine = TappingEngine(tapping_config)
-    days_data = tapping_engine.simulate_sessions(
-        session_times, 
-        game_duration, 
-        user_level=base_user_level,
-        user_levels_by_day=user_levels_data
-    )
-    
-    # Преобразуем данные дней в формат для хранилища
+    # Группируем сессии по дням (сессии уже упорядочены по времени)
     days_json = []
-    for day in days_data:
-        day_dict = {
-            "day": day.day,
-            "total_taps": day.total_taps,
-            "total_energy": day.total_energy,
-            "total_gold": day.total_gold,
-            "sessions": []
-        }
-        
-        for session in day.sessions:
-            session_dict = {
-                "start_time": session.start_time,
-                "duration": session.duration,
-                "energy_used": session.energy_used,
-                "taps_count": session.taps_count,
-                "gold_earned": session.gold_earned,
-                "energy_history": session.energy_history,
-                "user_level": session.user_level
-            }
-            day_dict["sessions"].append(session_dict)
-            
-        days_json.append(day_dict)
+    day_positions = {}
+    for session in sessions:
+        day_number = session["day"]
+        if day_number not in day_positions:
+            day_positions[day_number] = len(days_json)
+            days_json.append({
+                "day": day_number,
+                "total_taps": 0,
+                "total_energy": 0,
+                "total_gold": 0,
+                "sessions": []
+            })
+        day_dict = days_json[day_positions[day_number]]
+        day_dict["total_taps"] += session["taps_count"]
+        day_dict["total_energy"] += session["energy_used"]
+        day_dict["total_gold"] += session["gold_earned"]
+        day_dict["sessions"].append({
+            "start_time": session["start_time"],
+            "duration": session["duration"],
+            "energy_used": session["energy_used"],
+            "taps_count": session["taps_count"],
+            "gold_earned": session["gold_earned"],
+            "start_energy": session["start_energy"],
+            "user_level": session["user_level"]
+        })
     
     # Рассчитываем суммарную статистику
-    total_taps = sum(day.total_taps for day in days_data)
-    total_gold = sum(day.total_gold for day in days_data)
-    total_energy = sum(day.total_energy for day in days_data)
-    total_sessions = sum(len(day.sessions) for day in days_data)
+    total_taps = sum(day["total_taps"] for day in days_json)
+    total_gold = sum(day["total_gold"] for day in days_json)
+    total_energy = sum(day["total_energy"] for day in days_json)
+    total_sessions = len(sessions)
     avg_taps_per_session = total_taps / total_sessions if total_sessions > 0 else 0
     
     # Формируем результат
@@ -145,9 +99,9 @@ def calculate_tapping_stats(sim_data, auto_run_data, is_tapping, max_energy, tap
             "avg_taps_per_session": avg_taps_per_session
         },
         "config": {
-            "max_energy_capacity": max_energy,
-            "tap_speed": tap_speed,
-            "tap_coef": tap_coef
+            "max_energy_capacity": tapping_config["max_energy_capacity"],
+            "tap_speed": tapping_config["tap_speed"],
+            "tap_coef": tapping_config["tap_coef"]
         }
     }
     
@@ -353,15 +307,28 @@ def update_energy_over_time(selected_session, tapping_data):
     
     session = sessions[session_idx]
     
-    # Получаем историю энергии
-    energy_history = session.get("energy_history", [])
-    if not energy_history:
+    # Кривая энергии строится по итогам сессии из журнала: за O(1) для выбранной сессии,
+    # с параметрами тапания, с которыми шла симуляция
+    config = tapping_data.get("config", {})
+    tapping_engine = TappingEngine(TappingConfig(
+        is_tapping=True,
+        max_energy_capacity=config.get("max_energy_capacity"),
+        tap_speed=config.get("tap_speed"),
+        tap_coef=config.get("tap_coef")
+    ))
+    energy_segments = tapping_engine.run_session(
+        session["start_time"], session["duration"], session.get("user_level", 1),
+        energy=session.get("start_energy", 0)
+    ).energy_segments
+    if not energy_segments:
         return go.Figure()
     
-    # Преобразуем историю в относительное время (от начала сессии)
+    # Выбираем точки излома кривой в относительном времени (от начала сессии)
     start_time = session["start_time"]
-    times = [(t - start_time) / 60 for t, _ in energy_history]  # Переводим в минуты
-    energy_values = [e for _, e in energy_history]
+    curve = list(sample_energy(energy_segments))
+    times = [(t - start_time) / 60 for t, _, _ in curve]  # Переводим в минуты
+    energy_values = [e for _, e, _ in curve]
+    tap_values = [taps for _, _, taps in curve]
     
     # Создаем график с двумя осями Y
     fig = make_subplots(specs=[[{"secondary_y": True}]])
@@ -392,29 +359,6 @@ def update_energy_over_time(selected_session, tapping_data):
         secondary_y=False
     )
     
-    # Рассчитываем количество тапов для каждого момента времени
-    # На самом деле мы не знаем точное количество тапов в каждый момент,
-    # но можем оценить его по изменению энергии
-    tap_values = []
-    cumulative_taps = 0
-    prev_energy = energy_values[0] if energy_values else 0
-    
-    for i, energy in enumerate(energy_values):
-        if i == 0:
-            tap_values.append(0)
-        else:
-            # Оцениваем количество тапов как уменьшение энергии плюс восстановление (0.1 энергии/сек)
-            # Это приблизительная оценка
-            energy_change = prev_energy - energy
-            recovery = 0.1  # предполагаемое восстановление энергии за секунду
-            
-            # Если энергия уменьшилась, значит были тапы
-            taps = max(0, energy_change + recovery)
-            cumulative_taps += taps
-            tap_values.append(cumulative_taps)
-        
-        prev_energy = energy
-    
     # Добавляем линию тапов (вторичная ось Y)
     fig.add_trace(
         go.Scatter(
@@ -0,0 +1,208 @@
+"""
+Серверное хранилище результатов симуляции для дашборда.
+
+В `simulation-data-store` браузера лежит только ID симуляции, а история и
+остальные данные хранятся в памяти процесса. Давно не использованные
+результаты вытесняются на диск и читаются обратно при следующем обращении,
+поэтому коллбеки получают готовые объекты Python без пересылки и разбора JSON.
+
+Производные таблицы (временная шкала улучшений, данные об уровне, ресурсах,
+событиях по дням, локациях и сессиях тапания) собираются `HistoryIndex` за один
+проход по истории при первом обращении и хранятся по ID симуляции до вытеснения
+результата. Коллбеки получают общие объекты и не должны их изменять.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Any, Callable, Dict, Optional
+
+from utils.data_processing import HistoryIndex
+from utils.result_cache import ResultCache
+
+DEFAULT_MAX_ITEMS = 8  # Сколько результатов держать в памяти
+DEFAULT_SPILL_DIR = os.path.join('.cache', 'dashboard')  # Директория вытесненных результатов
+
+# Производные таблицы по имени: таблица индекса истории симуляции
+DERIVATIONS: Dict[str, Callable[[HistoryIndex], Any]] = {
+    "upgrades_timeline": attrgetter("upgrades_timeline"),
+    "level_data": attrgetter("level_data"),
+    "resource_data": attrgetter("resource_data"),
+    "daily_events": attrgetter("daily_events"),
+    "location_data": attrgetter("location_data"),
+    "tapping_sessions": attrgetter("tapping_sessions"),
+}
+
+
+class SimulationDataStore:
+    """
+    LRU-хранилище данных симуляций в памяти процесса с вытеснением на диск.
+    """
+
+    def __init__(self, max_items: int = DEFAULT_MAX_ITEMS, spill: Optional[ResultCache] = None):
+        """
+        Args:
+            max_items: Сколько результатов держать в памяти
+            spill: Дисковый кэш для вытесненных результатов
+                (по умолчанию - DEFAULT_SPILL_DIR в корне проекта)
+        """
+        self.max_items = max_items
+        self.spill = spill or ResultCache(DEFAULT_SPILL_DIR)
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._indexes: Dict[str, HistoryIndex] = {}  # Индексы истории по ID симуляции
+        self._index_locks: Dict[str, threading.Lock] = {}  # Блокировки построения индексов
+        self._lock = threading.Lock()
+
+    def put(self, simulation_id: str, data: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Сохраняет данные симуляции.
+
+        Args:
+            simulation_id: ID симуляции
+            data: Данные симуляции (история, итоги, параметры)
+
+        Returns:
+            Dict[str, str]: Содержимое `simulation-data-store` для браузера
+        """
+        with self._lock:
+            if self._items.get(simulation_id) is not data:
+                self._drop_index(simulation_id)
+            self._items[simulation_id] = data
+            self._items.move_to_end(simulation_id)
+            evicted = []
+            while len(self._items) > self.max_items:
+                evicted_id, evicted_data = self._items.popitem(last=False)
+                self._drop_index(evicted_id)
+                evicted.append((evicted_id, evicted_data))
+        # Запись на диск идет вне блокировки, чтобы не задерживать другие коллбеки
+        for evicted_id, evicted_data in evicted:
+            self.spill.put(evicted_id, evicted_data)
+        return {"simulation_id": simulation_id}
+
+    def get(self, simulation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает данные симуляции.
+
+        Args:
+            simulation_id: ID симуляции
+
+        Returns:
+            Optional[Dict[str, Any]]: Данные или None, если результат не найден
+        """
+        with self._lock:
+            data = self._items.get(simulation_id)
+            if data is not None:
+                self._items.move_to_end(simulation_id)
+                return data
+
+        data = self.spill.get(simulation_id)
+        if data is not None:
+            self.put(simulation_id, data)
+        return data
+
+    def history_index(self, simulation_id: str) -> Optional[HistoryIndex]:
+        """
+        Возвращает индекс истории симуляции, строя его при первом обращении.
+
+        Параллельные коллбеки, запросившие индекс одной симуляции, ждут одного построения.
+
+        Args:
+            simulation_id: ID симуляции
+
+        Returns:
+            Optional[HistoryIndex]: Индекс или None, если результат не найден
+        """
+        with self._lock:
+            index = self._indexes.get(simulation_id)
+            if index is not None:
+                return index
+            index_lock = self._index_locks.setdefault(simulation_id, threading.Lock())
+
+        with index_lock:
+            with self._lock:
+                index = self._indexes.get(simulation_id)
+                if index is not None:
+                    return index
+            data = self.get(simulation_id)
+            if data is None:
+                return None
+            index = HistoryIndex(data.get("history") or [])
+            with self._lock:
+                # Результат мог быть вытеснен или заменен, пока индекс строился
+                if self._items.get(simulation_id) is data:
+                    self._indexes[simulation_id] = index
+            return index
+
+    def derived(self, simulation_id: str, name: str) -> Optional[Any]:
+        """
+        Возвращает производную таблицу симуляции из ее индекса истории.
+
+        Args:
+            simulation_id: ID симуляции
+            name: Имя таблицы из DERIVATIONS
+
+        Returns:
+            Optional[Any]: Таблица или None, если результат не найден
+
+        Raises:
+            KeyError: Если имя таблицы неизвестно
+        """
+        derive = DERIVATIONS[name]
+        index = self.history_index(simulation_id)
+        return None if index is None else derive(index)
+
+    def _drop_index(self, simulation_id: str) -> None:
+        """Удаляет индекс истории симуляции (вызывается под блокировкой)."""
+        self._indexes.pop(simulation_id, None)
+        self._index_locks.pop(simulation_id, None)
+
+
+# Хранилище процесса дашборда
+simulation_data_store = SimulationDataStore()
+
+
+def load_simulation_data(store_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Получает данные симуляции по содержимому `simulation-data-store`.
+
+    Args:
+        store_data: Содержимое хранилища браузера с ID симуляции
+
+    Returns:
+        Optional[Dict[str, Any]]: Данные симуляции или None, если симуляция не запускалась
+    """
+    if not store_data or "simulation_id" not in store_data:
+        return None
+    return simulation_data_store.get(store_data["simulation_id"])
+
+
+def load_derived_data(store_data: Optional[Dict[str, Any]], name: str) -> Optional[Any]:
+    """
+    Получает производную таблицу по содержимому `simulation-data-store`.
+
+    Args:
+        store_data: Содержимое хранилища браузера с ID симуляции
+        name: Имя таблицы из DERIVATIONS
+
+    Returns:
+        Optional[Any]: Таблица или None, если симуляция не запускалась
+    """
+    if not store_data or "simulation_id" not in store_data:
+        return None
+    return simulation_data_store.derived(store_data["simulation_id"], name)
+
+
+def load_history_index(store_data: Optional[Dict[str, Any]]) -> Optional[HistoryIndex]:
+    """
+    Получает индекс истории по содержимому `simulation-data-store`.
+
+    Args:
+        store_data: Содержимое хранилища браузера с ID симуляции
+
+    Returns:
+        Optional[HistoryIndex]: Индекс или None, если симуляция не запускалась
+    """
+    if not store_data or "simulation_id" not in store_data:
+        return None
+    return simulation_data_store.history_index(store_data["simulation_id"])
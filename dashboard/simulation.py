@@ -2,6 +2,8 @@
 Коллбеки для запуска и управления симуляцией.
 """
 
+import threading
+
 import numpy as np
 import pandas as pd
 import dash
@@ -13,8 +15,19 @@ from dash.exceptions import PreventUpdate
 from simulator import Simulator
 from config.simulation_config import create_sample_config
 from utils.economy import format_time, calculate_gold_per_sec
-from models.config import EconomyConfig, SimulationAlgorithm, SimulationConfig, StartingBalanceConfig, TappingConfig
+from utils.result_cache import ResultCache
+from workflow.tapping import tapping_parameters
+from models.config import EconomyConfig, SimulationAlgorithm, SimulationConfig, SimulationEngine, StartingBalanceConfig, TappingConfig
 from dashboard import app
+from dashboard.result_store import load_simulation_data, simulation_data_store
+
+# Кэш результатов: повторный запуск с теми же параметрами не пересчитывает симуляцию
+result_cache = ResultCache()
+
+# Общий симулятор запусков из дашборда: после правки таблиц он пересчитывает
+# только дни после первого использования измененных значений
+interactive_simulator = Simulator(cache=result_cache)
+interactive_simulator_lock = threading.Lock()
 
 def create_status_message(status_type: str, message: str, details: Optional[str] = None) -> html.Div:
     """
@@ -88,7 +101,7 @@ def run_simulation(n_clicks, base_gold, earn_coefficient, cooldown_multiplier,
         auto_run_data: Состояние флага автозапуска
         
     Returns:
-        list: [статус, данные симуляции, уровни пользователя, флаг автозапуска]
+        list: [статус, ID симуляции для хранилища, уровни пользователя, флаг автозапуска]
     """
     # Для первичной загрузки страницы или если кнопка не была нажата, не запускаем симуляцию
     if n_clicks is None or n_clicks == 0:
@@ -119,15 +132,19 @@ def run_simulation(n_clicks, base_gold, earn_coefficient, cooldown_multiplier,
         )
         
         # Запускаем симуляцию
-        simulator = Simulator(config)
-        result = simulator.run_simulation()
+        with interactive_simulator_lock:
+            simulator = interactive_simulator
+            result = simulator.resimulate(config)
+            max_level = max(simulator.workflow.user_levels.keys(), default=0)
+            # Данные об уровнях для графиков
+            user_levels_data = {str(k): v.gold_per_sec for k, v in simulator.workflow.user_levels.items()}
         
         # Формируем сообщение об успешной симуляции
         completion_message = f"Simulation completed in {result.timestamp} seconds"
         status_message = create_status_message("success", "Simulation completed successfully", completion_message)
         
         # Получаем данные для отображения
-        history_data = result.history
+        history_data = result.history_dicts()
         config_data = {
             "base_gold": base_gold,
             "earn_coefficient": earn_coefficient,
@@ -135,25 +152,44 @@ def run_simulation(n_clicks, base_gold, earn_coefficient, cooldown_multiplier,
             "check_times": check_times_data.get("schedule", []),
             "game_duration": game_duration,
             "simulation_algorithm": simulation_algorithm,
-            "max_level": max(simulator.workflow.user_levels.keys(), default=0)
+            "max_level": max_level,
+            "tapping": _effective_tapping(config.tapping)
         }
         
-        # Данные об уровнях для графиков
-        user_levels_data = {str(k): v.gold_per_sec for k, v in simulator.workflow.user_levels.items()}
-        
     except Exception as e:
         status_message = create_status_message("error", "Error during simulation execution", str(e))
         return status_message, None, None, {"auto_run": False}
         
-    # Данные симуляции для хранилища
+    # Данные симуляции остаются на сервере, в браузер уходит только ID
     simulation_data = {
         "history": history_data, 
         "timestamp": result.timestamp, 
         "stop_reason": result.stop_reason,
+        "stop_code": result.stop_code.value if result.stop_code else None,
         "config": config_data
     }
+    store_data = simulation_data_store.put(result.simulation_id, simulation_data)
+    
+    return status_message, store_data, user_levels_data, {"auto_run": True}
+
+def _effective_tapping(tapping: Optional[TappingConfig]) -> Dict[str, Any]:
+    """
+    Параметры тапания, с которыми шла симуляция, после подстановки значений по умолчанию.
     
-    return status_message, simulation_data, user_levels_data, {"auto_run": True}
+    Args:
+        tapping: Конфигурация тапания симуляции
+        
+    Returns:
+        Dict[str, Any]: Флаг тапания, запас энергии, скорость тапания и золото за тап
+    """
+    tapping = tapping or TappingConfig(is_tapping=False)
+    max_energy_capacity, tap_speed, tap_coef = tapping_parameters(tapping)
+    return {
+        "is_tapping": tapping.is_tapping is True,
+        "max_energy_capacity": max_energy_capacity,
+        "tap_speed": tap_speed,
+        "tap_coef": tap_coef
+    }
 
 def _create_simulation_config(base_gold: float, earn_coefficient: float, cooldown_multiplier: float, 
                              check_times_data: dict, game_duration: int, simulation_algorithm: str, 
@@ -239,6 +275,8 @@ def _create_simulation_config(base_gold: float, earn_coefficient: float, cooldow
     
     # Устанавливаем алгоритм симуляции
     config.simulation_algorithm = SimulationAlgorithm(simulation_algorithm)
+    # Результат совпадает с событийным движком, но сессии считаются без перебора покупок
+    config.simulation_engine = SimulationEngine.ANALYTIC
     
     # Добавляем конфигурацию тапания, если она включена
     if is_tapping and isinstance(is_tapping, list) and 'is_tapping' in is_tapping:
@@ -332,12 +370,14 @@ def update_completion_info(data, auto_run_data):
     Обновляет информацию о завершении симуляции.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         list: [информация о времени, информация о ресурсах]
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not data or not auto_run_data or not auto_run_data.get("auto_run"):
         await_run_message = html.Div([
@@ -386,12 +426,14 @@ def update_key_metrics(data, auto_run_data):
     Обновляет ключевые метрики симуляции.
     
     Args:
-        data: Данные симуляции
+        data: Содержимое simulation-data-store (ID симуляции)
         auto_run_data: Данные о состоянии автозапуска
         
     Returns:
         html.Div: Блок с метриками
     """
+    data = load_simulation_data(data)
+    
     # Проверяем, была ли запущена симуляция
     if not data or not auto_run_data or not auto_run_data.get("auto_run"):
         return html.Div([
@@ -40,6 +40,25 @@ class SimulationAlgorithm(Enum):
     SEQUENTIAL = "sequential"  # Последовательное улучшение
     FIRST_AVAILABLE = "first_available"  # Первое доступное улучшение
 
+class SimulationEngine(Enum):
+    """Движки продвижения игрового времени."""
+    TICK = "tick"  # Посекундный перебор времени (эталонный движок)
+    EVENT = "event"  # Переход от события к событию через очередь с приоритетом
+    ANALYTIC = "analytic"  # Событийный движок с аналитическим решением сессий последовательного алгоритма
+
+class HistoryMode(Enum):
+    """Режимы записи истории симуляции."""
+    FULL = "full"  # Состояние на каждый вход и все действия
+    CHECKPOINTS = "checkpoints"  # Состояние на первый вход каждого дня, без действий
+    NONE = "none"  # Без истории, только итоговые показатели
+
+class StopCode(Enum):
+    """Причины остановки симуляции."""
+    COMPLETED = "completed"  # Все локации улучшены до максимума
+    NO_PROGRESS = "no_progress"  # Состояние повторяется изо дня в день, прогресс невозможен
+    MAX_DAYS = "max_days"  # Достигнут предел игровых дней
+    MAX_WALL_SECONDS = "max_wall_seconds"  # Достигнут предел реального времени
+
 @dataclass
 class UserLevelConfig:
     xp_required: int
@@ -55,7 +74,14 @@ class SimulationConfig:
     check_schedule: List[int]
     economy: EconomyConfig = field(default_factory=EconomyConfig)
     simulation_algorithm: SimulationAlgorithm = SimulationAlgorithm.SEQUENTIAL  # Алгоритм симуляции
+    simulation_engine: SimulationEngine = SimulationEngine.EVENT  # Движок продвижения времени
+    fast_forward_idle: bool = False  # Пропускать дни простоя одной записью (только событийные движки)
+    max_days: Optional[int] = None  # Предел игровых дней (None - без ограничения)
+    max_wall_seconds: Optional[float] = None  # Предел реального времени симуляции в секундах
+    stop_on_stall: bool = True  # Останавливаться, если состояние повторяется изо дня в день
+    keyframe_interval: int = 100  # Каждое N-е состояние истории хранит все локации, остальные - только изменения
     tapping: Optional['TappingConfig'] = None  # Конфигурация тапания
+    behaviour: Optional['PlayerBehaviourConfig'] = None  # Случайное поведение игрока (None - строго по расписанию)
 
 @dataclass
 class TappingConfig:
@@ -63,4 +89,12 @@ class TappingConfig:
     is_tapping: bool = False  # Флаг активности тапания
     max_energy_capacity: int = 700  # Максимальный запас энергии
     tap_speed: float = 3.0  # Скорость тапания (тапов в секунду)
-    tap_coef: float = 1.0  # Множитель золота за тап (уровень персонажа * tap_coef) 
\ No newline at end of file
+    tap_coef: float = 1.0  # Множитель золота за тап (уровень персонажа * tap_coef) 
+
+@dataclass
+class PlayerBehaviourConfig:
+    """Случайное поведение игрока вокруг расписания проверок."""
+    login_jitter: float = 1800.0  # Стандартное отклонение времени входа от расписания, сек
+    skip_day_probability: float = 0.1  # Вероятность пропустить день целиком
+    session_sigma: float = 0.3  # Сигма логнормального множителя длительности сессии
+    seed: int = 0  # Зерно генератора случайных чисел
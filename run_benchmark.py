@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Скрипт для замера производительности движка симуляции.
+
+Запускает симуляцию на синтетической конфигурации большого размера
+(по умолчанию 1000 локаций по 50 уровней) и выводит время выполнения.
+"""
+
+import sys
+import os
+import argparse
+import logging
+import time
+
+# Добавляем корневую директорию проекта в sys.path для корректного импорта модулей
+sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
+
+from simulator import Simulator
+from config.simulation_config import create_synthetic_config
+from models.config import SimulationAlgorithm, SimulationEngine
+
+def parse_arguments():
+    """
+    Разбор аргументов командной строки.
+
+    Returns:
+        argparse.Namespace: Аргументы командной строки
+    """
+    parser = argparse.ArgumentParser(description="Замер производительности симулятора Indonesian Adventure")
+
+    parser.add_argument(
+        "--locations",
+        type=int,
+        help="Количество локаций в синтетической конфигурации",
+        default=1000
+    )
+
+    parser.add_argument(
+        "--levels",
+        type=int,
+        help="Количество уровней каждой локации",
+        default=50
+    )
+
+    parser.add_argument(
+        "--algorithm",
+        choices=["sequential", "first_available"],
+        help="Алгоритм симуляции (sequential или first_available)",
+        default="sequential"
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["event", "analytic", "tick"],
+        help="Движок симуляции (event - по событиям, analytic - аналитические сессии, tick - посекундный)",
+        default="event"
+    )
+
+    parser.add_argument(
+        "--history-mode",
+        choices=["full", "checkpoints", "none"],
+        help="Подробность истории (full - все входы и действия, checkpoints - по дням, none - только итоги)",
+        default="full"
+    )
+
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        help="Количество повторов замера",
+        default=3
+    )
+
+    return parser.parse_args()
+
+def main():
+    """Функция для запуска замера производительности."""
+    args = parse_arguments()
+
+    # Логирование каждого улучшения занимает больше времени, чем сама симуляция
+    logging.disable(logging.INFO)
+
+    config = create_synthetic_config(args.locations, args.levels)
+    config.simulation_algorithm = SimulationAlgorithm(args.algorithm)
+    config.simulation_engine = SimulationEngine(args.engine)
+
+    print(f"Синтетическая конфигурация: {args.locations} локаций x {args.levels} уровней, "
+          f"алгоритм {args.algorithm}, движок {args.engine}, история {args.history_mode}")
+
+    timings = []
+    for _ in range(args.repeat):
+        simulator = Simulator(config)
+        started = time.perf_counter()
+        result = simulator.run_simulation(history_mode=args.history_mode)
+        timings.append(time.perf_counter() - started)
+
+    summary = result if args.history_mode == "none" else result.summary
+    upgrades = summary.location_upgrades
+    best = min(timings)
+
+    print(f"  - Simulated days: {summary.days:.1f}")
+    print(f"  - Location upgrades: {upgrades}")
+    print(f"  - Best time: {best * 1000:.1f} ms (of {args.repeat} runs)")
+    print(f"  - Time per upgrade: {best / max(upgrades, 1) * 1e6:.1f} us")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
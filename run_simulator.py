@@ -10,16 +10,21 @@ import sys
 import os
 import argparse
 import json
+import logging
 from pathlib import Path
 
 # Добавляем корневую директорию проекта в sys.path для корректного импорта модулей
 sys.path.insert(0, os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
 
-from simulator import Simulator
+from simulator import SWEEP_PARAMETERS, Simulator
 from config.simulation_config import create_sample_config
 from utils.economy import format_time
+from utils.result_cache import ResultCache
 from utils.validation import is_config_valid
-from models.config import EconomyConfig, SimulationAlgorithm, StartingBalanceConfig, TappingConfig
+from workflow.event_log import PASSIVE_INCOME, TAPPING_INCOME
+from workflow.tapping import tapping_parameters
+from models.config import (EconomyConfig, PlayerBehaviourConfig, SimulationAlgorithm, SimulationEngine,
+                           StartingBalanceConfig, StopCode, TappingConfig)
 
 def parse_arguments():
     """
@@ -84,6 +89,110 @@ def parse_arguments():
         help="Алгоритм симуляции (sequential или first_available)"
     )
     
+    parser.add_argument(
+        "--engine", 
+        choices=["event", "analytic", "tick"],
+        help="Движок симуляции (event - по событиям, analytic - аналитические сессии, tick - посекундный)"
+    )
+    
+    parser.add_argument(
+        "--fast-forward-idle", 
+        action="store_true", 
+        help="Пропускать дни, в которые нечего купить, одной записью в истории (движки event и analytic)"
+    )
+    
+    parser.add_argument(
+        "--max-days", 
+        type=int,
+        help="Предел игровых дней симуляции"
+    )
+    
+    parser.add_argument(
+        "--max-wall-seconds", 
+        type=float,
+        help="Предел реального времени симуляции в секундах"
+    )
+    
+    parser.add_argument(
+        "--sweep", 
+        action="append",
+        metavar="PARAM=V1,V2,...",
+        help=f"Перебор значений параметра ({', '.join(SWEEP_PARAMETERS)}), "
+             f"можно указать несколько раз - перебираются все сочетания"
+    )
+    
+    # Параметры метода Монте-Карло
+    parser.add_argument(
+        "--players", 
+        type=int,
+        help="Симулировать указанное число игроков со случайным поведением и вывести перцентили по дням"
+    )
+    
+    parser.add_argument(
+        "--login-jitter", 
+        type=float,
+        help="Стандартное отклонение времени входа от расписания в секундах",
+        default=1800.0
+    )
+    
+    parser.add_argument(
+        "--skip-day-probability", 
+        type=float,
+        help="Вероятность пропустить день целиком",
+        default=0.1
+    )
+    
+    parser.add_argument(
+        "--session-sigma", 
+        type=float,
+        help="Разброс длительности сессии (сигма логнормального множителя)",
+        default=0.3
+    )
+    
+    parser.add_argument(
+        "--seed", 
+        type=int,
+        help="Зерно генератора случайных чисел",
+        default=0
+    )
+    
+    parser.add_argument(
+        "--workers", 
+        type=int,
+        help="Количество процессов для перебора и метода Монте-Карло (по умолчанию - по числу ядер)"
+    )
+    
+    parser.add_argument(
+        "--batch", 
+        action="store_true",
+        help="Считать все точки перебора вместе векторным движком в одном процессе"
+    )
+    
+    parser.add_argument(
+        "--checkpoint", 
+        type=str,
+        help="Файл контрольной точки: пишется при остановке по пределу дней или времени и каждые --checkpoint-every дней"
+    )
+    
+    parser.add_argument(
+        "--checkpoint-every", 
+        type=int,
+        help="Период записи контрольной точки в днях",
+        default=0
+    )
+    
+    parser.add_argument(
+        "--resume", 
+        type=str,
+        help="Продолжить симуляцию с контрольной точки (например, с увеличенным --max-days)"
+    )
+    
+    parser.add_argument(
+        "--no-cache", 
+        action="store_true",
+        help="Не использовать кэш результатов и всегда запускать симуляцию заново"
+    )
+    
     parser.add_argument(
         "--export", 
         type=str, 
@@ -129,6 +238,148 @@ def parse_arguments():
     
     return parser.parse_args()
 
+def parse_sweep_grid(specs):
+    """
+    Разбирает описания перебора вида "PARAM=V1,V2,...".
+    
+    Args:
+        specs: Описания из аргументов --sweep
+        
+    Returns:
+        Dict[str, List[float]]: Значения для каждого параметра
+    """
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        name = name.strip()
+        if name not in SWEEP_PARAMETERS or not values:
+            print(f"Ошибка: некорректный параметр перебора '{spec}'")
+            sys.exit(1)
+        cast = int if name == "game_duration" else float
+        grid[name] = [cast(value) for value in values.split(",")]
+    return grid
+
+def run_sweep(config, args):
+    """
+    Запускает перебор параметров и выводит итоги каждой точки по мере готовности.
+    
+    Args:
+        config: Базовая конфигурация
+        args: Аргументы командной строки
+    """
+    grid = parse_sweep_grid(args.sweep)
+    total = 1
+    for values in grid.values():
+        total *= len(values)
+    
+    # Журнал каждого улучшения в тысячах запусков только замедляет перебор
+    logging.disable(logging.INFO)
+    
+    print(f"Перебор {total} точек...")
+    results = []
+    for point, summary in Simulator(config).sweep(grid, workers=args.workers, batch=args.batch):
+        params = ", ".join(f"{name}={value}" for name, value in point.items())
+        print(f"  - {params}: {summary.days:.1f} days, level {summary.user_level}, "
+              f"{summary.location_upgrades} upgrades, {summary.stop_code.value}")
+        results.append({
+            "params": point,
+            "timestamp": summary.timestamp,
+            "user_level": summary.user_level,
+            "gold": summary.gold,
+            "location_upgrades": summary.location_upgrades,
+            "level_up_times": summary.level_up_times,
+            "stop_code": summary.stop_code.value,
+            "stop_reason": summary.stop_reason
+        })
+    
+    if args.export:
+        with open(args.export, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты экспортированы в {args.export}")
+
+def run_monte_carlo(config, args):
+    """
+    Симулирует игроков со случайным поведением и выводит перцентили по дням.
+    
+    Args:
+        config: Базовая конфигурация
+        args: Аргументы командной строки
+    """
+    behaviour = PlayerBehaviourConfig(
+        login_jitter=args.login_jitter,
+        skip_day_probability=args.skip_day_probability,
+        session_sigma=args.session_sigma,
+        seed=args.seed
+    )
+    days = args.max_days or 100
+    
+    # Журнал каждого улучшения в тысячах запусков только замедляет симуляцию
+    logging.disable(logging.INFO)
+    
+    print(f"Симуляция {args.players} игроков на {days} дней...")
+    bands = Simulator(config).monte_carlo(args.players, days, behaviour, workers=args.workers)
+    
+    labels = "/".join(f"p{q:g}" for q in bands.percentiles)
+    print(f"Перцентили {labels}:")
+    for day in range(bands.days):
+        level = "/".join(f"{value:g}" for value in bands.level[:, day])
+        completed = "/".join(f"{value:g}" for value in bands.locations_completed[:, day])
+        gold = "/".join(f"{value:.0f}" for value in bands.gold[:, day])
+        print(f"  - Day {day + 1}: level {level}, locations completed {completed}, gold {gold}")
+    
+    if args.export:
+        with open(args.export, 'w', encoding='utf-8') as f:
+            json.dump({
+                "players": bands.players,
+                "percentiles": list(bands.percentiles),
+                "level": bands.level.tolist(),
+                "gold": bands.gold.tolist(),
+                "locations_completed": bands.locations_completed.tolist()
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты экспортированы в {args.export}")
+
+def tapping_info(simulator, result):
+    """
+    Собирает сведения о тапании по начислениям, записанным симуляцией.
+
+    Золото и тапы суммируются по действиям "tapping_income" журнала,
+    доля в доходе считается от всего начисленного золота (пассивный доход и тапание).
+
+    Args:
+        simulator: Симулятор, выполнивший симуляцию
+        result: Результат симуляции с журналом действий
+
+    Returns:
+        Dict: Параметры тапания, итоги по тапанию и доля в доходе
+    """
+    max_energy, tap_speed, tap_coef = tapping_parameters(simulator.config.tapping)
+    user_level = result.summary.user_level
+    days_simulated = result.timestamp // 86400 + 1
+
+    total_gold = total_taps = total_income = 0.0
+    if result.events is not None:
+        columns = result.events.to_numpy()
+        type_code = columns["type_code"]
+        tapping = type_code == TAPPING_INCOME
+        income = tapping | (type_code == PASSIVE_INCOME)
+        total_gold = float(columns["gold_change"][tapping].sum())
+        total_taps = float(columns["taps"][tapping].sum())
+        total_income = float(columns["gold_change"][income].sum())
+
+    return {
+        "enabled": True,
+        "max_energy": max_energy,
+        "tap_speed": tap_speed,
+        "tap_coef": tap_coef,
+        "user_level": user_level,
+        "gold_per_tap": user_level * tap_coef,
+        "days_simulated": days_simulated,
+        "total_taps": total_taps,
+        "total_gold": total_gold,
+        "gold_per_day": total_gold / days_simulated,
+        "share_in_total_income": total_gold / total_income * 100 if total_income > 0 else 0.0
+    }
+
 def main():
     """Функция для запуска симуляции с поддержкой аргументов командной строки."""
     args = parse_arguments()
@@ -164,6 +415,20 @@ def main():
     if args.algorithm is not None:
         config.simulation_algorithm = SimulationAlgorithm(args.algorithm)
     
+    # Обновляем движок симуляции
+    if args.engine is not None:
+        config.simulation_engine = SimulationEngine(args.engine)
+    
+    # Включаем пропуск дней простоя
+    if args.fast_forward_idle:
+        config.fast_forward_idle = True
+    
+    # Обновляем пределы симуляции
+    if args.max_days is not None:
+        config.max_days = args.max_days
+    if args.max_wall_seconds is not None:
+        config.max_wall_seconds = args.max_wall_seconds
+    
     # Обновляем настройки тапания
     if hasattr(config, 'tapping'):
         # Включаем/выключаем тапание
@@ -206,10 +471,28 @@ def main():
         print("Ошибка: некорректная конфигурация")
         sys.exit(1)
     
+    if args.sweep:
+        run_sweep(config, args)
+        return
+    
+    if args.players:
+        run_monte_carlo(config, args)
+        return
+    
     # Создаем симулятор и запускаем симуляцию
     print("Запуск симуляции...")
-    simulator = Simulator(config)
-    result = simulator.run_simulation()
+    # Результат из кэша не оставляет состояния workflow для контрольной точки
+    use_cache = not (args.no_cache or args.checkpoint)
+    simulator = Simulator(config, cache=ResultCache() if use_cache else None)
+    simulator.workflow.checkpoint_path = args.checkpoint
+    simulator.workflow.checkpoint_interval_days = args.checkpoint_every
+    result = simulator.run_simulation(resume_from=args.resume)
+    summary = result.summary
+    
+    # Остановленную по пределу симуляцию можно продолжить с контрольной точки
+    if args.checkpoint and result.stop_code in (StopCode.MAX_DAYS, StopCode.MAX_WALL_SECONDS):
+        simulator.workflow.checkpoint(args.checkpoint)
+        print(f"Контрольная точка сохранена в {args.checkpoint}")
     
     # Выводим результаты
     time_passed = format_time(result.timestamp)
@@ -217,48 +500,36 @@ def main():
     
     # Выводим финальное состояние
     print(f"Final state:")
-    print(f"  - User level: {simulator.workflow.balance.user_level}")
-    print(f"  - Gold: {simulator.workflow.balance.gold:.2f}")
-    print(f"  - XP: {simulator.workflow.balance.xp}")
-    print(f"  - Keys: {simulator.workflow.balance.keys}")
-    print(f"  - Earn per sec: {simulator.workflow.balance.earn_per_sec:.2f}")
+    print(f"  - User level: {summary.user_level}")
+    print(f"  - Gold: {summary.gold:.2f}")
+    print(f"  - XP: {summary.xp}")
+    print(f"  - Keys: {summary.keys}")
+    print(f"  - Earn per sec: {summary.earn_per_sec:.2f}")
     
     # Отображаем информацию о тапании, если оно включено
+    tapping = {}
     if simulator.config.tapping and simulator.config.tapping.is_tapping:
-        # Получаем значения с проверкой на None
-        max_energy = simulator.config.tapping.max_energy_capacity or 700
-        tap_speed = simulator.config.tapping.tap_speed or 3.0
-        tap_coef = simulator.config.tapping.tap_coef or 0.1
-        
+        tapping = tapping_info(simulator, result)
+
         print("\nTapping information:")
-        print(f"  - Status: {'Enabled' if simulator.config.tapping.is_tapping else 'Disabled'}")
-        print(f"  - Energy capacity: {max_energy}")
-        print(f"  - Tap speed: {tap_speed:.1f} taps/sec")
-        print(f"  - Tap coef: {tap_coef:.2f}")
-        
-        # Расчет золота от тапания за все дни симуляции
-        days_simulated = result.timestamp // 86400 + 1
-        
-        # Получаем финальный уровень персонажа для расчета
-        final_user_level = simulator.workflow.balance.user_level
-        gold_per_tap = final_user_level * tap_coef
-        
-        # Расчет золота от тапания с учетом уровня персонажа
-        tapping_gold_per_day = max_energy * 0.7 * gold_per_tap
-        total_tapping_gold = tapping_gold_per_day * days_simulated
-        
-        print(f"  - Final user level: {final_user_level}")
-        print(f"  - Gold per tap: {gold_per_tap:.2f} (level {final_user_level} * coef {tap_coef:.2f})")
-        print(f"  - Estimated tapping gold per day: {tapping_gold_per_day:.2f}")
-        print(f"  - Total tapping gold for {days_simulated} days: {total_tapping_gold:.2f}")
-        print(f"  - Share in total income: {(total_tapping_gold / simulator.workflow.balance.gold * 100):.1f}%")
+        print("  - Status: Enabled")
+        print(f"  - Energy capacity: {tapping['max_energy']}")
+        print(f"  - Tap speed: {tapping['tap_speed']:.1f} taps/sec")
+        print(f"  - Tap coef: {tapping['tap_coef']:.2f}")
+        print(f"  - Final user level: {tapping['user_level']}")
+        print(f"  - Gold per tap: {tapping['gold_per_tap']:.2f} "
+              f"(level {tapping['user_level']} * coef {tapping['tap_coef']:.2f})")
+        print(f"  - Taps for {tapping['days_simulated']} days: {tapping['total_taps']:.0f}")
+        print(f"  - Tapping gold per day: {tapping['gold_per_day']:.2f}")
+        print(f"  - Total tapping gold for {tapping['days_simulated']} days: {tapping['total_gold']:.2f}")
+        print(f"  - Share in total income: {tapping['share_in_total_income']:.1f}%")
     
     # Если указан флаг --verbose, выводим подробную информацию
     if args.verbose:
         print("\nLocation information:")
-        for loc_id, location in sorted(simulator.workflow.locations.items()):
-            status = "Available" if location.available else "Not available"
-            print(f"  - Location {loc_id}: level {location.current_level}, {status}")
+        for loc_id, location in sorted(result.locations_at(-1).items()):
+            status = "Available" if location["available"] else "Not available"
+            print(f"  - Location {loc_id}: level {location['current_level']}, {status}")
     
     # Экспортируем результат, если указан путь
     if args.export:
@@ -269,36 +540,15 @@ def main():
         if not export_dir.exists() and str(export_dir) != ".":
             export_dir.mkdir(parents=True, exist_ok=True)
         
-        # Добавляем информацию о тапании, если оно включено
-        tapping_info = {}
-        if simulator.config.tapping and simulator.config.tapping.is_tapping:
-            # Получаем значения с проверкой на None
-            max_energy = simulator.config.tapping.max_energy_capacity or 700
-            tap_speed = simulator.config.tapping.tap_speed or 3.0
-            tap_coef = simulator.config.tapping.tap_coef or 0.1
-            
-            days_simulated = result.timestamp // 86400 + 1
-            tapping_gold_per_day = max_energy * 0.7 * tap_coef
-            total_tapping_gold = tapping_gold_per_day * days_simulated
-            
-            tapping_info = {
-                "enabled": simulator.config.tapping.is_tapping,
-                "max_energy": max_energy,
-                "tap_speed": tap_speed,
-                "tap_coef": tap_coef,
-                "gold_per_day": tapping_gold_per_day,
-                "total_gold": total_tapping_gold,
-                "share_in_total_income": (total_tapping_gold / simulator.workflow.balance.gold * 100)
-            }
-        
         with open(export_path, 'w', encoding='utf-8') as f:
             # Преобразуем историю в сериализуемый формат
-            serializable_history = [state for state in result.history]
+            serializable_history = result.history_dicts()
             json.dump({
                 "timestamp": result.timestamp,
                 "stop_reason": result.stop_reason,
+                "stop_code": result.stop_code.value if result.stop_code else None,
                 "final_state": simulator.result_summary,
-                "tapping": tapping_info,
+                "tapping": tapping,
                 "history": serializable_history if args.verbose else []
             }, f, ensure_ascii=False, indent=2)
         
@@ -4,17 +4,35 @@
 Обеспечивает симуляцию игрового процесса с заданной конфигурацией.
 """
 
+import asyncio
+import contextlib
+import copy
+import itertools
 import logging
-from typing import Dict, List, Optional, Union
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import (Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple,
+                    Union)
 
-from models.config import SimulationConfig
+import numpy as np
+
+from models.config import EconomyConfig, HistoryMode, PlayerBehaviourConfig, SimulationConfig, StopCode
 from models.enums import LocationRarityType
+from workflow.balance import Balance
+from workflow.batch import BatchWorkflow
+from workflow.compiled_config import CompiledSimulationConfig
 from workflow.location import Location
-from workflow.workflow import Workflow
-from workflow.simulation_response import SimulationResponse
+from workflow.monte_carlo import DailyBandAccumulator, MonteCarloBands
+from workflow.workflow import SimulationCancelled, Workflow
+from workflow.simulation_response import SimulationResponse, SimulationSummary
 from workflow.tapping import TappingEngine
 
 from config.simulation_config import create_sample_config
+from utils.economy import calculate_gold_per_sec
+from utils.result_cache import ResultCache, settings_fingerprint
 
 logging.basicConfig(
     level=logging.INFO,
@@ -22,6 +40,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Simulator")
 
+# Параметры, которые можно перебирать в Simulator.sweep
+SWEEP_PARAMETERS = ("base_gold_per_sec", "earn_coefficient", "cooldown_multiplier", "game_duration")
+
+# Базовая конфигурация перебора в процессе-исполнителе, передается один раз при его запуске
+_sweep_base_config: Optional[SimulationConfig] = None
+
+# Базовая конфигурация и горизонт Монте-Карло в процессе-исполнителе
+_monte_carlo_setup: Optional[Tuple[SimulationConfig, int]] = None
+
 class Simulator:
     """
     Симулятор игрового процесса Indonesian Adventure.
@@ -30,15 +57,21 @@ class Simulator:
     отслеживая прогресс, балансы и улучшения локаций.
     """
     
-    def __init__(self, config: Optional[SimulationConfig] = None):
+    def __init__(self, config: Optional[SimulationConfig] = None, cache: Optional[ResultCache] = None):
         """
         Инициализирует симулятор с указанной конфигурацией.
         
         Args:
             config: Конфигурация симуляции. Если не указана, используется пример конфигурации.
+            cache: Дисковый кэш результатов. Если указан, повторный запуск с той же
+                конфигурацией возвращает сохраненный результат без симуляции.
         """
         self.config = config or create_sample_config()
         self.workflow = Workflow()
+        self.cache = cache
+        self.last_summary: Optional[SimulationSummary] = None  # Итоги последнего запуска
+        # Отпечаток параметров без таблиц, таблицы и результат последнего запуска resimulate
+        self._previous_run: Optional[Tuple[Tuple[str, HistoryMode], CompiledSimulationConfig, SimulationResponse]] = None
         
     def setup_workflow(self) -> None:
         """
@@ -47,6 +80,9 @@ class Simulator:
         Инициализирует локации, кулдауны, уровни пользователя и расписание проверок
         на основе конфигурации.
         """
+        # Сбрасываем баланс прошлого запуска (начальный баланс задается в simulate)
+        self.workflow.balance = Balance()
+        
         # Добавляем все локации
         self._setup_locations()
         
@@ -62,6 +98,9 @@ class Simulator:
         self.workflow.check_schedule.clear()
         self.workflow.check_schedule.extend(self.config.check_schedule)
         
+        # Компилируем конфигурацию в таблицы для горячего цикла
+        self.workflow.compiled = CompiledSimulationConfig.from_config(self.config)
+        
         # Устанавливаем параметры экономики
         self.workflow.economy = self.config.economy
         
@@ -75,12 +114,27 @@ class Simulator:
                 initial_level = 1
                 if self.config.economy and self.config.economy.starting_balance:
                     initial_level = max(1, self.config.economy.starting_balance.xp // 1000)
-                print(f"DEBUG: Tapping engine initialized with tap_coef={self.config.tapping.tap_coef}, initial level={initial_level}")
+                logger.debug(f"Tapping engine initialized with tap_coef={self.config.tapping.tap_coef}, initial level={initial_level}")
             else:
-                print("DEBUG: Tapping is disabled in workflow")
+                logger.debug("Tapping is disabled in workflow")
         
         # Устанавливаем алгоритм симуляции
         self.workflow.simulation_algorithm = self.config.simulation_algorithm
+        
+        # Устанавливаем движок продвижения времени
+        self.workflow.simulation_engine = self.config.simulation_engine
+        self.workflow.fast_forward_idle = self.config.fast_forward_idle
+        
+        # Устанавливаем пределы симуляции
+        self.workflow.max_days = self.config.max_days
+        self.workflow.max_wall_seconds = self.config.max_wall_seconds
+        self.workflow.stop_on_stall = self.config.stop_on_stall
+        
+        # Устанавливаем частоту полных снимков локаций в истории
+        self.workflow.keyframe_interval = self.config.keyframe_interval
+        
+        # Устанавливаем случайное поведение игрока
+        self.workflow.behaviour = self.config.behaviour
     
     def _setup_locations(self) -> None:
         """
@@ -99,19 +153,344 @@ class Simulator:
                 keys=self.config.location_rarity_config[loc_config.rarity].keys_reward
             )
         
-    def run_simulation(self, simulation_id: Optional[str] = None) -> SimulationResponse:
+    def run_simulation(self, simulation_id: Optional[str] = None,
+                       history_mode: Union[HistoryMode, str] = HistoryMode.FULL,
+                       resume_from: Optional[Union[str, bytes]] = None
+                       ) -> Union[SimulationResponse, SimulationSummary]:
         """
         Запускает симуляцию и возвращает результат.
         
+        При заданном кэше результат берется из него, если конфигурация уже
+        симулировалась; тогда workflow остается в начальном состоянии, а итоги
+        доступны в `last_summary`. Запуски со случайным поведением игрока
+        и остановленные по пределу реального времени не кэшируются.
+        
         Args:
             simulation_id: Опциональный ID симуляции. Если не указан, генерируется автоматически.
+            history_mode: Подробность истории: "full" - состояние на каждый вход и все действия,
+                "checkpoints" - состояние на первый вход каждого дня, "none" - без истории.
+            resume_from: Контрольная точка (путь или содержимое `Workflow.checkpoint`),
+                с которой нужно продолжить симуляцию. История результата начинается с нее.
+            
+        Returns:
+            Union[SimulationResponse, SimulationSummary]: Результат симуляции с историей прогресса
+            или, в режиме "none", только итоговые показатели.
+        """
+        history_mode = HistoryMode(history_mode)
+        self.setup_workflow()
+        self.workflow.history_mode = history_mode
+        if resume_from is not None:
+            self.workflow.restore(resume_from)
+        
+        cache_key = None
+        if self.cache is not None and self.config.behaviour is None and resume_from is None:
+            cache_key = self.cache.key(self.config, history_mode, self.workflow.compiled)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                logger.info(f"Simulation result loaded from cache ({cache_key[:12]})")
+                return self._use_cached(result, simulation_id)
+        
+        response = self.workflow.simulate(simulation_id)
+        result = response.summary if history_mode == HistoryMode.NONE else response
+        self.last_summary = response.summary
+        
+        if cache_key is not None and response.stop_code != StopCode.MAX_WALL_SECONDS:
+            self.cache.put(cache_key, result)
+        return result
+    
+    def stream(self, simulation_id: Optional[str] = None,
+               history_mode: Union[HistoryMode, str] = HistoryMode.FULL) -> Iterator[Dict[str, Any]]:
+        """
+        Запускает симуляцию и отдает состояния истории по мере их готовности.
+        
+        Отданные состояния не хранятся, поэтому экспорт и агрегаты по длинным
+        симуляциям считаются в постоянной памяти. Если прервать перебор,
+        оставшаяся часть симуляции не считается. Итоги завершенной симуляции
+        доступны в `last_summary`. Кэш результатов не используется.
+        
+        Args:
+            simulation_id: Опциональный ID симуляции
+            history_mode: "full" - состояние на каждый вход, "checkpoints" - на первый вход дня
+            
+        Returns:
+            Iterator[Dict[str, Any]]: Состояния в виде `SimulationResponse.history_dicts()`
+        """
+        self.setup_workflow()
+        self.workflow.history_mode = HistoryMode(history_mode)
+        response = yield from self.workflow.iter_states(simulation_id)
+        self.last_summary = response.summary
+    
+    async def run_simulation_async(self, simulation_id: Optional[str] = None,
+                                   history_mode: Union[HistoryMode, str] = HistoryMode.FULL,
+                                   progress: Optional[Callable[[int], None]] = None
+                                   ) -> Union[SimulationResponse, SimulationSummary]:
+        """
+        Запускает `run_simulation` в рабочем потоке, не блокируя цикл событий.
+        
+        Отмена задачи останавливает симуляцию после текущего входа игрока:
+        корутина дожидается остановки рабочего потока и пробрасывает
+        `asyncio.CancelledError`. На одном симуляторе одновременно может идти
+        только одна симуляция.
+        
+        Args:
+            simulation_id: Опциональный ID симуляции
+            history_mode: Подробность истории, как в `run_simulation`
+            progress: Функция, которую цикл событий вызывает с числом прошедших игровых суток
+            
+        Returns:
+            Union[SimulationResponse, SimulationSummary]: Результат, как в `run_simulation`
+        """
+        loop = asyncio.get_running_loop()
+        cancel_event = self._install_worker_hooks(loop, progress)
+        try:
+            future = loop.run_in_executor(None, self.run_simulation, simulation_id, history_mode)
+            return await self._await_worker(future, cancel_event)
+        finally:
+            self.workflow.cancel_event = None
+            self.workflow.progress_callback = None
+    
+    async def astream(self, simulation_id: Optional[str] = None,
+                      history_mode: Union[HistoryMode, str] = HistoryMode.FULL,
+                      progress: Optional[Callable[[int], None]] = None,
+                      buffer_size: int = 64) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Асинхронный вариант `stream`: симуляция идет в рабочем потоке.
+        
+        Рабочий поток готовит не больше `buffer_size` состояний за раз, поэтому
+        медленный потребитель не накапливает историю в памяти. Отмена задачи
+        останавливает симуляцию так же, как в `run_simulation_async`.
+        
+        Args:
+            simulation_id: Опциональный ID симуляции
+            history_mode: "full" или "checkpoints", как в `stream`
+            progress: Функция, которую цикл событий вызывает с числом прошедших игровых суток
+            buffer_size: Сколько состояний рабочий поток готовит за одно обращение
+            
+        Returns:
+            AsyncIterator[Dict[str, Any]]: Состояния в виде `SimulationResponse.history_dicts()`
+        """
+        loop = asyncio.get_running_loop()
+        cancel_event = self._install_worker_hooks(loop, progress)
+        states = self.stream(simulation_id, history_mode)
+        try:
+            while True:
+                future = loop.run_in_executor(None, lambda: list(itertools.islice(states, buffer_size)))
+                chunk = await self._await_worker(future, cancel_event)
+                for state in chunk:
+                    yield state
+                if len(chunk) < buffer_size:
+                    break
+        finally:
+            states.close()
+            self.workflow.cancel_event = None
+            self.workflow.progress_callback = None
+    
+    def _install_worker_hooks(self, loop: asyncio.AbstractEventLoop,
+                              progress: Optional[Callable[[int], None]]) -> threading.Event:
+        """
+        Подключает к workflow запрос остановки и передачу прогресса в цикл событий.
+        
+        Args:
+            loop: Цикл событий, в котором вызывается progress
+            progress: Функция, получающая число прошедших игровых суток
+            
+        Returns:
+            threading.Event: Событие, по которому симуляция останавливается
+        """
+        cancel_event = threading.Event()
+        self.workflow.cancel_event = cancel_event
+        self.workflow.progress_callback = None
+        if progress is not None:
+            self.workflow.progress_callback = lambda day: loop.call_soon_threadsafe(progress, day)
+        return cancel_event
+    
+    @staticmethod
+    async def _await_worker(future: asyncio.Future, cancel_event: threading.Event) -> Any:
+        """
+        Ждет результат рабочего потока, при отмене останавливая симуляцию.
+        
+        Args:
+            future: Результат рабочего потока
+            cancel_event: Событие остановки симуляции
+            
+        Returns:
+            Any: Результат рабочего потока
+        """
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # Поток остановится после текущего входа; ждем его, чтобы симулятор освободился
+            cancel_event.set()
+            with contextlib.suppress(SimulationCancelled):
+                await future
+            raise
+    
+    def _use_cached(self, result: Union[SimulationResponse, SimulationSummary],
+                    simulation_id: Optional[str]) -> Union[SimulationResponse, SimulationSummary]:
+        """
+        Подготавливает результат из кэша как результат нового запуска.
+        
+        Args:
+            result: Сохраненный результат
+            simulation_id: ID симуляции (по умолчанию - новый)
+            
+        Returns:
+            Union[SimulationResponse, SimulationSummary]: Результат с новым ID
+        """
+        simulation_id = simulation_id or str(uuid.uuid4())
+        summary = result if isinstance(result, SimulationSummary) else result.summary
+        result.simulation_id = simulation_id
+        summary.simulation_id = simulation_id
+        self.last_summary = summary
+        return result
+    
+    def resimulate(self, config: SimulationConfig, simulation_id: Optional[str] = None,
+                   history_mode: Union[HistoryMode, str] = HistoryMode.FULL
+                   ) -> Union[SimulationResponse, SimulationSummary]:
+        """
+        Запускает симуляцию измененной конфигурации, повторно используя начало предыдущего запуска.
+        
+        Workflow хранит снимки состояния на начало каждых суток. Если по сравнению
+        с предыдущим вызовом изменились только таблицы локаций, кулдаунов и уровней
+        персонажа, симуляция продолжается со снимка последних суток, до которых
+        измененные значения не использовались (см. `Workflow.resimulate`).
+        Правка поздних уровней поэтому пересчитывает только конец симуляции.
+        Первый вызов и изменение остальных параметров запускают симуляцию целиком.
+        
+        Args:
+            config: Новая конфигурация симуляции
+            simulation_id: Опциональный ID симуляции
+            history_mode: Подробность истории, как в `run_simulation`
             
         Returns:
-            SimulationResponse: Результат симуляции с историей прогресса.
+            Union[SimulationResponse, SimulationSummary]: Результат, совпадающий с `run_simulation`
         """
+        history_mode = HistoryMode(history_mode)
+        self.config = config
         self.setup_workflow()
-        return self.workflow.simulate(simulation_id)
+        self.workflow.history_mode = history_mode
+        self.workflow.keep_day_snapshots = True
+        
+        cache_key = None
+        if self.cache is not None and config.behaviour is None:
+            cache_key = self.cache.key(config, history_mode, self.workflow.compiled)
+            result = self.cache.get(cache_key)
+            if result is not None:
+                logger.info(f"Simulation result loaded from cache ({cache_key[:12]})")
+                return self._use_cached(result, simulation_id)
+        
+        settings = (settings_fingerprint(config), history_mode)
+        previous = self._previous_run
+        if previous is not None and previous[0] == settings:
+            response = self.workflow.resimulate(previous[2], previous[1], simulation_id)
+        else:
+            response = self.workflow.simulate(simulation_id)
+        self._previous_run = (settings, self.workflow.compiled, response)
+        
+        result = response.summary if history_mode == HistoryMode.NONE else response
+        self.last_summary = response.summary
+        if cache_key is not None and response.stop_code != StopCode.MAX_WALL_SECONDS:
+            self.cache.put(cache_key, result)
+        return result
 
+    def sweep(self, grid: Union[Mapping[str, Sequence[Any]], Iterable[Dict[str, Any]]],
+              workers: Optional[int] = None,
+              batch: bool = False) -> Iterator[Tuple[Dict[str, Any], SimulationSummary]]:
+        """
+        Перебирает параметры экономики поверх текущей конфигурации.
+        
+        Каждая точка перебора запускается без истории, а итоговые показатели
+        возвращаются по мере готовности в порядке точек. Базовая конфигурация
+        передается каждому процессу один раз при его запуске.
+        
+        Args:
+            grid: Значения параметров из SWEEP_PARAMETERS (перебираются все сочетания)
+                или готовый список точек
+            workers: Количество процессов. По умолчанию - по числу ядер,
+                при 1 точки считаются в текущем процессе.
+            batch: Считать все точки вместе векторным движком BatchWorkflow
+                в текущем процессе (workers не используется)
+            
+        Returns:
+            Iterator[Tuple[Dict[str, Any], SimulationSummary]]: Точка и итоги ее симуляции
+        """
+        if isinstance(grid, Mapping):
+            names = list(grid.keys())
+            points = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+        else:
+            points = [dict(point) for point in grid]
+        
+        for point in points:
+            unknown = set(point) - set(SWEEP_PARAMETERS)
+            if unknown:
+                raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+        
+        if batch:
+            summaries = BatchWorkflow([_apply_sweep_point(self.config, point) for point in points]).simulate()
+            yield from zip(points, summaries)
+            return
+        
+        workers = workers or os.cpu_count() or 1
+        if workers == 1:
+            for point in points:
+                yield _run_sweep_point(point, self.config)
+            return
+        
+        # Пачки точек уменьшают число обменов между процессами
+        chunksize = max(1, len(points) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                 initargs=(self.config,)) as executor:
+            yield from executor.map(_run_sweep_point, points, chunksize=chunksize)
+    
+    def monte_carlo(self, players: int, days: int, behaviour: Optional[PlayerBehaviourConfig] = None,
+                    percentiles: Sequence[float] = (10, 50, 90),
+                    workers: Optional[int] = None) -> MonteCarloBands:
+        """
+        Симулирует множество игроков со случайным поведением и считает перцентили по дням.
+        
+        Игрок i получает собственное зерно, выведенное из `behaviour.seed` и i,
+        поэтому результат не зависит от числа процессов. Показатели игроков
+        сразу сворачиваются в гистограммы, память не растет с числом игроков.
+        
+        Args:
+            players: Количество игроков
+            days: Горизонт в днях
+            behaviour: Параметры поведения (по умолчанию - из конфигурации или стандартные)
+            percentiles: Перцентили от 0 до 100
+            workers: Количество процессов. По умолчанию - по числу ядер,
+                при 1 игроки считаются в текущем процессе.
+            
+        Returns:
+            MonteCarloBands: Перцентили уровня, золота и завершенных локаций для каждого дня
+            
+        Raises:
+            ValueError: Если игроков или дней меньше одного
+        """
+        if players < 1:
+            raise ValueError(f"players must be at least 1, got {players}")
+        if days < 1:
+            raise ValueError(f"days must be at least 1, got {days}")
+        config = copy.deepcopy(self.config)
+        config.behaviour = behaviour or config.behaviour or PlayerBehaviourConfig()
+        config.max_days = days
+        
+        workers = workers or os.cpu_count() or 1
+        # Пачки игроков уменьшают число обменов между процессами
+        chunk = max(1, min(1000, players // (workers * 8)))
+        chunks = [range(start, min(start + chunk, players)) for start in range(0, players, chunk)]
+        
+        accumulator = _new_band_accumulator(config, days)
+        if workers == 1:
+            for player_ids in chunks:
+                accumulator.merge(_run_player_chunk(player_ids, (config, days)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_monte_carlo_worker,
+                                     initargs=(config, days)) as executor:
+                for partial in executor.map(_run_player_chunk, chunks):
+                    accumulator.merge(partial)
+        
+        return accumulator.bands(percentiles)
+    
     @property
     def result_summary(self) -> Dict[str, Union[int, float, str]]:
         """
@@ -120,6 +499,14 @@ class Simulator:
         Returns:
             Dict: Словарь с основными метриками симуляции
         """
+        if self.last_summary is not None:
+            return {
+                "user_level": self.last_summary.user_level,
+                "gold": self.last_summary.gold,
+                "xp": self.last_summary.xp,
+                "keys": self.last_summary.keys,
+                "earn_per_sec": self.last_summary.earn_per_sec
+            }
         return {
             "user_level": self.workflow.balance.user_level,
             "gold": self.workflow.balance.gold,
@@ -129,6 +516,129 @@ class Simulator:
         }
 
 
+def _apply_sweep_point(config: SimulationConfig, point: Dict[str, Any]) -> SimulationConfig:
+    """
+    Применяет точку перебора к копии конфигурации.
+    
+    Локации точкой не меняются и остаются общими с базовой конфигурацией.
+    
+    Args:
+        config: Базовая конфигурация
+        point: Значения параметров из SWEEP_PARAMETERS
+        
+    Returns:
+        SimulationConfig: Новая конфигурация
+    """
+    economy = config.economy
+    base_gold = point.get("base_gold_per_sec", economy.base_gold_per_sec)
+    earn_coefficient = point.get("earn_coefficient", economy.earn_coefficient)
+    
+    user_levels = {level: replace(level_config) for level, level_config in config.user_levels.items()}
+    # Доход уровней персонажа зависит от параметров экономики
+    if "base_gold_per_sec" in point or "earn_coefficient" in point:
+        for level, level_config in user_levels.items():
+            level_config.gold_per_sec = calculate_gold_per_sec(base_gold, earn_coefficient, level)
+    
+    location_cooldowns = dict(config.location_cooldowns)
+    if "cooldown_multiplier" in point:
+        for level, cooldown in location_cooldowns.items():
+            location_cooldowns[level] = int(cooldown * point["cooldown_multiplier"])
+    
+    return replace(
+        config,
+        economy=EconomyConfig(
+            base_gold_per_sec=base_gold,
+            earn_coefficient=earn_coefficient,
+            starting_balance=replace(economy.starting_balance),
+            game_duration=point.get("game_duration", economy.game_duration)
+        ),
+        user_levels=user_levels,
+        location_cooldowns=location_cooldowns,
+        check_schedule=list(config.check_schedule)
+    )
+
+def _init_sweep_worker(config: SimulationConfig) -> None:
+    """
+    Запоминает базовую конфигурацию перебора в процессе-исполнителе.
+    
+    Args:
+        config: Базовая конфигурация
+    """
+    global _sweep_base_config
+    _sweep_base_config = config
+    # Журнал каждого улучшения в тысячах запусков только замедляет перебор
+    logging.disable(logging.INFO)
+
+def _run_sweep_point(point: Dict[str, Any],
+                     config: Optional[SimulationConfig] = None) -> Tuple[Dict[str, Any], SimulationSummary]:
+    """
+    Запускает симуляцию одной точки перебора без истории.
+    
+    Args:
+        point: Значения параметров из SWEEP_PARAMETERS
+        config: Базовая конфигурация (по умолчанию - переданная процессу-исполнителю)
+        
+    Returns:
+        Tuple[Dict[str, Any], SimulationSummary]: Точка и итоги ее симуляции
+    """
+    simulator = Simulator(_apply_sweep_point(config or _sweep_base_config, point))
+    summary = simulator.run_simulation(history_mode=HistoryMode.NONE)
+    return point, summary
+
+
+def _new_band_accumulator(config: SimulationConfig, days: int) -> DailyBandAccumulator:
+    """
+    Создает накопитель дневных показателей под конфигурацию.
+    
+    Args:
+        config: Конфигурация симуляции
+        days: Горизонт в днях
+        
+    Returns:
+        DailyBandAccumulator: Пустой накопитель
+    """
+    locations_count = sum(1 for loc_config in config.locations.values() if loc_config.levels)
+    return DailyBandAccumulator(days, max(config.user_levels.keys(), default=1), locations_count)
+
+def _init_monte_carlo_worker(config: SimulationConfig, days: int) -> None:
+    """
+    Запоминает конфигурацию Монте-Карло в процессе-исполнителе.
+    
+    Args:
+        config: Конфигурация с параметрами поведения
+        days: Горизонт в днях
+    """
+    global _monte_carlo_setup
+    _monte_carlo_setup = (config, days)
+    # Журнал каждого улучшения в тысячах запусков только замедляет симуляцию
+    logging.disable(logging.INFO)
+
+def _run_player_chunk(player_ids: range,
+                      setup: Optional[Tuple[SimulationConfig, int]] = None) -> DailyBandAccumulator:
+    """
+    Симулирует пачку игроков и сворачивает их дневные показатели в гистограммы.
+    
+    Args:
+        player_ids: Номера игроков
+        setup: Конфигурация и горизонт (по умолчанию - переданные процессу-исполнителю)
+        
+    Returns:
+        DailyBandAccumulator: Гистограммы пачки
+    """
+    config, days = setup or _monte_carlo_setup
+    behaviour = config.behaviour
+    accumulator = _new_band_accumulator(config, days)
+    
+    for player in player_ids:
+        # Независимое зерно игрока, не зависящее от разбиения на пачки
+        seed = int(np.random.SeedSequence(behaviour.seed, spawn_key=(player,)).generate_state(1)[0])
+        simulator = Simulator(replace(config, behaviour=replace(behaviour, seed=seed)))
+        simulator.run_simulation(history_mode=HistoryMode.NONE)
+        accumulator.add(simulator.workflow.daily_metrics)
+    
+    return accumulator
+
+
 def main():
     """Функция для тестового запуска симуляции."""
     simulator = Simulator()
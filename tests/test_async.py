@@ -0,0 +1,106 @@
+"""
+Проверки асинхронного API симулятора: прогресса и отмены.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import asyncio
+import logging
+import unittest
+
+from config.simulation_config import create_sample_config
+from models.config import HistoryMode, SimulationConfig
+from models.enums import LocationRarityType
+from simulator import Simulator
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _config(**changes) -> SimulationConfig:
+    """Пример конфигурации с заданными полями."""
+    config = create_sample_config()
+    for name, value in changes.items():
+        setattr(config, name, value)
+    return config
+
+
+def _endless_config() -> SimulationConfig:
+    """Конфигурация, которая без отмены считается несколько секунд: прогресс упирается в уровень."""
+    config = _config(stop_on_stall=False, max_days=20000)
+    config.location_rarity_config[LocationRarityType.LEGENDARY].user_level_required = 99
+    return config
+
+
+class AsyncSimulationTest(unittest.IsolatedAsyncioTestCase):
+    """Асинхронный запуск совпадает с обычным, а отмена задачи останавливает рабочий поток."""
+
+    async def test_result_and_progress(self):
+        days = []
+        simulator = Simulator(_config())
+        result = await simulator.run_simulation_async(history_mode=HistoryMode.NONE, progress=days.append)
+        expected = Simulator(_config()).run_simulation(history_mode=HistoryMode.NONE)
+        self.assertEqual((result.timestamp, result.gold, result.stop_code),
+                         (expected.timestamp, expected.gold, expected.stop_code))
+
+        # Прогресс доставляется в цикл событий после возврата результата
+        await asyncio.sleep(0)
+        self.assertTrue(days)
+        self.assertEqual(days, sorted(days))
+        self.assertLessEqual(days[-1], result.timestamp // 86400 + 1)
+        self.assertIsNone(simulator.workflow.cancel_event)
+        self.assertIsNone(simulator.workflow.progress_callback)
+
+    async def test_cancel_stops_worker(self):
+        simulator = Simulator(_endless_config())
+        days = []
+
+        def progress(day: int) -> None:
+            days.append(day)
+            if day == 3:
+                task.cancel()
+
+        task = asyncio.create_task(simulator.run_simulation_async(history_mode=HistoryMode.NONE, progress=progress))
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertLess(days[-1], 1000)
+        self.assertIsNone(simulator.workflow.cancel_event)
+
+        # Рабочий поток остановлен, и симулятор готов к новому запуску
+        simulator.config.max_days = 5
+        summary = await simulator.run_simulation_async(history_mode=HistoryMode.NONE)
+        self.assertEqual(summary.timestamp, 5 * 86400)
+
+    async def test_astream_matches_stream(self):
+        expected = list(Simulator(_config(max_days=20)).stream())
+        simulator = Simulator(_config(max_days=20))
+        states = [state async for state in simulator.astream(buffer_size=7)]
+        self.assertEqual(states, expected)
+        self.assertEqual(simulator.last_summary.timestamp, 20 * 86400)
+
+    async def test_astream_cancel(self):
+        simulator = Simulator(_endless_config())
+        received = []
+
+        async def consume():
+            async for state in simulator.astream(history_mode=HistoryMode.CHECKPOINTS, buffer_size=4):
+                received.append(state)
+
+        task = asyncio.create_task(consume())
+        while len(received) < 8 and not task.done():
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertLess(received[-1]["timestamp"], 1000 * 86400)
+        self.assertIsNone(simulator.workflow.cancel_event)
+
+
+if __name__ == "__main__":
+    unittest.main()
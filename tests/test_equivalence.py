@@ -0,0 +1,270 @@
+"""
+Регрессионные проверки эквивалентности движков и производных данных.
+
+Каждая проверка получает один и тот же результат двумя способами на
+`create_sample_config()` и сравнивает их точно:
+
+- посекундный, событийный и аналитический движки;
+- векторный перебор BatchWorkflow и перебор по одной точке;
+- продолжение с контрольной точки и непрерывный запуск;
+- `Simulator.resimulate` и запуск с нуля;
+- `HistoryIndex` и прямой проход по истории.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import copy
+import logging
+import unittest
+from typing import Any, Dict, List, Tuple
+
+from config.simulation_config import create_sample_config
+from models.config import HistoryMode, SimulationAlgorithm, SimulationConfig, SimulationEngine, StopCode
+from simulator import Simulator
+from utils.data_processing import HistoryIndex
+
+# Итоговые показатели, которые должны совпадать
+SUMMARY_FIELDS = ("timestamp", "user_level", "gold", "xp", "keys", "earn_per_sec",
+                  "location_upgrades", "level_up_times", "stop_code", "stop_reason")
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _config(algorithm: SimulationAlgorithm, is_tapping: bool = True, **changes) -> SimulationConfig:
+    """Пример конфигурации с заданным алгоритмом, тапанием и полями."""
+    config = create_sample_config()
+    config.simulation_algorithm = algorithm
+    config.tapping.is_tapping = is_tapping
+    for name, value in changes.items():
+        setattr(config, name, value)
+    return config
+
+
+def _summary(result) -> Tuple:
+    """Итоговые показатели результата в сравнимом виде."""
+    summary = getattr(result, "summary", result)
+    return tuple(getattr(summary, name) for name in SUMMARY_FIELDS)
+
+
+def _history(result) -> List[Dict[str, Any]]:
+    """История результата с материализованными списками действий."""
+    return [dict(state, actions=list(state["actions"])) for state in result.history]
+
+
+class EngineEquivalenceTest(unittest.TestCase):
+    """Посекундный движок - эталон для событийного и аналитического."""
+
+    def test_engines_match_tick(self):
+        for algorithm in SimulationAlgorithm:
+            results = {}
+            for engine in SimulationEngine:
+                config = _config(algorithm, simulation_engine=engine, max_days=6)
+                result = Simulator(config).run_simulation()
+                actions = [(action["type"], action["timestamp"], action["gold_change"])
+                           for state in result.history for action in state["actions"]]
+                results[engine] = (_summary(result), actions)
+            with self.subTest(algorithm=algorithm.value):
+                self.assertEqual(results[SimulationEngine.EVENT], results[SimulationEngine.TICK])
+                self.assertEqual(results[SimulationEngine.ANALYTIC], results[SimulationEngine.TICK])
+
+    def test_analytic_skip_to_purchase_matches_event(self):
+        # Без тапания и записи действий аналитический движок перескакивает входы без покупок
+        for max_days in (None, 300):
+            results = {}
+            for engine in (SimulationEngine.EVENT, SimulationEngine.ANALYTIC):
+                for history_mode in (HistoryMode.NONE, HistoryMode.CHECKPOINTS):
+                    config = _config(SimulationAlgorithm.SEQUENTIAL, False, simulation_engine=engine, max_days=max_days)
+                    for location in config.locations.values():
+                        for level in location.levels.values():
+                            level.cost *= 20
+                    result = Simulator(config).run_simulation(history_mode=history_mode)
+                    states = [(state["timestamp"], state["balance"]) for state in getattr(result, "history", [])]
+                    results[engine, history_mode] = (_summary(result), states)
+            for history_mode in (HistoryMode.NONE, HistoryMode.CHECKPOINTS):
+                with self.subTest(max_days=max_days, history_mode=history_mode.value):
+                    self.assertEqual(results[SimulationEngine.ANALYTIC, history_mode],
+                                     results[SimulationEngine.EVENT, history_mode])
+
+    def test_fast_forward_idle_matches_full_run(self):
+        for algorithm in SimulationAlgorithm:
+            plain = Simulator(_config(algorithm)).run_simulation(history_mode=HistoryMode.NONE)
+            skipped = Simulator(_config(algorithm, fast_forward_idle=True)).run_simulation(
+                history_mode=HistoryMode.NONE
+            )
+            with self.subTest(algorithm=algorithm.value):
+                self.assertEqual(_summary(skipped), _summary(plain))
+
+
+class BatchSweepTest(unittest.TestCase):
+    """Векторный перебор совпадает с перебором по одной точке."""
+
+    GRID = {
+        "base_gold_per_sec": [0.2, 1.5],
+        "cooldown_multiplier": [0.5, 3],
+        "game_duration": [300, 3600],
+    }
+
+    def test_batch_matches_scalar_sweep(self):
+        for algorithm in SimulationAlgorithm:
+            for is_tapping in (False, True):
+                simulator = Simulator(_config(algorithm, is_tapping, max_days=40))
+                scalar = list(simulator.sweep(self.GRID, workers=1))
+                batch = list(simulator.sweep(self.GRID, batch=True))
+                with self.subTest(algorithm=algorithm.value, is_tapping=is_tapping):
+                    self.assertEqual([point for point, _ in batch], [point for point, _ in scalar])
+                    self.assertEqual([_summary(summary) for _, summary in batch],
+                                     [_summary(summary) for _, summary in scalar])
+
+
+class CheckpointResumeTest(unittest.TestCase):
+    """Запуск по частям через контрольные точки совпадает с непрерывным."""
+
+    def test_resume_matches_uninterrupted_run(self):
+        for algorithm in SimulationAlgorithm:
+            uninterrupted = Simulator(_config(algorithm)).run_simulation(history_mode=HistoryMode.NONE)
+
+            # Симуляция идет кусками по 13 дней, каждый следующий - с контрольной точки предыдущего
+            checkpoint = None
+            days = 13
+            while True:
+                simulator = Simulator(_config(algorithm, max_days=days))
+                result = simulator.run_simulation(history_mode=HistoryMode.NONE, resume_from=checkpoint)
+                if result.stop_code != StopCode.MAX_DAYS:
+                    break
+                checkpoint = simulator.workflow.checkpoint()
+                days += 13
+
+            with self.subTest(algorithm=algorithm.value):
+                self.assertIsNotNone(checkpoint)
+                self.assertEqual(_summary(result)[:-2], _summary(uninterrupted)[:-2])
+                self.assertEqual(result.stop_code, uninterrupted.stop_code)
+
+
+class ResimulateTest(unittest.TestCase):
+    """Повторная симуляция после правки таблиц совпадает с запуском с нуля."""
+
+    @staticmethod
+    def _edits(config: SimulationConfig) -> List[SimulationConfig]:
+        """Правки поздних и ранних значений таблиц, применяемые по очереди."""
+        edits = []
+        location_ids = sorted(config.locations)
+
+        config = copy.deepcopy(config)
+        late = config.locations[location_ids[-3]]
+        late.levels[max(late.levels)].cost += 1000
+        edits.append(config)
+
+        config = copy.deepcopy(config)
+        level = max(config.location_cooldowns)
+        config.location_cooldowns[level] *= 2
+        edits.append(config)
+
+        config = copy.deepcopy(config)
+        early = config.locations[location_ids[0]]
+        early.levels[min(early.levels)].xp_reward += 5
+        edits.append(config)
+        return edits
+
+    def test_resimulate_matches_fresh_run(self):
+        for algorithm in SimulationAlgorithm:
+            base = _config(algorithm)
+            simulator = Simulator(copy.deepcopy(base))
+            simulator.resimulate(copy.deepcopy(base))
+            for step, config in enumerate(self._edits(base)):
+                resimulated = simulator.resimulate(copy.deepcopy(config))
+                fresh = Simulator(copy.deepcopy(config)).run_simulation()
+                with self.subTest(algorithm=algorithm.value, step=step):
+                    self.assertEqual(_summary(resimulated), _summary(fresh))
+                    self.assertEqual(_history(resimulated), _history(fresh))
+
+
+class HistoryIndexTest(unittest.TestCase):
+    """Таблицы и выборки HistoryIndex совпадают с прямым проходом по истории."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.histories = [
+            Simulator(_config(algorithm)).run_simulation().history
+            for algorithm in SimulationAlgorithm
+        ]
+
+    def test_tables_match_direct_pass(self):
+        for history in self.histories:
+            index = HistoryIndex(history)
+            actions = [(state, action) for state in history for action in state["actions"]]
+            upgrades = [action for _, action in actions if action["type"] == "location_upgrade"]
+
+            timeline = sorted(({
+                "timestamp": action["timestamp"],
+                "location_id": int(action["location_id"]),
+                "new_level": action["new_level"],
+                **{f"{resource}_{part}": action[f"{resource}_{part}"]
+                   for resource in ("gold", "xp", "keys") for part in ("before", "change", "after")},
+                "day": action["timestamp"] / 86400
+            } for action in upgrades), key=lambda x: x["timestamp"])
+            self.assertEqual(index.upgrades_timeline, timeline)
+
+            level_data = []
+            for state in history:
+                level_data.append({"timestamp": state["timestamp"], "level": state["balance"]["user_level"],
+                                   "xp": state["balance"]["xp"], "day": state["timestamp"] / 86400})
+                level_data.extend({"timestamp": action["timestamp"], "level": action["new_level"],
+                                   "xp": state["balance"]["xp"], "day": action["timestamp"] / 86400}
+                                  for action in state["actions"] if action["type"] == "level_up")
+            self.assertEqual(index.level_data, sorted(level_data, key=lambda x: x["timestamp"]))
+
+            self.assertEqual([row["gold"] for row in index.resource_data],
+                             [state["balance"]["gold"] for state in sorted(history, key=lambda s: s["timestamp"])])
+
+            # Локации: число улучшений, стоимость и уровень на конец истории
+            levels = {}
+            for state in history:
+                for loc_id, location in state["locations"].items():
+                    levels[int(loc_id)] = location["current_level"]
+            for loc_id, data in index.location_data.items():
+                own = [action for action in upgrades if int(action["location_id"]) == loc_id]
+                self.assertEqual(data["upgrades_count"], len(own))
+                self.assertEqual(data["total_cost"], sum(-action["gold_change"] for action in own))
+                self.assertEqual(data["upgrade_times"], [action["timestamp"] for action in own])
+                self.assertEqual(data["current_level"], levels[loc_id])
+
+            # События по дням: счетчики действий
+            for daily in index.daily_events:
+                day_actions = [action for _, action in actions if action["timestamp"] // 86400 + 1 == daily["day"]]
+                day_upgrades = [action for action in day_actions if action["type"] == "location_upgrade"]
+                self.assertEqual(daily["upgrades_count"], len(day_upgrades))
+                self.assertEqual(daily["new_locations"], sum(action["new_level"] == 1 for action in day_upgrades))
+                self.assertEqual(daily["level_ups"], sum(action["type"] == "level_up" for action in day_actions))
+                self.assertEqual(daily["gold_spent"], sum(-action["gold_change"] for action in day_actions
+                                                          if action["gold_change"] < 0))
+
+            sessions = [action for _, action in actions if action["type"] == "tapping_income"]
+            self.assertTrue(sessions)
+            self.assertEqual([session["start_time"] for session in index.tapping_sessions],
+                             sorted(action["timestamp"] for action in sessions))
+
+    def test_queries_match_filters(self):
+        for history in self.histories:
+            index = HistoryIndex(history)
+            actions = [action for state in history for action in state["actions"]]
+            self.assertEqual(index.actions(), actions)
+            for day in (0, 5, 20):
+                self.assertEqual(index.actions("level_up", day),
+                                 [action for action in actions
+                                  if action["type"] == "level_up" and action["timestamp"] // 86400 == day])
+                self.assertEqual(index.actions(day=day),
+                                 [action for action in actions if action["timestamp"] // 86400 == day])
+            for loc_id in sorted(index.location_data)[:5]:
+                self.assertEqual(index.location_upgrades(loc_id),
+                                 [upgrade for upgrade in index.upgrades_timeline if upgrade["location_id"] == loc_id])
+
+
+if __name__ == "__main__":
+    unittest.main()
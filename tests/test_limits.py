@@ -0,0 +1,103 @@
+"""
+Проверки пределов симуляции и остановки при застое.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import logging
+import unittest
+
+from config.simulation_config import create_sample_config
+from models.config import HistoryMode, SimulationAlgorithm, SimulationConfig, SimulationEngine, StopCode
+from models.enums import LocationRarityType
+from simulator import Simulator
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _config(algorithm: SimulationAlgorithm, engine: SimulationEngine, **changes) -> SimulationConfig:
+    """Пример конфигурации с заданным алгоритмом, движком и полями."""
+    config = create_sample_config()
+    config.simulation_algorithm = algorithm
+    config.simulation_engine = engine
+    for name, value in changes.items():
+        setattr(config, name, value)
+    return config
+
+
+def _run(config: SimulationConfig):
+    """Итоги симуляции без истории."""
+    return Simulator(config).run_simulation(history_mode=HistoryMode.NONE)
+
+
+class LimitsTest(unittest.TestCase):
+    """Пределы дней и реального времени и остановка при застое на всех движках."""
+
+    @staticmethod
+    def _cases(tick: bool = True):
+        """Сочетания алгоритма и движка; полные прогоны посекундного движка слишком долгие."""
+        for algorithm in SimulationAlgorithm:
+            for engine in SimulationEngine:
+                if tick or engine != SimulationEngine.TICK:
+                    yield algorithm, engine
+
+    def test_completed_run(self):
+        for algorithm, engine in self._cases(tick=False):
+            summary = _run(_config(algorithm, engine))
+            with self.subTest(algorithm=algorithm.value, engine=engine.value):
+                self.assertEqual(summary.stop_code, StopCode.COMPLETED)
+                self.assertIn("reached the limit of locations", summary.stop_reason)
+
+    def test_max_days_stops_at_day_start(self):
+        for algorithm, engine in self._cases():
+            summary = _run(_config(algorithm, engine, max_days=10))
+            with self.subTest(algorithm=algorithm.value, engine=engine.value):
+                self.assertEqual(summary.stop_code, StopCode.MAX_DAYS)
+                self.assertEqual(summary.timestamp, 10 * 86400)
+                self.assertIn("limit of 10 days", summary.stop_reason)
+
+    def test_max_wall_seconds(self):
+        for algorithm, engine in self._cases():
+            summary = _run(_config(algorithm, engine, max_wall_seconds=0.0))
+            with self.subTest(algorithm=algorithm.value, engine=engine.value):
+                self.assertEqual(summary.stop_code, StopCode.MAX_WALL_SECONDS)
+                self.assertEqual(summary.timestamp, 0)
+                self.assertEqual(summary.location_upgrades, 0)
+
+    def test_stall_on_level_gate(self):
+        for algorithm, engine in self._cases(tick=False):
+            config = _config(algorithm, engine)
+            config.location_rarity_config[LocationRarityType.LEGENDARY].user_level_required = 99
+            summary = _run(config)
+            with self.subTest(algorithm=algorithm.value, engine=engine.value):
+                self.assertEqual(summary.stop_code, StopCode.NO_PROGRESS)
+                self.assertIn("requires level 99", summary.stop_reason)
+
+    def test_stall_names_unaffordable_upgrade(self):
+        for algorithm, engine in self._cases():
+            config = _config(algorithm, engine)
+            config.tapping.is_tapping = False
+            for level in config.user_levels.values():
+                level.gold_per_sec = 0.0
+            summary = _run(config)
+            with self.subTest(algorithm=algorithm.value, engine=engine.value):
+                self.assertEqual(summary.stop_code, StopCode.NO_PROGRESS)
+                self.assertRegex(summary.stop_reason, r"^No progress: location \d+ upgrade costs [\d,]+ gold")
+
+    def test_stall_detection_can_be_disabled(self):
+        config = _config(SimulationAlgorithm.SEQUENTIAL, SimulationEngine.EVENT, stop_on_stall=False, max_days=200)
+        config.location_rarity_config[LocationRarityType.LEGENDARY].user_level_required = 99
+        summary = _run(config)
+        self.assertEqual(summary.stop_code, StopCode.MAX_DAYS)
+        self.assertEqual(summary.timestamp, 200 * 86400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Проверки перцентилей метода Монте-Карло.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import logging
+import unittest
+
+import numpy as np
+
+from config.simulation_config import create_sample_config
+from models.config import PlayerBehaviourConfig
+from simulator import Simulator
+from workflow.monte_carlo import GOLD_VALUES, DailyBandAccumulator
+
+PERCENTILES = (0, 10, 50, 90, 100)
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class DailyBandAccumulatorTest(unittest.TestCase):
+    """Перцентили по гистограммам совпадают с перцентилями исходных значений."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.days = 12
+        self.players = []
+        for _ in range(257):
+            level = np.sort(rng.integers(1, 10, self.days))
+            gold = rng.lognormal(8, 3, self.days)
+            completed = np.sort(rng.integers(0, 31, self.days))
+            self.players.append(list(zip(level.tolist(), gold.tolist(), completed.tolist())))
+
+    def _bands(self, players):
+        accumulator = DailyBandAccumulator(self.days, 9, 30)
+        for metrics in players:
+            accumulator.add(metrics)
+        return accumulator.bands(PERCENTILES)
+
+    def test_integer_bands_are_exact(self):
+        bands = self._bands(self.players)
+        metrics = np.array(self.players, dtype=np.float64)
+        self.assertEqual(bands.players, len(self.players))
+        for column, values in ((0, bands.level), (2, bands.locations_completed)):
+            expected = np.percentile(metrics[:, :, column], PERCENTILES, axis=0, method="inverted_cdf")
+            np.testing.assert_array_equal(values, expected)
+
+    def test_gold_bands_within_bin_width(self):
+        bands = self._bands(self.players)
+        metrics = np.array(self.players, dtype=np.float64)
+        expected = np.percentile(metrics[:, :, 1], PERCENTILES, axis=0, method="inverted_cdf")
+        # Золото меньше 1 попадает в первую корзину [0, 1)
+        small = expected < 1
+        np.testing.assert_array_equal(bands.gold[small], GOLD_VALUES[0])
+        np.testing.assert_allclose(bands.gold[~small], expected[~small], rtol=0.024)
+
+    def test_merge_matches_single_accumulator(self):
+        left = DailyBandAccumulator(self.days, 9, 30)
+        right = DailyBandAccumulator(self.days, 9, 30)
+        for i, metrics in enumerate(self.players):
+            (left if i % 3 else right).add(metrics)
+        left.merge(right)
+        merged = left.bands(PERCENTILES)
+        single = self._bands(self.players)
+        self.assertEqual(merged.players, single.players)
+        for name in ("level", "gold", "locations_completed"):
+            np.testing.assert_array_equal(getattr(merged, name), getattr(single, name))
+
+    def test_finished_player_keeps_final_metrics(self):
+        bands = self._bands([[(2, 10.0, 1), (5, 1e6, 30)]])
+        np.testing.assert_array_equal(bands.level[0], [2] + [5] * (self.days - 1))
+        np.testing.assert_array_equal(bands.locations_completed[0], [1] + [30] * (self.days - 1))
+        self.assertTrue(np.all(bands.gold[0, 1:] == bands.gold[0, 1]))
+
+    def test_empty_accumulator_gives_nan(self):
+        bands = DailyBandAccumulator(self.days, 9, 30).bands(PERCENTILES)
+        self.assertEqual(bands.players, 0)
+        for name in ("level", "gold", "locations_completed"):
+            self.assertTrue(np.isnan(getattr(bands, name)).all())
+
+    def test_gold_bins_cover_zero(self):
+        bands = self._bands([[(1, 0.0, 0)] * self.days])
+        np.testing.assert_array_equal(bands.gold, np.full((len(PERCENTILES), self.days), GOLD_VALUES[0]))
+
+
+class MonteCarloTest(unittest.TestCase):
+    """Метод Монте-Карло на примере конфигурации."""
+
+    def test_bands_are_ordered_and_reproducible(self):
+        simulator = Simulator(create_sample_config())
+        behaviour = PlayerBehaviourConfig(seed=3)
+        bands = simulator.monte_carlo(12, 15, behaviour, workers=1)
+        self.assertEqual(bands.players, 12)
+        self.assertEqual(bands.level.shape, (3, 15))
+        for name in ("level", "gold", "locations_completed"):
+            values = getattr(bands, name)
+            self.assertFalse(np.isnan(values).any())
+            self.assertTrue(np.all(np.diff(values, axis=0) >= 0))
+
+        again = simulator.monte_carlo(12, 15, behaviour, workers=2)
+        for name in ("level", "gold", "locations_completed"):
+            np.testing.assert_array_equal(getattr(again, name), getattr(bands, name))
+
+    def test_identical_players_collapse_bands(self):
+        behaviour = PlayerBehaviourConfig(login_jitter=0.0, skip_day_probability=0.0, session_sigma=0.0)
+        bands = Simulator(create_sample_config()).monte_carlo(5, 10, behaviour, workers=1)
+        for name in ("level", "gold", "locations_completed"):
+            values = getattr(bands, name)
+            np.testing.assert_array_equal(values, np.repeat(values[:1], len(values), axis=0))
+
+    def test_rejects_empty_runs(self):
+        simulator = Simulator(create_sample_config())
+        with self.assertRaises(ValueError):
+            simulator.monte_carlo(0, 10, workers=1)
+        with self.assertRaises(ValueError):
+            simulator.monte_carlo(5, 0, workers=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Проверки ключа и хранения дискового кэша результатов.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from config.simulation_config import create_sample_config
+from models.config import HistoryMode, SimulationConfig
+from simulator import Simulator
+from utils import result_cache
+from utils.result_cache import ResultCache
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _config(**changes) -> SimulationConfig:
+    """Пример конфигурации с заданными полями."""
+    config = create_sample_config()
+    for name, value in changes.items():
+        setattr(config, name, value)
+    return config
+
+
+class ResultCacheKeyTest(unittest.TestCase):
+    """Ключ меняется вместе с версией движка, конфигурацией и режимом истории."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.cache = ResultCache(directory)
+
+    def test_same_config_same_key(self):
+        self.assertEqual(self.cache.key(_config()), self.cache.key(_config()))
+
+    def test_engine_version_changes_key(self):
+        key = self.cache.key(_config())
+        with mock.patch.object(result_cache, "ENGINE_VERSION", result_cache.ENGINE_VERSION + 1):
+            self.assertNotEqual(self.cache.key(_config()), key)
+
+    def test_settings_change_key(self):
+        key = self.cache.key(_config())
+        self.assertNotEqual(self.cache.key(_config(max_days=10)), key)
+        config = _config()
+        config.tapping.is_tapping = not config.tapping.is_tapping
+        self.assertNotEqual(self.cache.key(config), key)
+
+    def test_tables_change_key(self):
+        key = self.cache.key(_config())
+        config = _config()
+        location = config.locations[min(config.locations)]
+        location.levels[min(location.levels)].cost += 1
+        self.assertNotEqual(self.cache.key(config), key)
+        config = _config()
+        config.location_cooldowns[max(config.location_cooldowns)] += 1
+        self.assertNotEqual(self.cache.key(config), key)
+
+    def test_history_mode_changes_key(self):
+        keys = {self.cache.key(_config(), history_mode) for history_mode in HistoryMode}
+        self.assertEqual(len(keys), len(HistoryMode))
+
+    def test_wall_clock_limit_ignored(self):
+        self.assertEqual(self.cache.key(_config(max_wall_seconds=5.0)), self.cache.key(_config()))
+
+
+class ResultCacheStorageTest(unittest.TestCase):
+    """Чтение, запись и вытеснение файлов кэша."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_round_trip(self):
+        cache = ResultCache(self.directory)
+        self.assertIsNone(cache.get("missing"))
+        cache.put("key", {"gold": 1.5})
+        self.assertEqual(cache.get("key"), {"gold": 1.5})
+        cache.clear()
+        self.assertIsNone(cache.get("key"))
+
+    def test_corrupted_file_is_a_miss(self):
+        cache = ResultCache(self.directory)
+        with open(os.path.join(self.directory, "key.pkl"), "wb") as f:
+            f.write(b"not a pickle")
+        with self.assertLogs("idadv_result_cache", logging.WARNING):
+            self.assertIsNone(cache.get("key"))
+
+    def test_evicts_least_recently_read(self):
+        cache = ResultCache(self.directory, max_bytes=0)
+        cache.put("old", b"x" * 100)
+        self.assertIsNone(cache.get("old"))
+
+        cache.max_bytes = 10 ** 6
+        for name in ("a", "b", "c"):
+            cache.put(name, b"x" * 100)
+        os.utime(os.path.join(self.directory, "a.pkl"), (1, 1))
+        os.utime(os.path.join(self.directory, "c.pkl"), (2, 2))
+        cache.get("a")  # Чтение делает "a" самым свежим
+        cache.max_bytes = os.path.getsize(os.path.join(self.directory, "a.pkl")) * 2
+        cache._evict()
+        self.assertEqual(sorted(name for name in os.listdir(self.directory)), ["a.pkl", "b.pkl"])
+
+    def test_simulator_reuses_cached_result(self):
+        cache = ResultCache(self.directory)
+        first = Simulator(_config(max_days=5), cache=cache).run_simulation(history_mode=HistoryMode.NONE)
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+
+        with mock.patch("workflow.workflow.Workflow.simulate", side_effect=AssertionError("cache miss")):
+            cached = Simulator(_config(max_days=5), cache=cache).run_simulation(history_mode=HistoryMode.NONE)
+        self.assertNotEqual(cached.simulation_id, first.simulation_id)
+        self.assertEqual((cached.timestamp, cached.gold, cached.stop_code), (first.timestamp, first.gold, first.stop_code))
+
+        with mock.patch.object(result_cache, "ENGINE_VERSION", result_cache.ENGINE_VERSION + 1):
+            Simulator(_config(max_days=5), cache=cache).run_simulation(history_mode=HistoryMode.NONE)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""
+Проверки серверного хранилища результатов дашборда.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import logging
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from config.simulation_config import create_sample_config
+from dashboard import result_store
+from dashboard.result_store import DERIVATIONS, SimulationDataStore, load_simulation_data
+from simulator import Simulator
+from utils.data_processing import HistoryIndex
+from utils.result_cache import ResultCache
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class SimulationDataStoreTest(unittest.TestCase):
+    """LRU в памяти и вытеснение давно не использованных результатов на диск."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.spill = ResultCache(directory)
+        self.store = SimulationDataStore(max_items=2, spill=self.spill)
+
+    def test_put_returns_browser_payload(self):
+        data = {"history": [], "summary": {"gold": 1.0}}
+        self.assertEqual(self.store.put("a", data), {"simulation_id": "a"})
+        self.assertIs(self.store.get("a"), data)
+        self.assertIsNone(self.store.get("missing"))
+
+    def test_evicted_result_spills_to_disk(self):
+        for name in ("a", "b", "c"):
+            self.store.put(name, {"name": name})
+        self.assertEqual(list(self.store._items), ["b", "c"])
+        self.assertEqual(self.spill.get("a"), {"name": "a"})
+        self.assertIsNone(self.spill.get("b"))
+
+        # Прочитанный с диска результат снова в памяти и вытесняет самый старый
+        self.assertEqual(self.store.get("a"), {"name": "a"})
+        self.assertEqual(list(self.store._items), ["c", "a"])
+        self.assertEqual(self.spill.get("b"), {"name": "b"})
+
+    def test_get_refreshes_recency(self):
+        self.store.put("a", {"name": "a"})
+        self.store.put("b", {"name": "b"})
+        self.store.get("a")
+        self.store.put("c", {"name": "c"})
+        self.assertEqual(list(self.store._items), ["a", "c"])
+        self.assertEqual(self.spill.get("b"), {"name": "b"})
+
+    def test_replaced_result_is_returned(self):
+        self.store.put("a", {"version": 1})
+        self.store.put("a", {"version": 2})
+        self.assertEqual(self.store.get("a"), {"version": 2})
+        self.assertEqual(len(self.store._items), 1)
+
+    def test_load_from_browser_payload(self):
+        payload = self.store.put("a", {"name": "a"})
+        with mock.patch.object(result_store, "simulation_data_store", self.store):
+            self.assertEqual(load_simulation_data(payload), {"name": "a"})
+            self.assertIsNone(load_simulation_data(None))
+            self.assertIsNone(load_simulation_data({}))
+
+
+class DerivedDataTest(unittest.TestCase):
+    """Производные таблицы строятся один раз на симуляцию и сбрасываются вместе с результатом."""
+
+    @classmethod
+    def setUpClass(cls):
+        config = create_sample_config()
+        config.max_days = 10
+        cls.history = Simulator(config).run_simulation().history_dicts()
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.store = SimulationDataStore(max_items=1, spill=ResultCache(directory))
+        self.store.put("a", {"history": self.history})
+
+    def test_tables_match_history_index(self):
+        index = HistoryIndex(self.history)
+        for name, derive in DERIVATIONS.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.store.derived("a", name), derive(index))
+        with self.assertRaises(KeyError):
+            self.store.derived("a", "unknown")
+        self.assertIsNone(self.store.derived("missing", "level_data"))
+
+    def test_index_is_memoized(self):
+        index = self.store.history_index("a")
+        self.assertIs(self.store.history_index("a"), index)
+        self.assertIs(self.store.derived("a", "level_data"), index.level_data)
+
+    def test_index_dropped_with_result(self):
+        index = self.store.history_index("a")
+        self.store.put("a", {"history": self.history[:3]})
+        replaced = self.store.history_index("a")
+        self.assertIsNot(replaced, index)
+        self.assertEqual(replaced.resource_data, HistoryIndex(self.history[:3]).resource_data)
+
+        # Вытесненный результат читается с диска, и индекс строится заново
+        self.store.put("b", {"history": []})
+        self.assertNotIn("a", self.store._indexes)
+        self.assertEqual(self.store.history_index("a").resource_data, replaced.resource_data)
+
+    def test_concurrent_callers_build_once(self):
+        builds = []
+
+        class CountingIndex(HistoryIndex):
+            def __init__(self, history):
+                builds.append(len(history))
+                super().__init__(history)
+
+        with mock.patch.object(result_store, "HistoryIndex", CountingIndex):
+            threads = [threading.Thread(target=self.store.history_index, args=("a",)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(builds, [len(self.history)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+Проверки потоковой выдачи состояний `Simulator.stream` и `Workflow.iter_states`.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import itertools
+import logging
+import threading
+import unittest
+
+from config.simulation_config import create_sample_config
+from models.config import HistoryMode, SimulationAlgorithm, SimulationConfig
+from simulator import Simulator
+from workflow.workflow import SimulationCancelled
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _config(algorithm: SimulationAlgorithm, **changes) -> SimulationConfig:
+    """Пример конфигурации с заданным алгоритмом и полями."""
+    config = create_sample_config()
+    config.simulation_algorithm = algorithm
+    for name, value in changes.items():
+        setattr(config, name, value)
+    return config
+
+
+class StreamTest(unittest.TestCase):
+    """Поток состояний совпадает с историей обычного запуска и останавливается по запросу."""
+
+    def test_stream_matches_history(self):
+        for algorithm in SimulationAlgorithm:
+            for history_mode in (HistoryMode.FULL, HistoryMode.CHECKPOINTS):
+                expected = Simulator(_config(algorithm, max_days=20)).run_simulation(history_mode=history_mode)
+                simulator = Simulator(_config(algorithm, max_days=20))
+                states = list(simulator.stream(history_mode=history_mode))
+                with self.subTest(algorithm=algorithm.value, history_mode=history_mode.value):
+                    self.assertEqual(states, expected.history_dicts())
+                    self.assertEqual(simulator.last_summary.timestamp, expected.summary.timestamp)
+                    self.assertEqual(simulator.last_summary.gold, expected.summary.gold)
+
+    def test_break_stops_simulation(self):
+        simulator = Simulator(_config(SimulationAlgorithm.SEQUENTIAL))
+        states = simulator.stream()
+        first = list(itertools.islice(states, 5))
+        states.close()
+        self.assertEqual(len(first), 5)
+        self.assertIsNone(simulator.last_summary)
+
+        # Симулятор после прерванного перебора считает новый запуск с нуля
+        again = list(itertools.islice(simulator.stream(), 5))
+        self.assertEqual([state["timestamp"] for state in again], [state["timestamp"] for state in first])
+
+    def test_cancel_event_raises(self):
+        simulator = Simulator(_config(SimulationAlgorithm.SEQUENTIAL))
+        states = simulator.stream()
+        next(states)
+        simulator.workflow.cancel_event = threading.Event()
+        simulator.workflow.cancel_event.set()
+        with self.assertRaises(SimulationCancelled):
+            next(states)
+
+    def test_cancel_event_stops_simulate(self):
+        simulator = Simulator(_config(SimulationAlgorithm.SEQUENTIAL))
+        simulator.workflow.cancel_event = threading.Event()
+        simulator.workflow.cancel_event.set()
+        with self.assertRaises(SimulationCancelled):
+            simulator.run_simulation(history_mode=HistoryMode.NONE)
+
+    def test_no_history_rejected(self):
+        with self.assertRaises(ValueError):
+            next(Simulator(_config(SimulationAlgorithm.SEQUENTIAL)).stream(history_mode=HistoryMode.NONE))
+
+
+if __name__ == "__main__":
+    unittest.main()
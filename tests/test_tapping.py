@@ -0,0 +1,246 @@
+"""
+Проверки расчета сессий тапания.
+
+Аналитический расчет сессии сравнивается с посекундной моделью, по
+которой механика тапания описана изначально.
+
+Запуск из корня проекта: `python -m unittest discover tests`.
+"""
+
+import itertools
+import logging
+import unittest
+from typing import List, Tuple
+
+import numpy as np
+
+from models.config import TappingConfig
+from workflow.tapping import (ENERGY_RECOVERY_RATE, EnergySegment, TappingEngine, sample_energy,
+                              simulate_sessions_batch, solve_sessions)
+
+MAX_ENERGIES = (300, 700, 1500)
+TAP_SPEEDS = (0.0, 2.5, 3.0, 7.0)
+START_ENERGIES = (-50.0, 0.0, 1.5, 200.0, None)  # None - полный запас
+DURATIONS = (0, 60, 300, 600, 1800)
+
+
+def setUpModule():
+    # Движок подробно логирует каждый вход
+    logging.disable(logging.INFO)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+def _tapping_config(max_energy: float, tap_speed: float, tap_coef: float = 1.5) -> TappingConfig:
+    """Конфигурация тапания с заданными запасом энергии и скоростью."""
+    return TappingConfig(is_tapping=True, max_energy_capacity=max_energy, tap_speed=tap_speed, tap_coef=tap_coef)
+
+
+def _per_second(energy: float, duration: int, max_energy: float,
+                tap_speed: float) -> Tuple[float, float, List[float]]:
+    """
+    Посекундная модель сессии тапания.
+
+    Args:
+        energy: Энергия в начале сессии
+        duration: Длительность сессии в секундах
+        max_energy: Максимальный запас энергии
+        tap_speed: Тапов в секунду
+
+    Returns:
+        Tuple[float, float, List[float]]: Тапы, энергия в конце сессии и энергия в каждую секунду
+    """
+    novice = max_energy <= 700
+    max_taps = min(max_energy, 500 + int((700 - 500) * (max_energy / 700))) if novice else float("inf")
+    tapping_time = min(duration, 300 if novice else 420)
+    taps = 0.0
+    active = True
+    history = [energy] if duration > 0 else []
+    for second in range(duration):
+        if second < tapping_time and active and energy > 0:
+            step = min(tap_speed, energy, max_taps - taps)
+            if step <= 0:
+                active = False
+            else:
+                energy -= step
+                taps += step
+                if energy <= 0 or taps >= max_taps:
+                    active = False
+        if energy < max_energy:
+            energy += min(ENERGY_RECOVERY_RATE, max_energy - energy)
+        history.append(energy)
+    return taps, energy, history
+
+
+def _cases():
+    """Сочетания запаса энергии, скорости, начальной энергии и длительности сессии."""
+    for max_energy, tap_speed, energy, duration in itertools.product(MAX_ENERGIES, TAP_SPEEDS,
+                                                                     START_ENERGIES, DURATIONS):
+        yield max_energy, tap_speed, max_energy if energy is None else energy, duration
+
+
+class SessionTest(unittest.TestCase):
+    """Аналитическая сессия совпадает с посекундной моделью."""
+
+    def test_session_matches_per_second_model(self):
+        for max_energy, tap_speed, energy, duration in _cases():
+            engine = TappingEngine(_tapping_config(max_energy, tap_speed))
+            session = engine.run_session(86400 + 100, duration, user_level=4, energy=energy)
+            taps, end_energy, history = _per_second(energy, duration, max_energy, tap_speed)
+            with self.subTest(max_energy=max_energy, tap_speed=tap_speed, energy=energy, duration=duration):
+                self.assertAlmostEqual(session.taps_count, taps, places=6)
+                self.assertEqual(session.energy_used, session.taps_count)
+                self.assertAlmostEqual(session.gold_earned, session.taps_count * 4 * 1.5, places=6)
+                self.assertAlmostEqual(engine.current_energy, end_energy, places=6)
+                self.assertEqual(session.start_energy, energy)
+
+    def test_consecutive_sessions_recover_energy(self):
+        config = _tapping_config(700, 3.0)
+        engine = TappingEngine(config)
+        energy = 700.0
+        last_end = None
+        for start_time in (0, 400, 3600, 3700, 90000):
+            if last_end is not None:
+                energy += min((start_time - last_end) * ENERGY_RECOVERY_RATE, 700 - energy)
+            session = engine.run_session(start_time, 300, user_level=2)
+            taps, energy, _ = _per_second(energy, 300, 700, 3.0)
+            last_end = start_time + 300
+            with self.subTest(start_time=start_time):
+                self.assertAlmostEqual(session.taps_count, taps, places=6)
+                self.assertAlmostEqual(engine.current_energy, energy, places=6)
+
+    def test_simulate_sessions_groups_days(self):
+        engine = TappingEngine(_tapping_config(700, 3.0))
+        days = engine.simulate_sessions([90000, 100, 4000, 86500], 5, user_levels_by_day={1: 3})
+        self.assertEqual([day.day for day in days], [0, 1])
+        self.assertEqual([len(day.sessions) for day in days], [2, 2])
+        self.assertEqual([session.user_level for session in days[1].sessions], [3, 3])
+        for day in days:
+            self.assertAlmostEqual(day.total_gold, sum(session.gold_earned for session in day.sessions))
+            self.assertEqual(day.total_taps, sum(session.taps_count for session in day.sessions))
+
+    def test_disabled_tapping_has_no_sessions(self):
+        config = _tapping_config(700, 3.0)
+        config.is_tapping = False
+        self.assertEqual(TappingEngine(config).simulate_sessions([100], 5), [])
+
+
+class EnergyCurveTest(unittest.TestCase):
+    """Кривая энергии по линейным участкам и ленивая выборка из нее."""
+
+    def test_curve_matches_per_second_history(self):
+        for max_energy, tap_speed, energy, duration in _cases():
+            engine = TappingEngine(_tapping_config(max_energy, tap_speed))
+            session = engine.run_session(1000, duration, user_level=1, energy=energy)
+            _, _, expected = _per_second(energy, duration, max_energy, tap_speed)
+            history = session.energy_history
+            with self.subTest(max_energy=max_energy, tap_speed=tap_speed, energy=energy, duration=duration):
+                self.assertEqual([time_point for time_point, _ in history],
+                                 list(range(1000, 1000 + len(expected))))
+                for (_, value), reference in zip(history, expected):
+                    self.assertAlmostEqual(value, reference, places=6)
+
+    def test_segments_are_contiguous_and_count_taps(self):
+        for max_energy, tap_speed, energy, duration in _cases():
+            session = TappingEngine(_tapping_config(max_energy, tap_speed)).run_session(
+                500, duration, user_level=1, energy=energy
+            )
+            segments = session.energy_segments
+            with self.subTest(max_energy=max_energy, tap_speed=tap_speed, energy=energy, duration=duration):
+                if duration == 0:
+                    self.assertEqual(segments, [])
+                    continue
+                self.assertEqual(segments[0].start_time, 500)
+                self.assertEqual(segments[-1].end_time, 500 + duration)
+                for previous, segment in zip(segments, segments[1:]):
+                    self.assertEqual(previous.end_time, segment.start_time)
+                    self.assertEqual(previous.end_energy, segment.start_energy)
+                self.assertAlmostEqual(sum(segment.taps for segment in segments), session.taps_count, places=6)
+                # Без шага выбираются только точки излома
+                points = list(session.sample_energy())
+                self.assertEqual(len(points), len(segments) + 1)
+                self.assertAlmostEqual(points[-1][2], session.taps_count, places=6)
+
+    def test_sample_with_step(self):
+        segments = [EnergySegment(0, 10, 100.0, 70.0, 30.0), EnergySegment(10, 20, 70.0, 71.0)]
+        points = list(sample_energy(segments, 4))
+        self.assertEqual([time_point for time_point, _, _ in points], [0, 4, 8, 12, 16, 20])
+        self.assertEqual(points[1], (4, 88.0, 12.0))
+        self.assertAlmostEqual(points[3][1], 70.2)
+        self.assertEqual(points[-1], (20, 71.0, 30.0))
+        self.assertEqual(list(sample_energy([], 1)), [])
+        with self.assertRaises(ValueError):
+            list(sample_energy(segments, 0))
+
+    def test_energy_at_recovers_after_last_session(self):
+        engine = TappingEngine(_tapping_config(700, 3.0))
+        self.assertEqual(engine.energy_at(12345), 700)
+        engine.run_session(0, 300, user_level=1)
+        energy = engine.current_energy
+        self.assertEqual(engine.energy_at(300), energy)
+        self.assertAlmostEqual(engine.energy_at(400), energy + 100 * ENERGY_RECOVERY_RATE)
+        self.assertEqual(engine.energy_at(10 ** 6), 700)
+
+
+class BatchTest(unittest.TestCase):
+    """Векторный расчет совпадает с расчетом по одной сессии."""
+
+    def test_solve_sessions_matches_engine(self):
+        cases = list(_cases())
+        max_energy, tap_speed, energy, duration = (np.array(column) for column in zip(*cases))
+        taps, end_energy, gold = solve_sessions(energy, duration, 3, max_energy, tap_speed, 1.5)
+        for i, (case_max_energy, case_tap_speed, case_energy, case_duration) in enumerate(cases):
+            engine = TappingEngine(_tapping_config(case_max_energy, case_tap_speed))
+            session = engine.run_session(0, case_duration, user_level=3, energy=case_energy)
+            with self.subTest(max_energy=case_max_energy, tap_speed=case_tap_speed,
+                              energy=case_energy, duration=case_duration):
+                self.assertEqual(taps[i], session.taps_count)
+                self.assertEqual(end_energy[i], engine.current_energy)
+                self.assertEqual(gold[i], session.gold_earned)
+
+    def test_batch_matches_run_session(self):
+        configs = [_tapping_config(max_energy, tap_speed, tap_coef)
+                   for max_energy, tap_speed, tap_coef in itertools.product(MAX_ENERGIES, TAP_SPEEDS, (0.5, 2.0))]
+        times = [90000, 100, 400, 3700, 86500, 200000]
+        durations = [300, 600, 60, 1800, 300, 420]
+        levels = [2, 1, 1, 1, 2, 4]
+        batch = simulate_sessions_batch(configs, times, durations, levels)
+        order = np.argsort(times, kind="stable")
+        np.testing.assert_array_equal(batch.session_times, np.sort(times))
+
+        for row, config in enumerate(configs):
+            engine = TappingEngine(config)
+            daily = {}
+            for column, session_index in enumerate(order):
+                session = engine.run_session(times[session_index], durations[session_index], levels[session_index])
+                with self.subTest(config=row, session=column):
+                    self.assertEqual(batch.start_energy[row, column], session.start_energy)
+                    self.assertEqual(batch.taps[row, column], session.taps_count)
+                    self.assertEqual(batch.gold[row, column], session.gold_earned)
+                day = daily.setdefault(times[session_index] // 86400, [0.0, 0.0])
+                day[0] += session.taps_count
+                day[1] += session.gold_earned
+            self.assertEqual(batch.end_energy[row], engine.current_energy)
+            for day_number, (day_taps, day_gold) in daily.items():
+                totals = batch.day(day_number)
+                self.assertAlmostEqual(totals["taps"][row], day_taps)
+                self.assertAlmostEqual(totals["gold"][row], day_gold)
+
+        self.assertEqual(batch.days.tolist(), [0, 1, 2])
+        self.assertEqual(batch.daily_sessions.tolist(), [3, 2, 1])
+        self.assertIsNone(batch.day(5))
+        frame = batch.to_pandas()
+        self.assertEqual(len(frame), len(configs) * 3)
+        self.assertEqual(frame.loc[(1, 1), "sessions"], 2)
+
+    def test_batch_without_sessions(self):
+        batch = simulate_sessions_batch([_tapping_config(700, 3.0)], [], 300)
+        self.assertEqual(batch.taps.shape, (1, 0))
+        self.assertEqual(batch.daily_taps.shape, (1, 0))
+        self.assertEqual(batch.end_energy.tolist(), [700.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,43 +28,7 @@ def extract_location_data(history: List[Dict[str, Any]]) -> Dict[int, Dict[str,
     Returns:
         Dict: Словарь данных о локациях
     """
-    locations_data = {}
-    
-    # Инициализируем локации из первого состояния
-    if history:
-        first_state = history[0]
-        for loc_id, loc_state in first_state["locations"].items():
-            locations_data[int(loc_id)] = {
-                "current_level": loc_state["current_level"],
-                "available": loc_state["available"],
-                "upgrades_count": 0,
-                "total_cost": 0,
-                "total_xp": 0,
-                "total_keys": 0,
-                "upgrade_times": []
-            }
-    
-    # Собираем информацию об улучшениях
-    for state in history:
-        # Обновляем состояние локаций
-        for loc_id, loc_state in state["locations"].items():
-            loc_id = int(loc_id)
-            locations_data[loc_id].update({
-                "current_level": loc_state["current_level"],
-                "available": loc_state["available"]
-            })
-        
-        # Обрабатываем улучшения
-        for action in state["actions"]:
-            if action["type"] == "location_upgrade":
-                loc_id = int(action["location_id"])
-                locations_data[loc_id]["upgrades_count"] += 1
-                locations_data[loc_id]["total_cost"] += -action["gold_change"]  # Стоимость - это отрицательное изменение золота
-                locations_data[loc_id]["total_xp"] += action["xp_change"]
-                locations_data[loc_id]["total_keys"] += action["keys_change"]
-                locations_data[loc_id]["upgrade_times"].append(action["timestamp"])
-    
-    return locations_data
+    return HistoryIndex(history).location_data
 
 # Извлекает временную шкалу улучшений из истории симуляции
 def extract_upgrades_timeline(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -77,31 +41,7 @@ def extract_upgrades_timeline(history: List[Dict[str, Any]]) -> List[Dict[str, A
     Returns:
         List: Список улучшений
     """
-    upgrades_timeline = []
-    
-    for state in history:
-        for action in state["actions"]:
-            if action["type"] == "location_upgrade":
-                upgrades_timeline.append({
-                    "timestamp": action["timestamp"],
-                    "location_id": int(action["location_id"]),
-                    "new_level": action["new_level"],
-                    "gold_before": action["gold_before"],
-                    "gold_change": action["gold_change"],
-                    "gold_after": action["gold_after"],
-                    "xp_before": action["xp_before"],
-                    "xp_change": action["xp_change"],
-                    "xp_after": action["xp_after"],
-                    "keys_before": action["keys_before"],
-                    "keys_change": action["keys_change"],
-                    "keys_after": action["keys_after"],
-                    "day": action["timestamp"] / 86400
-                })
-    
-    # Сортируем по времени
-    upgrades_timeline.sort(key=lambda x: x["timestamp"])
-    
-    return upgrades_timeline
+    return HistoryIndex(history).upgrades_timeline
 
 # Извлекает данные об уровне персонажа из истории симуляции
 def extract_level_data(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -114,30 +54,7 @@ def extract_level_data(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     Returns:
         List: Список данных об уровне
     """
-    level_data = []
-    
-    for state in history:
-        level_data.append({
-            "timestamp": state["timestamp"],
-            "level": state["balance"]["user_level"],
-            "xp": state["balance"]["xp"],
-            "day": state["timestamp"] / 86400
-        })
-        
-        # Добавляем действия повышения уровня для более точного графика
-        for action in state["actions"]:
-            if action["type"] == "level_up":
-                level_data.append({
-                    "timestamp": action["timestamp"],
-                    "level": action["new_level"],
-                    "xp": state["balance"]["xp"],  # Используем XP из состояния
-                    "day": action["timestamp"] / 86400
-                })
-    
-    # Сортируем по времени
-    level_data.sort(key=lambda x: x["timestamp"])
-    
-    return level_data
+    return HistoryIndex(history).level_data
 
 # Извлекает данные о ресурсах из истории симуляции
 def extract_resource_data(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -150,23 +67,23 @@ def extract_resource_data(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     Returns:
         List: Список данных о ресурсах
     """
-    resources_data = []
-    
-    for state in history:
-        resources_data.append({
-            "timestamp": state["timestamp"],
-            "gold": state["balance"]["gold"],
-            "keys": state["balance"]["keys"],
-            "earn_per_sec": state["balance"]["earn_per_sec"],
-            "day": state["timestamp"] / 86400,
-            "earn_per_hour": state["balance"]["earn_per_sec"] * 3600,
-            "earn_per_day": state["balance"]["earn_per_sec"] * 86400
-        })
+    return HistoryIndex(history).resource_data
+
+# Извлекает сессии тапания из истории симуляции
+def extract_tapping_sessions(history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Извлекает итоги сессий тапания, записанные движком в журнал действий.
     
-    # Сортируем по времени
-    resources_data.sort(key=lambda x: x["timestamp"])
+    Действия состояния записываются при следующем входе, поэтому уровень
+    персонажа во время сессии берется из баланса этого состояния.
     
-    return resources_data
+    Args:
+        history: История симуляции
+        
+    Returns:
+        List: Список сессий тапания по времени
+    """
+    return HistoryIndex(history).tapping_sessions
 
 # Рассчитывает периоды стагнации (без улучшений)
 def calculate_stagnation_periods(upgrades_timeline: List[Dict[str, Any]], min_duration: int = 86400) -> List[Dict[str, Any]]:
@@ -243,151 +160,255 @@ def extract_daily_events_data(history: List[Dict[str, Any]]) -> List[Dict[str, A
     Returns:
         List: Список данных о событиях по дням
     """
-    if not history:
-        return []
-    
-    # Инициализируем данные по дням
-    daily_data = {}
-    
-    # Получаем временную шкалу улучшений и повышений уровня
-    upgrades_by_day = {}
-    level_ups_by_day = {}
-    new_locations_by_day = {}
-    
-    # Количество входов в игру в день по расписанию
-    logins_per_day = len(DEFAULT_CHECK_SCHEDULE)
-    
-    # Словарь для отслеживания предыдущего баланса ресурсов по дням
-    prev_day_resources = {
+    return HistoryIndex(history).daily_events
+
+# Пустая запись событий дня
+def _new_daily_record(day: int, logins_per_day: int) -> Dict[str, Any]:
+    """Пустая запись событий дня для extract_daily_events_data."""
+    return {
+        "day": day,
+        "sessions_count": logins_per_day,  # Фиксированное количество входов из расписания
+        "session_minutes": logins_per_day * DEFAULT_SESSION_MINUTES,  # Время = количество сессий * длительность сессии
+        "level_ups": 0,
+        "level_range": (0, 0),
+        "upgrades_count": 0,
+        "new_locations": 0,
         "gold": 0,
+        "gold_earned": 0,  # Сколько золота получено за день
+        "gold_spent": 0,    # Сколько золота потрачено за день
         "xp": 0,
-        "keys": 0
+        "xp_earned": 0,     # Сколько XP получено за день
+        "keys": 0,
+        "keys_earned": 0,   # Сколько ключей получено за день
+        "keys_spent": 0     # Сколько ключей потрачено за день
     }
+
+# Индекс истории для производных таблиц дашборда
+class HistoryIndex:
+    """
+    Индекс истории симуляции, построенный за один проход.
+    
+    Состояния и действия истории читаются один раз, и за этот проход
+    собираются все производные таблицы дашборда (данные о локациях,
+    временная шкала улучшений, данные об уровне, ресурсах, событиях
+    по дням и сессиях тапания). Действия дополнительно индексируются
+    по типу, дню и локации, поэтому выборки вида "улучшения локации 12"
+    или "повышения уровня в день 5" занимают O(размер результата).
     
-    # Обработка данных по дням
-    for state in history:
-        # Извлекаем день из таймстампа
-        day = int(state["timestamp"] // 86400) + 1  # Дни начинаются с 1
+    Дни в индексах действий считаются с нуля (`timestamp // 86400`).
+    Таблицы и списки индекса общие для всех читателей и не должны изменяться.
+    """
+    
+    def __init__(self, history: List[Dict[str, Any]]):
+        """
+        Args:
+            history: История симуляции
+        """
+        self.location_data: Dict[int, Dict[str, Any]] = {}  # Данные о локациях (extract_location_data)
+        self.upgrades_timeline: List[Dict[str, Any]] = []  # Улучшения по времени (extract_upgrades_timeline)
+        self.level_data: List[Dict[str, Any]] = []  # Уровень персонажа по времени (extract_level_data)
+        self.resource_data: List[Dict[str, Any]] = []  # Ресурсы по времени (extract_resource_data)
+        self.daily_events: List[Dict[str, Any]] = []  # События по дням (extract_daily_events_data)
+        self.tapping_sessions: List[Dict[str, Any]] = []  # Сессии тапания (extract_tapping_sessions)
+        self.actions_by_type: Dict[str, List[Dict[str, Any]]] = {}  # Действия по типу в порядке истории
+        self.actions_by_day: Dict[int, List[Dict[str, Any]]] = {}  # Действия по дню в порядке истории
+        self.upgrades_by_location: Dict[int, List[Dict[str, Any]]] = {}  # Записи upgrades_timeline по локации
+        self._actions: List[Dict[str, Any]] = []  # Все действия в порядке истории
+        self._actions_by_type_and_day: Dict[Tuple[str, int], List[Dict[str, Any]]] = {}
+        self._build(history)
+    
+    def actions(self, action_type: Optional[str] = None, day: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Возвращает действия заданного типа и/или дня в порядке истории.
+        
+        Args:
+            action_type: Тип действия ("location_upgrade", "level_up", ...), по умолчанию - любой
+            day: Номер дня с нуля, по умолчанию - любой
+            
+        Returns:
+            List: Список действий (без фильтров - все действия истории)
+        """
+        if action_type is not None and day is not None:
+            return self._actions_by_type_and_day.get((action_type, day), [])
+        if action_type is not None:
+            return self.actions_by_type.get(action_type, [])
+        if day is not None:
+            return self.actions_by_day.get(day, [])
+        return self._actions
+    
+    def location_upgrades(self, location_id: int) -> List[Dict[str, Any]]:
+        """
+        Возвращает улучшения локации по времени в формате upgrades_timeline.
         
-        # Инициализируем данные для дня, если их ещё нет
-        if day not in daily_data:
-            daily_data[day] = {
-                "day": day,
-                "sessions_count": logins_per_day,  # Фиксированное количество входов из расписания
-                "session_minutes": logins_per_day * DEFAULT_SESSION_MINUTES,  # Время = количество сессий * длительность сессии
-                "level_ups": 0,
-                "level_range": (0, 0),
+        Args:
+            location_id: ID локации
+            
+        Returns:
+            List: Список улучшений локации
+        """
+        return self.upgrades_by_location.get(int(location_id), [])
+    
+    def _build(self, history: List[Dict[str, Any]]) -> None:
+        """Строит все таблицы и индексы за один проход по истории."""
+        if not history:
+            return
+        
+        locations_data = self.location_data
+        for loc_id, loc_state in history[0]["locations"].items():
+            locations_data[int(loc_id)] = {
+                "current_level": loc_state["current_level"],
+                "available": loc_state["available"],
                 "upgrades_count": 0,
-                "new_locations": 0,
-                "gold": 0,
-                "gold_earned": 0,  # Сколько золота получено за день
-                "gold_spent": 0,    # Сколько золота потрачено за день
-                "xp": 0,
-                "xp_earned": 0,     # Сколько XP получено за день
-                "keys": 0,
-                "keys_earned": 0,   # Сколько ключей получено за день
-                "keys_spent": 0     # Сколько ключей потрачено за день
+                "total_cost": 0,
+                "total_xp": 0,
+                "total_keys": 0,
+                "upgrade_times": []
             }
         
-        # Добавляем ресурсы в конце дня
-        daily_data[day]["gold"] = state["balance"]["gold"]
-        daily_data[day]["xp"] = state["balance"]["xp"]
-        daily_data[day]["keys"] = state["balance"]["keys"]
+        logins_per_day = len(DEFAULT_CHECK_SCHEDULE)
+        daily_data: Dict[int, Dict[str, Any]] = {}
+        level_ups_by_day: Dict[int, Dict[str, int]] = {}
         
-        # Обрабатываем действия
-        for action in state["actions"]:
-            action_day = int(action["timestamp"] // 86400) + 1
+        for state in history:
+            timestamp = state["timestamp"]
+            balance = state["balance"]
+            # Состояние хранит изменившиеся локации
+            for loc_id, loc_state in state["locations"].items():
+                locations_data[int(loc_id)].update({
+                    "current_level": loc_state["current_level"],
+                    "available": loc_state["available"]
+                })
             
-            if action_day not in daily_data:
-                daily_data[action_day] = {
-                    "day": action_day,
-                    "sessions_count": logins_per_day,  # Фиксированное количество входов из расписания
-                    "session_minutes": logins_per_day * DEFAULT_SESSION_MINUTES,
-                    "level_ups": 0,
-                    "level_range": (0, 0),
-                    "upgrades_count": 0,
-                    "new_locations": 0,
-                    "gold": 0,
-                    "gold_earned": 0,
-                    "gold_spent": 0,
-                    "xp": 0,
-                    "xp_earned": 0,
-                    "keys": 0,
-                    "keys_earned": 0,
-                    "keys_spent": 0
-                }
+            self.level_data.append({
+                "timestamp": timestamp,
+                "level": balance["user_level"],
+                "xp": balance["xp"],
+                "day": timestamp / 86400
+            })
+            self.resource_data.append({
+                "timestamp": timestamp,
+                "gold": balance["gold"],
+                "keys": balance["keys"],
+                "earn_per_sec": balance["earn_per_sec"],
+                "day": timestamp / 86400,
+                "earn_per_hour": balance["earn_per_sec"] * 3600,
+                "earn_per_day": balance["earn_per_sec"] * 86400
+            })
             
-            # Учет изменений ресурсов для любого типа действия
-            if "gold_change" in action:
-                if action["gold_change"] > 0:
-                    daily_data[action_day]["gold_earned"] += action["gold_change"]
-                elif action["gold_change"] < 0:
-                    daily_data[action_day]["gold_spent"] += abs(action["gold_change"])
-                    
-            if "xp_change" in action and action["xp_change"] > 0:
-                daily_data[action_day]["xp_earned"] += action["xp_change"]
-                
-            if "keys_change" in action:
-                if action["keys_change"] > 0:
-                    daily_data[action_day]["keys_earned"] += action["keys_change"]
-                elif action["keys_change"] < 0:
-                    daily_data[action_day]["keys_spent"] += abs(action["keys_change"])
+            # Ресурсы в конце дня
+            state_day = int(timestamp // 86400) + 1  # Дни событий начинаются с 1
+            if state_day not in daily_data:
+                daily_data[state_day] = _new_daily_record(state_day, logins_per_day)
+            daily_data[state_day]["gold"] = balance["gold"]
+            daily_data[state_day]["xp"] = balance["xp"]
+            daily_data[state_day]["keys"] = balance["keys"]
             
-            # Улучшения локаций
-            if action["type"] == "location_upgrade":
-                daily_data[action_day]["upgrades_count"] += 1
+            for action in state["actions"]:
+                action_type = action["type"]
+                action_timestamp = action["timestamp"]
+                day = int(action_timestamp // 86400)
+                self._actions.append(action)
+                self.actions_by_type.setdefault(action_type, []).append(action)
+                self.actions_by_day.setdefault(day, []).append(action)
+                self._actions_by_type_and_day.setdefault((action_type, day), []).append(action)
                 
-                # Отслеживаем новые локации (уровень 1)
-                if action["new_level"] == 1:
-                    daily_data[action_day]["new_locations"] += 1
+                daily = daily_data.get(day + 1)
+                if daily is None:
+                    daily = daily_data[day + 1] = _new_daily_record(day + 1, logins_per_day)
                 
-                # Сохраняем данные об улучшениях для каждой локации
-                loc_id = action["location_id"]
-                if loc_id not in upgrades_by_day:
-                    upgrades_by_day[loc_id] = {}
+                # Учет изменений ресурсов для любого типа действия
+                if "gold_change" in action:
+                    if action["gold_change"] > 0:
+                        daily["gold_earned"] += action["gold_change"]
+                    elif action["gold_change"] < 0:
+                        daily["gold_spent"] += abs(action["gold_change"])
+                if "xp_change" in action and action["xp_change"] > 0:
+                    daily["xp_earned"] += action["xp_change"]
+                if "keys_change" in action:
+                    if action["keys_change"] > 0:
+                        daily["keys_earned"] += action["keys_change"]
+                    elif action["keys_change"] < 0:
+                        daily["keys_spent"] += abs(action["keys_change"])
                 
-                if action_day not in upgrades_by_day[loc_id]:
-                    upgrades_by_day[loc_id][action_day] = {"min": action["new_level"], "max": action["new_level"]}
-                else:
-                    upgrades_by_day[loc_id][action_day]["min"] = min(upgrades_by_day[loc_id][action_day]["min"], action["new_level"])
-                    upgrades_by_day[loc_id][action_day]["max"] = max(upgrades_by_day[loc_id][action_day]["max"], action["new_level"])
-            
-            # Повышения уровня
-            elif action["type"] == "level_up":
-                daily_data[action_day]["level_ups"] += 1
+                if action_type == "location_upgrade":
+                    loc_id = int(action["location_id"])
+                    location = locations_data[loc_id]
+                    location["upgrades_count"] += 1
+                    location["total_cost"] += -action["gold_change"]  # Стоимость - это отрицательное изменение золота
+                    location["total_xp"] += action["xp_change"]
+                    location["total_keys"] += action["keys_change"]
+                    location["upgrade_times"].append(action_timestamp)
+                    
+                    self.upgrades_timeline.append({
+                        "timestamp": action_timestamp,
+                        "location_id": loc_id,
+                        "new_level": action["new_level"],
+                        "gold_before": action["gold_before"],
+                        "gold_change": action["gold_change"],
+                        "gold_after": action["gold_after"],
+                        "xp_before": action["xp_before"],
+                        "xp_change": action["xp_change"],
+                        "xp_after": action["xp_after"],
+                        "keys_before": action["keys_before"],
+                        "keys_change": action["keys_change"],
+                        "keys_after": action["keys_after"],
+                        "day": action_timestamp / 86400
+                    })
+                    
+                    daily["upgrades_count"] += 1
+                    # Новые локации (уровень 1)
+                    if action["new_level"] == 1:
+                        daily["new_locations"] += 1
                 
-                # Отслеживаем диапазон уровней
-                if action_day not in level_ups_by_day:
-                    level_ups_by_day[action_day] = {"min": action["old_level"], "max": action["new_level"]}
-                else:
-                    level_ups_by_day[action_day]["min"] = min(level_ups_by_day[action_day]["min"], action["old_level"])
-                    level_ups_by_day[action_day]["max"] = max(level_ups_by_day[action_day]["max"], action["new_level"])
-    
-    # Добавляем диапазоны уровней
-    for day, level_data in level_ups_by_day.items():
-        daily_data[day]["level_range"] = (level_data["min"], level_data["max"])
-    
-    # Проверяем разницу в золоте между днями, чтобы учесть неотслеженные поступления
-    days = sorted(daily_data.keys())
-    for i in range(1, len(days)):
-        prev_day = days[i-1]
-        curr_day = days[i]
+                elif action_type == "level_up":
+                    # Точка повышения уровня для более точного графика, XP из состояния
+                    self.level_data.append({
+                        "timestamp": action_timestamp,
+                        "level": action["new_level"],
+                        "xp": balance["xp"],
+                        "day": action_timestamp / 86400
+                    })
+                    
+                    daily["level_ups"] += 1
+                    level_range = level_ups_by_day.get(day + 1)
+                    if level_range is None:
+                        level_ups_by_day[day + 1] = {"min": action["old_level"], "max": action["new_level"]}
+                    else:
+                        level_range["min"] = min(level_range["min"], action["old_level"])
+                        level_range["max"] = max(level_range["max"], action["new_level"])
+                
+                elif action_type == "tapping_income":
+                    # Действия состояния записываются при следующем входе,
+                    # поэтому уровень во время сессии берется из баланса этого состояния
+                    self.tapping_sessions.append({
+                        "start_time": action_timestamp,
+                        "duration": action.get("duration", 0),
+                        "taps_count": action.get("taps", 0),
+                        "energy_used": action.get("taps", 0),
+                        "gold_earned": action["gold_change"],
+                        "start_energy": action.get("energy", 0),
+                        "user_level": balance["user_level"],
+                        "idle_logins": action.get("idle_logins", 0),  # Пропущенные входы для суммарной записи простоя
+                        "day": action_timestamp // 86400
+                    })
         
-        prev_gold = daily_data[prev_day]["gold"]
-        curr_gold = daily_data[curr_day]["gold"]
-        earned = daily_data[curr_day]["gold_earned"]
-        spent = daily_data[curr_day]["gold_spent"]
+        self.upgrades_timeline.sort(key=lambda x: x["timestamp"])
+        self.level_data.sort(key=lambda x: x["timestamp"])
+        self.resource_data.sort(key=lambda x: x["timestamp"])
+        self.tapping_sessions.sort(key=lambda x: x["start_time"])
+        for upgrade in self.upgrades_timeline:
+            self.upgrades_by_location.setdefault(upgrade["location_id"], []).append(upgrade)
         
-        # Если получение золота не учтено, но баланс вырос больше, чем потрачено
-        expected_gold = prev_gold + earned - spent
-        if curr_gold > expected_gold:
-            # Добавляем недостающее золото к заработанному
-            additional_earned = curr_gold - expected_gold
-            daily_data[curr_day]["gold_earned"] += additional_earned
-    
-    # Формируем итоговый список
-    result = []
-    for day in sorted(daily_data.keys()):
-        result.append(daily_data[day])
-    
-    return result 
\ No newline at end of file
+        for day, level_range in level_ups_by_day.items():
+            daily_data[day]["level_range"] = (level_range["min"], level_range["max"])
+        
+        # Проверяем разницу в золоте между днями, чтобы учесть неотслеженные поступления
+        days = sorted(daily_data.keys())
+        for prev_day, curr_day in zip(days, days[1:]):
+            current = daily_data[curr_day]
+            expected_gold = daily_data[prev_day]["gold"] + current["gold_earned"] - current["gold_spent"]
+            if current["gold"] > expected_gold:
+                # Добавляем недостающее золото к заработанному
+                current["gold_earned"] += current["gold"] - expected_gold
+        
+        self.daily_events = [daily_data[day] for day in days]
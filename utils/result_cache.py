@@ -0,0 +1,236 @@
+"""
+Дисковый кэш результатов симуляции.
+
+Результат хранится в файле, имя которого - отпечаток конфигурации симуляции
+(таблиц, которые читает движок, и остальных параметров), версии движка и
+режима истории. Одинаковые параметры дают один и тот же
+отпечаток, поэтому повторный запуск, в том числе после перезапуска сервера,
+читает готовый результат с диска. Чтение обновляет время изменения файла,
+и при превышении предельного размера кэша удаляются давно не читанные файлы.
+"""
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import pickle
+import tempfile
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from models.config import HistoryMode, SimulationConfig
+from workflow.compiled_config import CompiledSimulationConfig
+from workflow.workflow import ENGINE_VERSION
+
+logger = logging.getLogger('idadv_result_cache')
+
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'simulations')  # Относительно корня проекта
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # Предельный размер кэша
+
+# Поля конфигурации, не влияющие на результат завершившейся симуляции
+_IGNORED_FIELDS = {"max_wall_seconds"}
+# Поля, которые входят в отпечаток через хэш скомпилированных таблиц
+_TABLE_FIELDS = {"locations", "location_cooldowns", "location_rarity_config", "user_levels"}
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> Tuple[str, ...]:
+    """Возвращает поля dataclass, входящие в отпечаток."""
+    return tuple(field.name for field in dataclasses.fields(cls) if field.name not in _IGNORED_FIELDS)
+
+
+def _canonical(value: Any) -> Any:
+    """
+    Приводит значение конфигурации к виду, однозначно сериализуемому в JSON.
+
+    Словари превращаются в отсортированные списки пар (ключи могут быть
+    числами или перечислениями), перечисления - в строку с именем значения,
+    числа с плавающей точкой - в точное шестнадцатеричное представление.
+
+    Args:
+        value: Значение конфигурации
+
+    Returns:
+        Any: Значение из списков, словарей со строковыми ключами, строк и чисел
+    """
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return value.hex()
+    if dataclasses.is_dataclass(value):
+        canonical = {"__type__": type(value).__name__}
+        for name in _field_names(type(value)):
+            canonical[name] = _canonical(getattr(value, name))
+        return canonical
+    if isinstance(value, Enum):
+        return f"{type(value).__name__}.{value.name}"
+    if isinstance(value, dict):
+        items = [[_canonical(key), _canonical(item)] for key, item in value.items()]
+        return sorted(items, key=lambda pair: (type(pair[0]).__name__, pair[0]))
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def _settings(config: SimulationConfig) -> Dict[str, Any]:
+    """Приводит к каноническому виду поля конфигурации, кроме таблиц."""
+    return {
+        name: _canonical(getattr(config, name))
+        for name in _field_names(type(config)) if name not in _TABLE_FIELDS
+    }
+
+
+def settings_fingerprint(config: SimulationConfig) -> str:
+    """
+    Считает отпечаток параметров конфигурации без таблиц локаций, кулдаунов и уровней персонажа.
+    
+    Две конфигурации с одинаковым отпечатком различаются только таблицами.
+    
+    Args:
+        config: Конфигурация симуляции
+        
+    Returns:
+        str: Шестнадцатеричный SHA-256
+    """
+    payload = json.dumps(_settings(config), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def config_fingerprint(config: SimulationConfig, compiled: Optional[CompiledSimulationConfig] = None) -> str:
+    """
+    Считает отпечаток конфигурации симуляции вместе с версией движка.
+
+    Локации, кулдауны и уровни персонажа учитываются через хэш их
+    скомпилированных таблиц, остальные поля - по значениям.
+
+    Args:
+        config: Конфигурация симуляции
+        compiled: Уже скомпилированные таблицы конфигурации (по умолчанию компилируются)
+
+    Returns:
+        str: Шестнадцатеричный SHA-256
+    """
+    compiled = compiled or CompiledSimulationConfig.from_config(config)
+    payload = json.dumps(
+        {"engine_version": ENGINE_VERSION, "tables": compiled.fingerprint, "config": _settings(config)},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Кэш результатов симуляции в локальной директории с вытеснением по давности чтения.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            directory: Директория кэша (по умолчанию - переменная окружения
+                SIMULATION_CACHE_DIR или DEFAULT_CACHE_DIR). Относительный путь
+                отсчитывается от корня проекта.
+            max_bytes: Предельный суммарный размер файлов кэша
+        """
+        directory = directory or os.environ.get("SIMULATION_CACHE_DIR") or DEFAULT_CACHE_DIR
+        if not os.path.isabs(directory):
+            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            directory = os.path.join(project_root, directory)
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, config: SimulationConfig, history_mode: HistoryMode = HistoryMode.FULL,
+            compiled: Optional[CompiledSimulationConfig] = None) -> str:
+        """
+        Строит ключ результата симуляции.
+
+        Args:
+            config: Конфигурация симуляции
+            history_mode: Режим истории (от него зависит вид результата)
+            compiled: Уже скомпилированные таблицы конфигурации
+
+        Returns:
+            str: Ключ кэша
+        """
+        return f"{config_fingerprint(config, compiled)}-{HistoryMode(history_mode).value}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Читает результат из кэша и отмечает его как недавно использованный.
+
+        Args:
+            key: Ключ кэша
+
+        Returns:
+            Optional[Any]: Результат или None, если его нет в кэше
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                result = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Поврежденный или устаревший файл просто пересчитывается
+            logger.warning(f"Failed to read cached result {path}: {e}")
+            return None
+        return result
+
+    def put(self, key: str, result: Any) -> None:
+        """
+        Сохраняет результат в кэш и вытесняет давно не читанные результаты сверх предела.
+
+        Args:
+            key: Ключ кэша
+            result: Результат симуляции
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        # Запись во временный файл и переименование: параллельное чтение не увидит половину файла
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        """Удаляет давно не читанные результаты, пока кэш больше предела."""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".pkl"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        """Удаляет все результаты из кэша."""
+        if not os.path.isdir(self.directory):
+            return
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,478 @@
+"""
+Векторный движок для одновременной симуляции многих сценариев.
+
+Сценарии одной структуры (те же локации, расписание проверок, алгоритм и
+тапание) отличаются параметрами экономики: доходом уровней персонажа,
+кулдаунами, длительностью сессии и начальным балансом. Вместо отдельного
+Workflow на каждый сценарий балансы, уровни локаций и кулдауны всех
+сценариев хранятся в массивах NumPy формы (N,) и (N, L), и все сценарии
+проходят вход за входом вместе. Каждый шаг сессии - одна маскированная
+векторная операция над сценариями, у которых сессия еще идет.
+
+Результат каждого сценария совпадает с итогами событийного движка без
+пропуска дней простоя (`fast_forward_idle`).
+"""
+
+import time
+import uuid
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from models.config import SimulationAlgorithm, SimulationConfig, StopCode
+from workflow.compiled_config import CompiledSimulationConfig
+from workflow.simulation_response import SimulationSummary
+from workflow.tapping import ENERGY_RECOVERY_RATE, solve_sessions, tapping_parameters
+
+NEVER = np.iinfo(np.int64).max  # Время, которое никогда не наступит
+
+
+class BatchWorkflow:
+    """
+    Симуляция N сценариев в массивах формы (N, L).
+
+    Таблицы локаций общие для всех сценариев, таблицы кулдаунов и уровней
+    персонажа хранятся построчно для каждого сценария. Столбцы массивов
+    локаций идут в порядке строк скомпилированной конфигурации.
+    """
+
+    def __init__(self, configs: Sequence[SimulationConfig]):
+        """
+        Собирает таблицы сценариев.
+
+        Args:
+            configs: Конфигурации сценариев с общими локациями, расписанием,
+                алгоритмом и тапанием
+
+        Raises:
+            ValueError: Если сценарии различаются структурой или используют случайное поведение
+        """
+        if not configs:
+            raise ValueError("At least one scenario is required")
+        base = configs[0]
+        for config in configs:
+            if config.behaviour is not None:
+                raise ValueError("Batch simulation does not support player behaviour")
+            if not (config.locations is base.locations or config.locations == base.locations):
+                raise ValueError("Batch scenarios must share locations")
+            if (config.location_rarity_config != base.location_rarity_config
+                    or sorted(config.check_schedule) != sorted(base.check_schedule)
+                    or config.simulation_algorithm != base.simulation_algorithm
+                    or config.tapping != base.tapping):
+                raise ValueError("Batch scenarios must share rarity, check schedule, algorithm and tapping")
+
+        self.configs = list(configs)
+        self.compiled = CompiledSimulationConfig.from_config(base)  # Общие таблицы локаций
+        self.simulation_algorithm = base.simulation_algorithm
+        self.check_schedule = sorted({check for check in base.check_schedule if 0 <= check < 86400})
+        self.tapping_config = base.tapping
+        self.max_days = base.max_days
+        self.max_wall_seconds = base.max_wall_seconds
+        self.stop_on_stall = base.stop_on_stall
+
+        # Таблицы сценариев: кулдауны и уровни персонажа, по строке на сценарий
+        scenario_tables = [
+            CompiledSimulationConfig.from_tables({}, config.location_cooldowns, config.user_levels)
+            for config in configs
+        ]
+        shapes = {(len(tables.cooldown), tables.max_user_level) for tables in scenario_tables}
+        if len(shapes) > 1:
+            raise ValueError("Batch scenarios must have the same cooldown levels and character levels")
+        self.cooldown = np.stack([tables.cooldown for tables in scenario_tables])
+        self.xp_threshold = np.stack([tables.xp_threshold for tables in scenario_tables])
+        self.gold_per_sec = np.stack([tables.gold_per_sec for tables in scenario_tables])
+        self.level_keys = np.stack([tables.level_keys for tables in scenario_tables])
+        self.max_user_level = scenario_tables[0].max_user_level
+        self.game_duration = np.array([config.economy.game_duration for config in configs], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.configs)
+
+    def simulate(self) -> List[SimulationSummary]:
+        """
+        Симулирует все сценарии.
+
+        Returns:
+            List[SimulationSummary]: Итоги сценариев в порядке конфигураций
+        """
+        n = len(self.configs)
+        tables = self.compiled
+        locations_count = len(tables.location_ids)
+
+        # Баланс сценариев
+        starting = [config.economy.starting_balance for config in self.configs]
+        self.gold = np.array([balance.gold for balance in starting], dtype=np.float64)
+        self.xp = np.array([balance.xp for balance in starting], dtype=np.int64)
+        self.keys = np.array([balance.keys for balance in starting], dtype=np.int64)
+        self.user_level = np.ones(n, dtype=np.int64)
+        self.earn_per_sec = self.gold_per_sec[:, 1].copy()
+        # Опыт для следующего уровня персонажа (недостижимый на максимальном уровне)
+        self.next_level_xp = self._next_level_xp(np.arange(n), self.user_level)
+
+        # Состояние локаций
+        self.level = np.zeros((n, locations_count), dtype=np.int64)
+        self.cooldown_until = np.zeros((n, locations_count), dtype=np.int64)
+        self.available = np.ones((n, locations_count), dtype=bool)
+        self.next_cost = np.repeat(tables.cost[None, :, 1], n, axis=0)  # Стоимость следующего улучшения
+        # Плоские представления для выборки ячеек (сценарий, локация) по номеру s * L + row
+        self._level_cells = self.level.reshape(-1)
+        self._cooldown_cells = self.cooldown_until.reshape(-1)
+        self._available_cells = self.available.reshape(-1)
+        self._next_cost_cells = self.next_cost.reshape(-1)
+        # Время готовности локации к улучшению для алгоритма "Первое доступное улучшение":
+        # окончание кулдауна или NEVER, если локация улучшена до максимума или закрыта уровнем персонажа
+        self.ready_at = np.where(tables.unlock_level[None, :] <= self.user_level[:, None], 0, NEVER)
+        self._ready_at_cells = self.ready_at.reshape(-1)
+        # Строки локаций по возрастанию ID и позиция границы в них для последовательного алгоритма
+        self._sequential_rows = np.array(
+            [tables.location_rows[loc_id] for loc_id in sorted(tables.location_ids)], dtype=np.int64
+        )
+        self.frontier = np.zeros(n, dtype=np.int64)
+
+        # Итоги
+        self.location_upgrades = np.zeros(n, dtype=np.int64)
+        self.level_up_times = np.full((n, self.max_user_level + 1), -1, dtype=np.int64)
+        self.timestamp = np.zeros(n, dtype=np.int64)
+        self.stop_codes: List[Optional[StopCode]] = [None] * n
+        self.running = self._has_available()
+        # Тапание: параметры общие, энергия и конец последней сессии у каждого сценария свои
+        tapping = self.tapping_config
+        self.tapping = tapping_parameters(tapping) if tapping and tapping.is_tapping is True else None
+        if self.tapping is not None:
+            self.tap_energy = np.full(n, self.tapping[0], dtype=np.float64)
+            self.tap_session_end = np.full(n, -1, dtype=np.int64)  # -1, пока сессий не было
+
+        started_at = time.perf_counter()
+        day_state = None
+        schedule = self.check_schedule
+        day = 0
+
+        while schedule and self.running.any():
+            day_start = day * 86400
+
+            # Пределы и застой проверяются в начале суток, как в событийном движке
+            if self.max_days is not None and day_start >= self.max_days * 86400:
+                self._stop(self.running, StopCode.MAX_DAYS, day_start)
+                break
+            if self.max_wall_seconds is not None and time.perf_counter() - started_at >= self.max_wall_seconds:
+                self._stop(self.running, StopCode.MAX_WALL_SECONDS, day_start)
+                break
+            if self.stop_on_stall:
+                stalled, day_state = self._stalled(day_start, day_state)
+                self._stop(stalled & self.running, StopCode.NO_PROGRESS, day_start)
+
+            for position, check in enumerate(schedule):
+                active = np.flatnonzero(self.running)
+                if not active.size:
+                    break
+                t = day_start + check
+
+                self._tap(active, t)
+
+                # При первом входе в игру пассивный доход не начисляется
+                if day > 0 or position > 0:
+                    last_check = day_start + schedule[position - 1] if position > 0 else day_start - 86400 + schedule[-1]
+                    self.gold[active] += self.earn_per_sec[active] * (t - last_check)
+
+                if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+                    self._run_sequential_session(active, t)
+                else:
+                    self._run_first_available_session(active, t)
+
+                # Сценарии, улучшившие все локации, останавливаются на секунду позже входа
+                completed = active[~self._has_available(active)]
+                self.running[completed] = False
+                self.timestamp[completed] = t + 1
+
+            day += 1
+
+        return [self._summary(s) for s in range(n)]
+
+    def _has_available(self, scenarios: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Проверяет, остались ли у сценариев локации, не улучшенные до максимума.
+
+        Args:
+            scenarios: Номера сценариев (по умолчанию - все)
+
+        Returns:
+            np.ndarray: Маска сценариев
+        """
+        available = self.available if scenarios is None else self.available[scenarios]
+        return available.any(axis=1)
+
+    def _stop(self, mask: np.ndarray, stop_code: StopCode, timestamp: int) -> None:
+        """
+        Останавливает сценарии по маске.
+
+        Args:
+            mask: Маска останавливаемых сценариев
+            stop_code: Причина остановки
+            timestamp: Время остановки
+        """
+        for s in np.flatnonzero(mask).tolist():
+            self.stop_codes[s] = stop_code
+        self.timestamp[mask] = timestamp
+        self.running[mask] = False
+
+    def _stalled(self, day_start: int, day_state):
+        """
+        Находит сценарии, прошедшие сутки без изменений (см. `Workflow._is_stalled`).
+
+        Args:
+            day_start: Время начала суток
+            day_state: Состояние на начало предыдущих суток
+
+        Returns:
+            Tuple[np.ndarray, tuple]: Маска застрявших сценариев и состояние на начало этих суток
+        """
+        state = (self.user_level.copy(), self.xp.copy(), self.keys.copy(), self.level.copy(), self.gold.copy())
+        if day_state is None:
+            return np.zeros(len(self.configs), dtype=bool), state
+
+        user_level, xp, keys, level, gold = day_state
+        same = (user_level == self.user_level) & (xp == self.xp) & (keys == self.keys) & (level == self.level).all(axis=1)
+        cooling = (self.available & (self.cooldown_until > day_start)).any(axis=1)
+        return same & ~cooling & ((gold == self.gold) | ~self._has_candidate()), state
+
+    def _has_candidate(self) -> np.ndarray:
+        """
+        Проверяет, есть ли у сценариев улучшение, доступное без повышения уровня персонажа.
+
+        Returns:
+            np.ndarray: Маска сценариев
+        """
+        unlock_level = self.compiled.unlock_level
+        if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+            frontier = self._sequential_rows[np.minimum(self.frontier, len(self._sequential_rows) - 1)]
+            return (self.frontier < len(self._sequential_rows)) & (self.user_level >= unlock_level[frontier])
+        return (self.available & (unlock_level[None, :] <= self.user_level[:, None])).any(axis=1)
+
+    def _next_level_xp(self, scenarios: np.ndarray, user_level: np.ndarray) -> np.ndarray:
+        """
+        Находит опыт, нужный сценариям для следующего уровня персонажа.
+
+        Args:
+            scenarios: Номера сценариев
+            user_level: Текущий уровень персонажа сценариев
+
+        Returns:
+            np.ndarray: Требуемый опыт (максимальное int64 на максимальном уровне)
+        """
+        required_xp = self.xp_threshold[scenarios, np.minimum(user_level + 1, self.max_user_level)]
+        return np.where(user_level < self.max_user_level, required_xp, NEVER)
+
+    def _tap(self, active: np.ndarray, t: int) -> None:
+        """
+        Проводит сессии тапания в начале входа и начисляет золото за тапы.
+
+        Args:
+            active: Номера сценариев
+            t: Время входа
+        """
+        if self.tapping is None:
+            return
+        max_energy, tap_speed, tap_coef = self.tapping
+        energy = self.tap_energy[active]
+        session_end = self.tap_session_end[active]
+        # Восстановление энергии после прошлой сессии
+        recovered = energy + np.minimum((t - session_end) * ENERGY_RECOVERY_RATE, max_energy - energy)
+        energy = np.where(session_end >= 0, recovered, energy)
+        duration = self.game_duration[active]
+        _, self.tap_energy[active], gold = solve_sessions(
+            energy, duration, self.user_level[active], max_energy, tap_speed, tap_coef
+        )
+        self.tap_session_end[active] = t + duration
+        self.gold[active] += gold
+
+    def _run_sequential_session(self, active: np.ndarray, t: int) -> None:
+        """
+        Проводит сессию последовательного алгоритма во всех активных сценариях.
+
+        На каждом шаге сценарий дожидается окончания кулдауна локации на
+        границе и улучшает ее, либо заканчивает сессию, если кулдаун не
+        кончится до конца сессии или улучшение недоступно.
+
+        Args:
+            active: Номера сценариев
+            t: Время входа
+        """
+        unlock_level = self.compiled.unlock_level
+        rows_order = self._sequential_rows
+        locations_count = self.level.shape[1]
+        scenarios = active
+        now = np.full(len(active), t, dtype=np.int64)
+        session_end = t + self.game_duration[active]
+
+        while scenarios.size:
+            rows = rows_order[self.frontier[scenarios]]
+            cells = scenarios * locations_count + rows
+
+            # Ожидание кулдауна перематывает время, улучшение возможно только до конца сессии
+            now = np.maximum(now, self._cooldown_cells[cells])
+            upgrade = ((now < session_end)
+                       & (self.user_level[scenarios] >= unlock_level[rows])
+                       & (self.gold[scenarios] >= self._next_cost_cells[cells]))
+            if not upgrade.any():
+                break
+
+            scenarios, rows, cells, now, session_end = (
+                scenarios[upgrade], rows[upgrade], cells[upgrade], now[upgrade], session_end[upgrade]
+            )
+            self._upgrade(scenarios, rows, cells, now)
+
+            # Сценарии, улучшившие все локации, заканчивают сессию
+            keep = self.frontier[scenarios] < len(rows_order)
+            if not keep.all():
+                scenarios, now, session_end = scenarios[keep], now[keep], session_end[keep]
+
+    def _run_first_available_session(self, active: np.ndarray, t: int) -> None:
+        """
+        Проводит сессию алгоритма "Первое доступное улучшение" во всех активных сценариях.
+
+        На каждом шаге сценарий улучшает первую по порядку готовую локацию,
+        на которую хватает золота, либо ждет ближайшего окончания кулдауна,
+        либо заканчивает сессию.
+
+        Args:
+            active: Номера сценариев
+            t: Время входа
+        """
+        scenarios = active
+        now = np.full(len(active), t, dtype=np.int64)
+        session_end = t + self.game_duration[active]
+
+        while scenarios.size:
+            ready_at = self.ready_at[scenarios]
+            ready = ready_at <= now[:, None]
+            affordable = ready & (self.next_cost[scenarios] <= self.gold[scenarios, None])
+
+            upgrade = affordable.any(axis=1)
+            if upgrade.any():
+                upgraded = scenarios[upgrade]
+                rows = affordable[upgrade].argmax(axis=1)
+                self._upgrade(upgraded, rows, upgraded * self.level.shape[1] + rows, now[upgrade])
+
+            # Остальные ждут ближайшего окончания кулдауна, если оно наступит до конца сессии
+            next_expiry = np.where(ready, NEVER, ready_at).min(axis=1)
+            keep = upgrade | (next_expiry < session_end)
+            now = np.where(upgrade, now, next_expiry)
+            scenarios, now, session_end = scenarios[keep], now[keep], session_end[keep]
+
+    def _upgrade(self, scenarios: np.ndarray, rows: np.ndarray, cells: np.ndarray, now: np.ndarray) -> None:
+        """
+        Улучшает по одной локации в каждом из сценариев и повышает уровень персонажа.
+
+        Args:
+            scenarios: Номера сценариев (без повторов)
+            rows: Строка улучшаемой локации для каждого сценария
+            cells: Номера ячеек (сценарий, локация) в плоских представлениях
+            now: Время улучшения для каждого сценария
+        """
+        tables = self.compiled
+        next_level = self._level_cells[cells] + 1
+        last = next_level >= tables.max_level[rows]
+
+        self.gold[scenarios] -= self._next_cost_cells[cells]
+        xp = self.xp[scenarios] + tables.xp[rows, next_level]
+        self.xp[scenarios] = xp
+        self.keys[scenarios] += np.where(last, tables.keys[rows], 0)
+
+        self._level_cells[cells] = next_level
+        self._available_cells[cells] = ~last
+        cooldown_until = now + self.cooldown[scenarios, next_level]
+        self._cooldown_cells[cells] = cooldown_until
+        self._ready_at_cells[cells] = np.where(last, NEVER, cooldown_until)
+        self._next_cost_cells[cells] = tables.cost[rows, np.minimum(next_level + 1, tables.cost.shape[1] - 1)]
+        self.location_upgrades[scenarios] += 1
+        if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+            self.frontier[scenarios] += last
+
+        # Повышаем уровень персонажа столько раз, сколько позволяет опыт
+        level_up = xp >= self.next_level_xp[scenarios]
+        while level_up.any():
+            leveled, xp, now = scenarios[level_up], xp[level_up], now[level_up]
+            new_level = self.user_level[leveled] + 1
+            self.user_level[leveled] = new_level
+            self.earn_per_sec[leveled] = self.gold_per_sec[leveled, new_level]
+            self.keys[leveled] += self.level_keys[leveled, new_level]
+            self.level_up_times[leveled, new_level] = now
+            # Открываем локации, ставшие доступными по уровню персонажа
+            unlocked = (tables.unlock_level[None, :] == new_level[:, None]) & self.available[leveled]
+            if unlocked.any():
+                self.ready_at[leveled] = np.where(unlocked, self.cooldown_until[leveled], self.ready_at[leveled])
+            next_level_xp = self._next_level_xp(leveled, new_level)
+            self.next_level_xp[leveled] = next_level_xp
+            scenarios, level_up = leveled, xp >= next_level_xp
+
+    def _summary(self, s: int) -> SimulationSummary:
+        """
+        Собирает итоги сценария.
+
+        Args:
+            s: Номер сценария
+
+        Returns:
+            SimulationSummary: Итоговые показатели
+        """
+        stop_code = self.stop_codes[s]
+        if stop_code is None:
+            stop_code = StopCode.NO_PROGRESS if self.available[s].any() else StopCode.COMPLETED
+
+        level_up_times = self.level_up_times[s]
+        return SimulationSummary(
+            simulation_id=str(uuid.uuid4()),
+            timestamp=self.timestamp.item(s),
+            user_level=self.user_level.item(s),
+            gold=self.gold.item(s),
+            xp=self.xp.item(s),
+            keys=self.keys.item(s),
+            earn_per_sec=self.earn_per_sec.item(s),
+            location_upgrades=self.location_upgrades.item(s),
+            level_up_times={level: level_up_times.item(level) for level in np.flatnonzero(level_up_times >= 0).tolist()},
+            stop_reason=self._stop_reason(s, stop_code),
+            stop_code=stop_code
+        )
+
+    def _stop_reason(self, s: int, stop_code: StopCode) -> str:
+        """
+        Описывает причину остановки сценария так же, как `Workflow._get_stop_reason`.
+
+        Args:
+            s: Номер сценария
+            stop_code: Код причины остановки
+
+        Returns:
+            str: Описание причины остановки
+        """
+        tables = self.compiled
+        if stop_code == StopCode.MAX_DAYS:
+            return f"Reached the limit of {self.max_days} days. Simulation stopped"
+        if stop_code == StopCode.MAX_WALL_SECONDS:
+            return f"Reached the limit of {self.max_wall_seconds} sec of wall time. Simulation stopped"
+        if stop_code == StopCode.NO_PROGRESS:
+            user_level = self.user_level.item(s)
+            # Прогресс остановил недостаток золота на самое дешевое доступное улучшение
+            if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+                frontier = self.frontier.item(s)
+                rows = self._sequential_rows[frontier:frontier + 1]
+            else:
+                rows = self._sequential_rows[self.available[s, self._sequential_rows]]
+            rows = rows[tables.unlock_level[rows] <= user_level]
+            if rows.size:
+                costs = self.next_cost[s, rows]
+                row = rows.item(int(np.argmin(costs)))
+                return (f"No progress: location {tables.location_ids[row]} upgrade costs {costs.min():,.0f} gold, "
+                        f"current gold {self.gold.item(s):,.0f}, "
+                        f"income {self.earn_per_sec.item(s) * 86400:,.0f} gold/day. "
+                        f"Simulation stopped")
+            # Иначе все доступные локации закрыты уровнем персонажа
+            for loc_id in sorted(tables.location_ids):
+                row = tables.location_rows[loc_id]
+                unlock_level = tables.unlock_level.item(row)
+                if self.available[s, row] and user_level < unlock_level:
+                    return (f"No progress: current level {user_level}, "
+                            f"location {loc_id} requires level {unlock_level}. "
+                            f"Simulation stopped")
+            return "No progress: the state repeats every day. Simulation stopped"
+        return f"Location {max(tables.location_ids)} - received, reached the limit of locations"
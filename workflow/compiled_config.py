@@ -0,0 +1,245 @@
+"""
+Скомпилированное представление конфигурации симуляции.
+
+Переводит словари `LocationLevel` и `UserLevelConfig` в плотные таблицы NumPy,
+к которым движок обращается по индексу без создания промежуточных объектов.
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from models.config import LocationLevel, SimulationConfig, UserLevelConfig
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    """Делает массив только для чтения."""
+    array.setflags(write=False)
+    return array
+
+
+def _padded(array: np.ndarray, width: int) -> np.ndarray:
+    """Дополняет последнюю ось массива нулями до ширины width."""
+    missing = width - array.shape[-1]
+    if missing <= 0:
+        return array
+    return np.pad(array, [(0, 0)] * (array.ndim - 1) + [(0, missing)])
+
+
+def _first_changed(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Находит первый различающийся столбец (начиная с 1) в каждой строке двух таблиц.
+
+    Args:
+        a: Таблица, форма (rows, width) или (width,)
+        b: Таблица той же размерности, возможно другой ширины
+
+    Returns:
+        np.ndarray: Номер столбца для каждой строки, 0 - строки совпадают
+    """
+    width = max(a.shape[-1], b.shape[-1])
+    differs = _padded(a, width) != _padded(b, width)
+    differs[..., 0] = False  # Нулевой уровень не используется
+    return np.where(differs.any(axis=-1), differs.argmax(axis=-1), 0)
+
+
+def _min_nonzero(*values: np.ndarray) -> np.ndarray:
+    """Поэлементный минимум без учета нулей (0, если все значения нулевые)."""
+    stacked = np.stack(np.broadcast_arrays(*values))
+    big = np.iinfo(np.int64).max
+    result = np.where(stacked > 0, stacked, big).min(axis=0)
+    return np.where(result == big, 0, result)
+
+
+@dataclass(frozen=True)
+class TableChanges:
+    """
+    Различия двух скомпилированных конфигураций с одинаковым набором локаций.
+
+    Для каждой строки локаций хранится наименьший уровень, улучшение до которого
+    читает измененное значение (стоимость, опыт, кулдаун, максимальный уровень
+    или ключи), для уровней персонажа - наименьший уровень с измененными
+    параметрами. До этих уровней обе конфигурации дают одну и ту же симуляцию.
+    """
+    location_level: np.ndarray  # location_level[row] - наименьший измененный уровень локации (0 - без изменений)
+    unlock_level: np.ndarray  # unlock_level[row] - меньший из прежнего и нового требуемого уровня персонажа
+    user_level: int  # Наименьший уровень персонажа с измененными параметрами (0 - без изменений)
+
+    @property
+    def empty(self) -> bool:
+        """Совпадают ли конфигурации."""
+        return self.user_level == 0 and not self.location_level.any()
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledSimulationConfig:
+    """
+    Неизменяемые таблицы конфигурации для горячего цикла симуляции.
+
+    Строки таблиц локаций идут в порядке объявления локаций в конфигурации,
+    столбцы соответствуют уровню локации (столбец 0 не используется).
+    Отсутствующие уровни заполнены нулями, как и прежний `LocationLevel(0, 0)`.
+    """
+    location_ids: Tuple[int, ...]  # ID локаций в порядке строк таблиц
+    cost: np.ndarray  # cost[loc, level] - стоимость улучшения до уровня level
+    xp: np.ndarray  # xp[loc, level] - опыт за улучшение до уровня level
+    max_level: np.ndarray  # max_level[loc] - максимальный уровень локации
+    unlock_level: np.ndarray  # unlock_level[loc] - требуемый уровень персонажа
+    keys: np.ndarray  # keys[loc] - ключи за последнее улучшение локации
+    cooldown: np.ndarray  # cooldown[level] - кулдаун после улучшения до уровня level
+    xp_threshold: np.ndarray  # xp_threshold[user_level] - опыт для достижения уровня
+    gold_per_sec: np.ndarray  # gold_per_sec[user_level] - пассивный доход на уровне
+    level_keys: np.ndarray  # level_keys[user_level] - ключи за достижение уровня
+    max_user_level: int  # Максимальный уровень персонажа
+    fingerprint: str = field(default="")  # Хэш содержимого таблиц
+    location_rows: Mapping[int, int] = field(default_factory=dict)  # ID локации -> строка таблиц
+
+    @classmethod
+    def from_config(cls, config: SimulationConfig) -> "CompiledSimulationConfig":
+        """
+        Компилирует конфигурацию симуляции в таблицы.
+
+        Локации без уровней пропускаются так же, как при настройке Workflow.
+
+        Args:
+            config: Конфигурация симуляции
+
+        Returns:
+            CompiledSimulationConfig: Скомпилированная конфигурация
+        """
+        locations = {}
+        for loc_id, loc_config in config.locations.items():
+            if not loc_config.levels:
+                continue
+            rarity_config = config.location_rarity_config[loc_config.rarity]
+            locations[loc_id] = (loc_config.levels, rarity_config.user_level_required, rarity_config.keys_reward)
+
+        return cls.from_tables(locations, config.location_cooldowns, config.user_levels)
+
+    @classmethod
+    def from_tables(cls, locations: Dict[int, Tuple[Dict[int, LocationLevel], int, int]],
+                    cooldowns: Dict[int, int],
+                    user_levels: Dict[int, UserLevelConfig]) -> "CompiledSimulationConfig":
+        """
+        Компилирует таблицы из словарей, которыми оперирует Workflow.
+
+        Args:
+            locations: ID локации -> (уровни, требуемый уровень персонажа, ключи за максимум)
+            cooldowns: Кулдауны по уровням локаций
+            user_levels: Конфигурация уровней персонажа
+
+        Returns:
+            CompiledSimulationConfig: Скомпилированная конфигурация
+        """
+        location_ids = tuple(locations.keys())
+        levels_count = max((max(levels.keys()) for levels, _, _ in locations.values()), default=0)
+
+        cost = np.zeros((len(location_ids), levels_count + 1), dtype=np.int64)
+        xp = np.zeros((len(location_ids), levels_count + 1), dtype=np.int64)
+        max_level = np.zeros(len(location_ids), dtype=np.int64)
+        unlock_level = np.zeros(len(location_ids), dtype=np.int64)
+        keys = np.zeros(len(location_ids), dtype=np.int64)
+
+        for row, loc_id in enumerate(location_ids):
+            levels, min_character_level, keys_reward = locations[loc_id]
+            for level, level_config in levels.items():
+                cost[row, level] = level_config.cost
+                xp[row, level] = level_config.xp_reward
+            max_level[row] = max(levels.keys())
+            unlock_level[row] = min_character_level
+            keys[row] = keys_reward
+
+        cooldown = np.zeros(max(cooldowns.keys(), default=0) + 1, dtype=np.int64)
+        for level, value in cooldowns.items():
+            cooldown[level] = value
+
+        max_user_level = max(user_levels.keys(), default=1)
+        xp_threshold = np.zeros(max_user_level + 1, dtype=np.int64)
+        gold_per_sec = np.zeros(max_user_level + 1, dtype=np.float64)
+        level_keys = np.zeros(max_user_level + 1, dtype=np.int64)
+        for level, level_config in user_levels.items():
+            xp_threshold[level] = level_config.xp_required
+            gold_per_sec[level] = level_config.gold_per_sec
+            level_keys[level] = level_config.keys_reward
+
+        tables = (cost, xp, max_level, unlock_level, keys, cooldown, xp_threshold, gold_per_sec, level_keys)
+        digest = hashlib.sha1(repr(location_ids).encode())
+        for table in tables:
+            digest.update(repr(table.shape).encode())
+            digest.update(table.tobytes())
+
+        return cls(
+            location_ids=location_ids,
+            cost=_frozen(cost),
+            xp=_frozen(xp),
+            max_level=_frozen(max_level),
+            unlock_level=_frozen(unlock_level),
+            keys=_frozen(keys),
+            cooldown=_frozen(cooldown),
+            xp_threshold=_frozen(xp_threshold),
+            gold_per_sec=_frozen(gold_per_sec),
+            level_keys=_frozen(level_keys),
+            max_user_level=max_user_level,
+            fingerprint=digest.hexdigest(),
+            location_rows=MappingProxyType({loc_id: row for row, loc_id in enumerate(location_ids)})
+        )
+
+    def diff(self, previous: "CompiledSimulationConfig") -> Optional[TableChanges]:
+        """
+        Находит первые значения таблиц, отличающиеся от предыдущей конфигурации.
+
+        Стоимость и опыт уровня L читаются при улучшении локации до L, кулдаун
+        уровня L - при улучшении любой локации до L, максимальный уровень
+        и ключи - при последнем улучшении, требуемый уровень персонажа - пока
+        локация не открыта. Параметры уровня персонажа U читаются, начиная
+        с уровня U - 1 (порог опыта для U).
+
+        Args:
+            previous: Предыдущая конфигурация
+
+        Returns:
+            Optional[TableChanges]: Различия или None, если изменился набор локаций
+        """
+        if self.location_ids != previous.location_ids:
+            return None
+
+        level = _first_changed(self.cost, previous.cost)
+        level = _min_nonzero(level, _first_changed(self.xp, previous.xp))
+
+        # Кулдаун уровня читается только локациями, у которых этот уровень есть
+        cooldown_level = int(_first_changed(self.cooldown, previous.cooldown))
+        if cooldown_level:
+            reachable = np.maximum(self.max_level, previous.max_level) >= cooldown_level
+            level = _min_nonzero(level, np.where(reachable, cooldown_level, 0))
+
+        # Максимальный уровень и ключи за него сравниваются при каждом улучшении,
+        # но до меньшего из максимумов результат сравнения не меняется
+        last_level = np.minimum(self.max_level, previous.max_level)
+        level = _min_nonzero(level, np.where(self.max_level != previous.max_level, last_level, 0))
+        level = _min_nonzero(level, np.where(self.keys != previous.keys, last_level, 0))
+        level = _min_nonzero(level, np.where(self.unlock_level != previous.unlock_level, 1, 0))
+
+        user_level = _min_nonzero(
+            _first_changed(self.xp_threshold, previous.xp_threshold),
+            _first_changed(self.gold_per_sec, previous.gold_per_sec),
+            _first_changed(self.level_keys, previous.level_keys),
+            np.int64(min(self.max_user_level, previous.max_user_level) + 1
+                     if self.max_user_level != previous.max_user_level else 0)
+        )
+
+        return TableChanges(
+            location_level=level.astype(np.int64),
+            unlock_level=np.minimum(self.unlock_level, previous.unlock_level),
+            user_level=int(user_level)
+        )
+
+    def __hash__(self) -> int:
+        return hash(self.fingerprint)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompiledSimulationConfig):
+            return NotImplemented
+        return self.fingerprint == other.fingerprint
\ No newline at end of file
@@ -0,0 +1,268 @@
+"""
+Колоночный журнал действий симуляции.
+
+Вместо словаря на каждое действие журнал хранит поля действий в типизированных
+массивах NumPy. Новые действия копятся кортежами в небольшом буфере и пачками
+упаковываются в записи фиксированного размера; при первом чтении пачки
+сливаются в непрерывные колонки, которые отдаются в NumPy и pandas без копирования.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ACTION_TYPES = ("location_upgrade", "level_up", "passive_income", "tapping_income")  # Тип действия по коду
+
+LOCATION_UPGRADE = 0
+LEVEL_UP = 1
+PASSIVE_INCOME = 2
+TAPPING_INCOME = 3
+
+# Колонки журнала и их типы
+COLUMNS = (
+    ("timestamp", np.int64),
+    ("type_code", np.int8),
+    ("location_id", np.int32),  # -1, если действие не относится к локации
+    ("new_level", np.int32),  # Новый уровень локации или персонажа, -1 для дохода
+    ("gold_before", np.float64),
+    ("gold_change", np.float64),
+    ("gold_after", np.float64),
+    ("xp_before", np.int64),
+    ("xp_change", np.int64),
+    ("xp_after", np.int64),
+    ("keys_before", np.int64),
+    ("keys_change", np.int64),
+    ("keys_after", np.int64),
+    ("duration", np.int64),  # Период начисления пассивного дохода в секундах
+    ("span_start", np.int64),  # Начало пропущенного периода простоя, -1 для обычных действий
+    ("idle_logins", np.int32),  # Число пропущенных входов
+    ("earn_per_sec", np.float64),  # Доход в секунду после повышения уровня
+    ("taps", np.float64),  # Тапов за сессию тапания
+    ("energy", np.float64),  # Энергия в начале сессии тапания
+)
+
+RECORD_DTYPE = np.dtype(list(COLUMNS))  # Запись одного действия в пачке (133 байта)
+
+FLUSH_SIZE = 4096  # Размер пачки действий, упаковываемой из буфера в записи
+
+
+class EventLog:
+    """
+    Журнал действий симуляции в колоночном виде.
+
+    Действия группируются по состояниям истории: `new_group` открывает группу
+    для нового состояния и возвращает ленивый список действий этой группы,
+    которым заменяется список словарей в `state["actions"]`.
+
+    Представления `to_numpy` и `to_pandas` разделяют память с журналом.
+    Действия, добавленные после их получения, в них не попадают.
+
+    Номера действий сквозные: после `discard_before` журнал хранит только
+    последние действия, но номера оставшихся не меняются.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, np.ndarray] = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS}
+        self._chunks: List[np.ndarray] = []  # Упакованные пачки, еще не слитые в колонки
+        self._pending: List[tuple] = []  # Действия, еще не упакованные в пачку
+        self._size = 0
+        self._offset = 0  # Номер первого хранимого действия
+        self._open_group: Optional["ActionList"] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Колонки журнала со всеми хранимыми действиями."""
+        self._pack()
+        if self._chunks:
+            records = np.concatenate(self._chunks) if len(self._chunks) > 1 else self._chunks[0]
+            self._columns = {
+                name: np.concatenate((self._columns[name], records[name]))
+                for name, _ in COLUMNS
+            }
+            self._chunks = []
+        return self._columns
+
+    def _pack(self) -> None:
+        """Упаковывает буфер действий в пачку записей."""
+        if self._pending:
+            self._chunks.append(np.array(self._pending, dtype=RECORD_DTYPE))
+            self._pending.clear()
+
+    def append(self, type_code: int, timestamp: int,
+               gold_before: float, gold_change: float, gold_after: float,
+               xp_before: int, xp_change: int, xp_after: int,
+               keys_before: int, keys_change: int, keys_after: int,
+               location_id: int = -1, new_level: int = -1, duration: int = 0,
+               span_start: int = -1, idle_logins: int = 0, earn_per_sec: float = 0.0,
+               taps: float = 0.0, energy: float = 0.0) -> None:
+        """Добавляет действие в журнал."""
+        self._pending.append((
+            timestamp, type_code, location_id, new_level,
+            gold_before, gold_change, gold_after,
+            xp_before, xp_change, xp_after,
+            keys_before, keys_change, keys_after,
+            duration, span_start, idle_logins, earn_per_sec,
+            taps, energy
+        ))
+        self._size += 1
+        if len(self._pending) >= FLUSH_SIZE:
+            self._pack()
+
+    def new_group(self) -> "ActionList":
+        """
+        Закрывает группу предыдущего состояния и открывает новую.
+
+        Returns:
+            ActionList: Ленивый список действий нового состояния
+        """
+        size = self._size
+        if self._open_group is not None:
+            self._open_group.stop = size
+        self._open_group = ActionList(self, size)
+        return self._open_group
+
+    def copy_prefix(self, size: int, groups: Sequence["ActionList"]) -> Tuple["EventLog", List["ActionList"]]:
+        """
+        Копирует первые size действий журнала вместе с группами состояний.
+
+        Последняя группа остается открытой: в нее попадут действия,
+        добавленные в копию.
+
+        Args:
+            size: Количество копируемых действий
+            groups: Группы первых состояний истории по порядку
+
+        Returns:
+            Tuple[EventLog, List[ActionList]]: Копия журнала и ее группы
+        """
+        log = EventLog()
+        log._columns = {name: column[:size - self._offset].copy() for name, column in self.columns.items()}
+        log._size = size
+        log._offset = self._offset
+        copies = [ActionList(log, group.start, group.stop) for group in groups]
+        if copies:
+            copies[-1].stop = None
+            log._open_group = copies[-1]
+        return log, copies
+
+    def discard_before(self, position: int) -> None:
+        """
+        Освобождает память действий с номерами меньше position.
+
+        Args:
+            position: Номер первого действия, которое нужно сохранить
+        """
+        keep = position - self._offset
+        if keep <= 0:
+            return
+        self._columns = {name: column[keep:].copy() for name, column in self.columns.items()}
+        self._offset = position
+
+    def to_numpy(self) -> Dict[str, np.ndarray]:
+        """
+        Возвращает колонки журнала как массивы NumPy без копирования.
+
+        Returns:
+            Dict[str, np.ndarray]: Массив для каждой колонки
+        """
+        return dict(self.columns)
+
+    def to_pandas(self):
+        """
+        Возвращает журнал как DataFrame поверх колонок без копирования.
+
+        Тип действия дополнительно отдается категориальной колонкой `type`.
+
+        Returns:
+            pd.DataFrame: Таблица действий
+        """
+        import pandas as pd
+
+        data = self.to_numpy()
+        frame = pd.DataFrame(data, copy=False)
+        frame["type"] = pd.Categorical.from_codes(data["type_code"], categories=ACTION_TYPES)
+        return frame
+
+    def action(self, i: int) -> Dict[str, Any]:
+        """
+        Собирает действие в виде словаря, как его раньше записывала симуляция.
+
+        Args:
+            i: Номер действия в журнале
+
+        Returns:
+            Dict[str, Any]: Действие
+        """
+        row = {name: column.item(i - self._offset) for name, column in self.columns.items()}
+        type_code = row["type_code"]
+        action: Dict[str, Any] = {"type": ACTION_TYPES[type_code], "timestamp": row["timestamp"]}
+
+        if type_code == LOCATION_UPGRADE:
+            action["description"] = f"Location upgrade {row['location_id']} (level {row['new_level']})"
+            action["location_id"] = row["location_id"]
+            action["new_level"] = row["new_level"]
+        elif type_code == LEVEL_UP:
+            action["description"] = f"Level up to {row['new_level']}"
+            action["old_level"] = row["new_level"] - 1
+            action["new_level"] = row["new_level"]
+        elif type_code == PASSIVE_INCOME:
+            description = f"Passive income for {row['duration']} sec"
+            if row["span_start"] >= 0:
+                description += f" ({row['idle_logins']} idle logins)"
+            action["description"] = description
+        elif row["span_start"] >= 0:
+            action["description"] = f"Tapping income for {row['duration'] // 86400} idle days"
+        else:
+            action["description"] = f"Tapping session: {row['taps']:.0f} taps"
+
+        for name in ("gold_before", "gold_change", "gold_after",
+                     "xp_before", "xp_change", "xp_after",
+                     "keys_before", "keys_change", "keys_after"):
+            action[name] = row[name]
+
+        if type_code == LEVEL_UP:
+            action["new_earn_per_sec"] = row["earn_per_sec"]
+        elif type_code == TAPPING_INCOME:
+            action["taps"] = row["taps"]
+            action["energy"] = row["energy"]
+            action["duration"] = row["duration"]
+        if row["span_start"] >= 0:
+            action["span_start"] = row["span_start"]
+            action["idle_logins"] = row["idle_logins"]
+        return action
+
+
+class ActionList(Sequence):
+    """
+    Ленивый список действий одного состояния истории.
+
+    Ведет себя как прежний список словарей: словарь действия собирается
+    из колонок журнала при обращении к элементу.
+    """
+
+    def __init__(self, log: EventLog, start: int, stop: Optional[int] = None):
+        self.log = log
+        self.start = start
+        self.stop = stop  # None, пока группа открыта и в нее добавляются действия
+
+    def _range(self) -> range:
+        return range(self.start, len(self.log) if self.stop is None else self.stop)
+
+    def __len__(self) -> int:
+        return len(self._range())
+
+    def __getitem__(self, index):
+        positions = self._range()[index]
+        if isinstance(positions, range):
+            return [self.log.action(i) for i in positions]
+        return self.log.action(positions)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in self._range():
+            yield self.log.action(i)
+
+    def __repr__(self) -> str:
+        return f"ActionList({list(self)!r})"
@@ -4,6 +4,9 @@ from typing import Dict
 from models.enums import LocationRarityType
 from models.config import LocationLevel
 
+# Пустой уровень для запросов за пределами таблицы уровней
+_NO_LEVEL = LocationLevel(0, 0)
+
 @dataclass
 class Location:
     rarity: LocationRarityType
@@ -15,10 +18,10 @@ class Location:
     cooldown_until: int = 0
     
     def get_upgrade_cost(self) -> int:
-        return self.levels.get(self.current_level + 1, LocationLevel(0, 0)).cost
+        return self.levels.get(self.current_level + 1, _NO_LEVEL).cost
     
     def get_upgrade_xp_reward(self) -> int:
-        return self.levels.get(self.current_level + 1, LocationLevel(0, 0)).xp_reward
+        return self.levels.get(self.current_level + 1, _NO_LEVEL).xp_reward
     
     def get_upgrade_keys_reward(self) -> int:
         return self.keys if self.is_last_upgrade() else 0
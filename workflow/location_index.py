@@ -0,0 +1,176 @@
+"""
+Инкрементальный индекс доступности локаций для сессионного цикла.
+
+Вместо пересборки словарей доступных локаций на каждом шаге сессии индекс
+перемещает локацию между группами только при изменении ее состояния.
+Первая по порядку обхода готовая локация, на которую хватает золота,
+находится спуском по дереву отрезков минимальных стоимостей за O(log L).
+"""
+
+import heapq
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+from workflow.location import Location
+
+
+class LocationIndex:
+    """
+    Разбивает доступные (не улучшенные до максимума) локации на три группы:
+
+    - ready: кулдаун истек и уровень персонажа достаточен (листья дерева
+      отрезков по позициям порядка обхода со стоимостью следующего улучшения,
+      у остальных позиций - бесконечность);
+    - gated: кулдаун истек, но требуется более высокий уровень персонажа
+      (корзины по `min_character_level`);
+    - cooling: min-куча окончаний кулдаунов `(cooldown_until, loc_id)`.
+
+    Каждая доступная локация находится ровно в одной группе. Локация попадает
+    в кучу только после улучшения, а улучшается только из ready, поэтому
+    записи в куче кулдаунов никогда не устаревают.
+    """
+
+    def __init__(self, locations: Dict[int, Location], unlock_levels: Dict[int, int],
+                 order: Dict[int, int], next_cost: Callable[[int], float], user_level: int, t: int = 0):
+        """
+        Строит индекс по текущему состоянию локаций.
+
+        Args:
+            locations: Локации симуляции
+            unlock_levels: Требуемый уровень персонажа для каждой локации
+            order: Позиция локации в порядке обхода
+            next_cost: Стоимость следующего улучшения локации по ее ID
+            user_level: Текущий уровень персонажа
+            t: Текущее игровое время
+        """
+        self.unlock_levels = unlock_levels
+        self.order = order
+        self.next_cost = next_cost
+        self.user_level = user_level
+        # Дерево отрезков: листья с позиции _size, в узле - минимум стоимостей поддерева
+        self._size = 1
+        while self._size < max(1, len(order)):
+            self._size *= 2
+        self._min_cost: List[float] = [math.inf] * (2 * self._size)
+        self._by_position: Dict[int, int] = {position: loc_id for loc_id, position in order.items()}
+        self.gated: Dict[int, List[int]] = {}
+        self.cooling: List[Tuple[int, int]] = []
+        self.available_count = 0
+
+        for loc_id, location in locations.items():
+            if not location.available:
+                continue
+            self.available_count += 1
+            if location.cooldown_until > t:
+                self.cooling.append((location.cooldown_until, loc_id))
+            else:
+                self._make_ready(loc_id)
+        heapq.heapify(self.cooling)
+
+    def _make_ready(self, loc_id: int) -> None:
+        """Помещает локацию с истекшим кулдауном в ready или в корзину уровня."""
+        unlock_level = self.unlock_levels[loc_id]
+        if unlock_level > self.user_level:
+            self.gated.setdefault(unlock_level, []).append(loc_id)
+        else:
+            self._add_ready(loc_id)
+
+    def _set_cost(self, loc_id: int, cost: float) -> None:
+        """Записывает стоимость в лист локации и обновляет минимумы на пути к корню."""
+        tree = self._min_cost
+        node = self._size + self.order[loc_id]
+        tree[node] = cost
+        node //= 2
+        while node:
+            tree[node] = min(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def _add_ready(self, loc_id: int) -> None:
+        """Добавляет локацию в ready."""
+        self._set_cost(loc_id, self.next_cost(loc_id))
+
+    def _remove_ready(self, loc_id: int) -> None:
+        """Убирает локацию из ready."""
+        self._set_cost(loc_id, math.inf)
+
+    def first_affordable(self, gold: float) -> Optional[int]:
+        """
+        Находит первую в порядке обхода ready-локацию, на улучшение которой хватает золота.
+
+        Args:
+            gold: Текущее золото
+
+        Returns:
+            Optional[int]: ID локации или None, если такой нет
+        """
+        tree = self._min_cost
+        if tree[1] > gold:
+            return None
+        node = 1
+        while node < self._size:
+            node = 2 * node if tree[2 * node] <= gold else 2 * node + 1
+        return self._by_position[node - self._size]
+
+    def release_expired(self, t: int) -> None:
+        """
+        Переносит локации с истекшим к моменту t кулдауном из кучи.
+
+        Args:
+            t: Текущее игровое время
+        """
+        cooling = self.cooling
+        while cooling and cooling[0][0] <= t:
+            _, loc_id = heapq.heappop(cooling)
+            self._make_ready(loc_id)
+
+    def next_expiry(self) -> int:
+        """
+        Возвращает ближайшее окончание кулдауна или -1, если кулдаунов нет.
+
+        Returns:
+            int: Время окончания ближайшего кулдауна
+        """
+        return self.cooling[0][0] if self.cooling else -1
+
+    def unlock(self, user_level: int) -> List[int]:
+        """
+        Обновляет уровень персонажа и открывает локации из корзин.
+
+        Args:
+            user_level: Новый уровень персонажа
+
+        Returns:
+            List[int]: ID локаций, перешедших в ready
+        """
+        released = []
+        for level in range(self.user_level + 1, user_level + 1):
+            bucket = self.gated.pop(level, None)
+            if bucket:
+                released.extend(bucket)
+        self.user_level = user_level
+        for loc_id in released:
+            self._add_ready(loc_id)
+        return released
+
+    def on_upgrade(self, loc_id: int, location: Location, t: int) -> None:
+        """
+        Обновляет индекс после улучшения локации.
+
+        Args:
+            loc_id: ID улучшенной локации
+            location: Состояние локации после улучшения
+            t: Время улучшения
+        """
+        if not location.available:
+            self._remove_ready(loc_id)
+            self.available_count -= 1
+        elif location.cooldown_until > t:
+            self._remove_ready(loc_id)
+            heapq.heappush(self.cooling, (location.cooldown_until, loc_id))
+        else:
+            # Локация осталась готовой, но следующее улучшение стоит дороже
+            self._add_ready(loc_id)
+
+    def has_available(self) -> bool:
+        """Проверяет, остались ли локации, не улучшенные до максимума."""
+        return self.available_count > 0
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Потоковая агрегация дневных показателей многих игроков.
+
+Для каждого дня накапливаются гистограммы уровня персонажа, числа завершенных
+локаций и золота, поэтому память не зависит от числа игроков. Уровень и
+локации - целые числа, их перцентили точные. Золото раскладывается по
+логарифмическим корзинам шириной около 2.3%, его перцентили приближенные.
+"""
+
+from dataclasses import dataclass
+from typing import Sequence, Tuple
+
+import numpy as np
+
+# Границы корзин золота: [0, 1), затем логарифмическая шкала до 1e15
+GOLD_EDGES = np.concatenate(([0.0], np.logspace(0, 15, 1501)))
+# Значение корзины золота: геометрическая середина (0.5 для первой корзины)
+GOLD_VALUES = np.concatenate(([0.5], np.sqrt(GOLD_EDGES[1:-1] * GOLD_EDGES[2:]), [GOLD_EDGES[-1]]))
+
+
+@dataclass
+class MonteCarloBands:
+    """Перцентили дневных показателей по всем игрокам."""
+    players: int  # Число игроков
+    percentiles: Tuple[float, ...]  # Перцентили, например (10, 50, 90)
+    level: np.ndarray  # Уровень персонажа, форма (len(percentiles), days)
+    gold: np.ndarray  # Золото на конец дня, форма (len(percentiles), days)
+    locations_completed: np.ndarray  # Завершенные локации, форма (len(percentiles), days)
+
+    @property
+    def days(self) -> int:
+        """Количество дней."""
+        return self.level.shape[1]
+
+
+class DailyBandAccumulator:
+    """
+    Накапливает гистограммы дневных показателей игроков.
+
+    Игрок, закончивший игру раньше горизонта, учитывается в оставшихся днях
+    с итоговыми показателями.
+    """
+
+    def __init__(self, days: int, max_level: int, locations_count: int):
+        """
+        Args:
+            days: Горизонт в днях
+            max_level: Максимальный уровень персонажа
+            locations_count: Количество локаций
+        """
+        self.days = days
+        self.players = 0
+        self.level = np.zeros((days, max_level + 1), dtype=np.int64)
+        self.locations_completed = np.zeros((days, locations_count + 1), dtype=np.int64)
+        self.gold = np.zeros((days, len(GOLD_VALUES)), dtype=np.int64)
+        self._rows = np.arange(days)
+
+    def add(self, daily_metrics: Sequence[Tuple[int, float, int]]) -> None:
+        """
+        Добавляет дневные показатели одного игрока.
+
+        Args:
+            daily_metrics: Уровень, золото и завершенные локации на конец каждого дня
+        """
+        if not daily_metrics:
+            return
+        metrics = np.array(daily_metrics[:self.days], dtype=np.float64)
+        if len(metrics) < self.days:
+            metrics = np.concatenate((metrics, np.repeat(metrics[-1:], self.days - len(metrics), axis=0)))
+
+        level = np.clip(metrics[:, 0].astype(np.int64), 0, self.level.shape[1] - 1)
+        completed = np.clip(metrics[:, 2].astype(np.int64), 0, self.locations_completed.shape[1] - 1)
+        gold_bin = np.clip(np.searchsorted(GOLD_EDGES, metrics[:, 1], side="right") - 1, 0, len(GOLD_VALUES) - 1)
+
+        self.level[self._rows, level] += 1
+        self.locations_completed[self._rows, completed] += 1
+        self.gold[self._rows, gold_bin] += 1
+        self.players += 1
+
+    def merge(self, other: "DailyBandAccumulator") -> None:
+        """
+        Добавляет гистограммы другого накопителя с тем же горизонтом.
+
+        Args:
+            other: Накопитель, например из другого процесса
+        """
+        self.level += other.level
+        self.locations_completed += other.locations_completed
+        self.gold += other.gold
+        self.players += other.players
+
+    def bands(self, percentiles: Sequence[float] = (10, 50, 90)) -> MonteCarloBands:
+        """
+        Считает перцентили по накопленным гистограммам (по правилу ближайшего ранга).
+
+        Args:
+            percentiles: Перцентили от 0 до 100
+
+        Returns:
+            MonteCarloBands: Перцентили для каждого дня
+        """
+        percentiles = tuple(percentiles)
+        return MonteCarloBands(
+            players=self.players,
+            percentiles=percentiles,
+            level=_histogram_percentiles(self.level, np.arange(self.level.shape[1]), percentiles),
+            gold=_histogram_percentiles(self.gold, GOLD_VALUES, percentiles),
+            locations_completed=_histogram_percentiles(
+                self.locations_completed, np.arange(self.locations_completed.shape[1]), percentiles
+            )
+        )
+
+
+def _histogram_percentiles(histogram: np.ndarray, values: np.ndarray,
+                           percentiles: Tuple[float, ...]) -> np.ndarray:
+    """
+    Находит перцентили по гистограммам строк.
+
+    Args:
+        histogram: Счетчики, форма (days, bins)
+        values: Значение каждой корзины
+        percentiles: Перцентили от 0 до 100
+
+    Returns:
+        np.ndarray: Значения, форма (len(percentiles), days); NaN для пустых строк
+    """
+    cumulative = np.cumsum(histogram, axis=1)
+    total = cumulative[:, -1]
+    empty = total == 0
+    result = np.zeros((len(percentiles), histogram.shape[0]), dtype=np.float64)
+    for i, q in enumerate(percentiles):
+        rank = np.maximum(np.ceil(q / 100 * total), 1)
+        # Первая корзина, в которой накопленный счетчик достигает ранга
+        bins = (cumulative < rank[:, None]).sum(axis=1)
+        result[i] = np.where(empty, np.nan, values[np.minimum(bins, len(values) - 1)])
+    return result
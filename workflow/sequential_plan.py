@@ -0,0 +1,100 @@
+"""
+План покупок для последовательного алгоритма.
+
+При последовательном алгоритме порядок улучшений задан конфигурацией:
+локация 1 уровни 1..N, затем локация 2 и так далее. От золота, кулдаунов и
+уровня персонажа зависит только время покупок, поэтому порядок можно
+развернуть в плоские массивы с префиксными суммами стоимости, опыта и кулдаунов.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+
+from workflow.compiled_config import CompiledSimulationConfig
+
+
+@dataclass(frozen=True, eq=False)
+class SequentialPlan:
+    """
+    Развернутая последовательность покупок.
+
+    Покупка j - улучшение локации `location_ids[j]` до уровня `levels[j]`.
+    Префиксные массивы исключающие: `cum_cost[j]` - суммарная стоимость
+    покупок 0..j-1, поэтому их длина на единицу больше числа покупок.
+    """
+    location_ids: List[int]  # ID локации для каждой покупки
+    rows: List[int]  # Строка локации в скомпилированных таблицах
+    levels: List[int]  # Новый уровень локации
+    cost: List[int]  # Стоимость покупки
+    xp: List[int]  # Опыт за покупку
+    keys: List[int]  # Ключи за покупку (только за последний уровень локации)
+    cooldown: List[int]  # Кулдаун после покупки
+    unlock_level: List[int]  # Требуемый уровень персонажа
+    segment_end: List[int]  # Индекс первой покупки следующей локации
+    location_start: dict  # ID локации -> индекс ее первой покупки
+    cum_cost: np.ndarray  # Префиксная сумма стоимости
+    cum_xp: np.ndarray  # Префиксная сумма опыта
+    cum_cooldown: np.ndarray  # Префиксная сумма кулдаунов
+
+    def __len__(self) -> int:
+        return len(self.location_ids)
+
+
+@lru_cache(maxsize=32)
+def build_sequential_plan(compiled: CompiledSimulationConfig) -> SequentialPlan:
+    """
+    Строит план покупок по скомпилированной конфигурации.
+
+    Кэшируется по содержимому таблиц, поэтому повторные запуски с той же
+    конфигурацией используют готовый план.
+
+    Args:
+        compiled: Скомпилированная конфигурация
+
+    Returns:
+        SequentialPlan: План покупок
+    """
+    location_ids, rows, levels, segment_end = [], [], [], []
+    location_start = {}
+
+    for loc_id in sorted(compiled.location_ids):
+        row = compiled.location_rows[loc_id]
+        max_level = compiled.max_level.item(row)
+        location_start[loc_id] = len(location_ids)
+        location_ids.extend([loc_id] * max_level)
+        rows.extend([row] * max_level)
+        levels.extend(range(1, max_level + 1))
+        segment_end.extend([len(location_ids)] * max_level)
+
+    row_array = np.array(rows, dtype=np.int64)
+    level_array = np.array(levels, dtype=np.int64)
+    cost = compiled.cost[row_array, level_array]
+    xp = compiled.xp[row_array, level_array]
+    max_levels = compiled.max_level[row_array]
+    keys = np.where(level_array == max_levels, compiled.keys[row_array], 0)
+    cooldown = compiled.cooldown[level_array]
+
+    def prefix(values: np.ndarray) -> np.ndarray:
+        result = np.zeros(len(values) + 1, dtype=values.dtype)
+        np.cumsum(values, out=result[1:])
+        result.setflags(write=False)
+        return result
+
+    return SequentialPlan(
+        location_ids=location_ids,
+        rows=rows,
+        levels=levels,
+        cost=cost.tolist(),
+        xp=xp.tolist(),
+        keys=keys.tolist(),
+        cooldown=cooldown.tolist(),
+        unlock_level=compiled.unlock_level[row_array].tolist(),
+        segment_end=segment_end,
+        location_start=location_start,
+        cum_cost=prefix(cost),
+        cum_xp=prefix(xp),
+        cum_cooldown=prefix(cooldown)
+    )
\ No newline at end of file
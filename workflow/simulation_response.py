@@ -2,13 +2,89 @@ from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any
 from uuid import uuid4
 
+from models.config import StopCode
+from workflow.event_log import EventLog
+
+def rebuild_locations(history: List[Dict[str, Any]], index: int) -> Dict[Any, Dict[str, Any]]:
+    """
+    Восстанавливает полную таблицу локаций для состояния истории.
+    
+    Состояния хранят только изменившиеся локации, поэтому таблица собирается
+    от ближайшего предшествующего полного снимка (состояния с "keyframe")
+    с наложением последующих изменений. Состояния без поля "keyframe"
+    считаются полными снимками.
+    
+    Args:
+        history: История симуляции (в том числе загруженная из JSON)
+        index: Номер состояния, поддерживаются отрицательные номера
+        
+    Returns:
+        Dict: ID локации -> состояние локации
+    """
+    index = range(len(history))[index]
+    start = index
+    while start > 0 and not history[start].get("keyframe", True):
+        start -= 1
+    
+    locations = {}
+    for state in history[start:index + 1]:
+        for loc_id, loc_state in state["locations"].items():
+            locations[loc_id] = dict(loc_state)
+    return locations
+
+@dataclass
+class SimulationSummary:
+    """Итоговые показатели симуляции, накопленные без записи истории."""
+    simulation_id: str = ""
+    timestamp: int = 0  # Время остановки симуляции
+    user_level: int = 1  # Итоговый уровень персонажа
+    gold: float = 0.0
+    xp: int = 0
+    keys: int = 0
+    earn_per_sec: float = 0.0
+    location_upgrades: int = 0  # Количество улучшений локаций
+    level_up_times: Dict[int, int] = field(default_factory=dict)  # Уровень персонажа -> время его получения
+    stop_reason: str = ""  # Причина остановки симуляции
+    stop_code: Optional[StopCode] = None  # Код причины остановки
+    
+    @property
+    def days(self) -> float:
+        """Количество игровых дней до остановки."""
+        return self.timestamp / 86400
+
 @dataclass
 class SimulationResponse:
     simulation_id: str = ""
     timestamp: int = 0
     history: List[Dict[str, Any]] = field(default_factory=list)
     stop_reason: str = ""  # Причина остановки симуляции
+    stop_code: Optional[StopCode] = None  # Код причины остановки
+    summary: Optional[SimulationSummary] = None  # Итоговые показатели
+    events: Optional[EventLog] = None  # Колоночный журнал действий (в режиме полной истории)
     
     def __post_init__(self):
         if not self.simulation_id:
-            self.simulation_id = str(uuid4()) 
\ No newline at end of file
+            self.simulation_id = str(uuid4())
+    
+    def locations_at(self, index: int) -> Dict[int, Dict[str, Any]]:
+        """
+        Возвращает полную таблицу локаций для состояния истории с номером index.
+        
+        Args:
+            index: Номер состояния, поддерживаются отрицательные номера
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: ID локации -> состояние локации
+        """
+        return rebuild_locations(self.history, index)
+    
+    def history_dicts(self) -> List[Dict[str, Any]]:
+        """
+        Возвращает историю, в которой действия собраны в обычные списки словарей.
+        
+        Нужна там, где история сериализуется в JSON.
+        
+        Returns:
+            List[Dict[str, Any]]: Копия истории со списками действий
+        """
+        return [{**state, "actions": list(state["actions"])} for state in self.history]
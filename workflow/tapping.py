@@ -4,13 +4,133 @@
 """
 
 import logging
+import math
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from models.config import TappingConfig
 
 logger = logging.getLogger("TappingModule")
 
+ENERGY_RECOVERY_RATE = 0.1  # Восстановление энергии, ед/сек (полное восстановление за 2-3 часа)
+DEFAULT_TAP_COEF = 1.0  # Золото за тап на уровень персонажа, если не задано в конфигурации
+DEFAULT_TAP_SPEED = 3.0  # Тапов в секунду, если не задано в конфигурации
+DEFAULT_MAX_ENERGY = 700  # Запас энергии, если не задан в конфигурации
+
+
+def _energy_after(energy: float, slope: float, seconds: int, max_energy: float) -> float:
+    """Энергия через seconds секунд линейного изменения с ограничением сверху запасом энергии."""
+    if seconds <= 0:
+        return energy
+    return min(max_energy, energy + seconds * slope)
+
+
+def _append_linear(segments: List["EnergySegment"], start_time: int, energy: float, slope: float,
+                   seconds: int, max_energy: float, tap_rate: float = 0.0) -> float:
+    """
+    Добавляет линейные участки кривой энергии.
+    
+    Энергия меняется на slope в секунду и не превышает max_energy. Если запас
+    заполняется внутри участка, он делится в последней целой секунде до
+    заполнения и в момент заполнения, так что значения кривой в целые секунды
+    совпадают с посекундной моделью.
+    
+    Args:
+        segments: Участки кривой, к которым добавляются новые
+        start_time: Время начала участка
+        energy: Энергия в начале участка
+        slope: Изменение энергии за секунду
+        seconds: Длительность участка в секундах
+        max_energy: Максимальный запас энергии
+        tap_rate: Тапов в секунду на участке
+        
+    Returns:
+        float: Энергия в конце участка
+    """
+    if seconds <= 0:
+        return energy
+    end_energy = _energy_after(energy, slope, seconds, max_energy)
+    points = [(0, energy)]
+    if slope > 0 and end_energy >= max_energy:
+        fill_seconds = max(0, math.ceil((max_energy - energy) / slope))
+        if fill_seconds > 1:
+            points.append((fill_seconds - 1, energy + (fill_seconds - 1) * slope))
+        if 0 < fill_seconds < seconds:
+            points.append((fill_seconds, max_energy))
+    points.append((seconds, end_energy))
+    for (offset, value), (end_offset, end_value) in zip(points, points[1:]):
+        segments.append(EnergySegment(start_time + offset, start_time + end_offset, value, end_value,
+                                      tap_rate * (end_offset - offset)))
+    return end_energy
+
+
+def sample_energy(segments: Sequence["EnergySegment"], step: Optional[float] = None) -> Iterator[Tuple[float, float, float]]:
+    """
+    Лениво выбирает точки кривой энергии по ее линейным участкам.
+    
+    Args:
+        segments: Участки кривой по порядку
+        step: Шаг выборки в секундах (по умолчанию - только точки излома)
+        
+    Yields:
+        Tuple[float, float, float]: Время, энергия и тапы с начала кривой
+    """
+    if not segments:
+        return
+    if step is None:
+        taps = 0.0
+        yield segments[0].start_time, segments[0].start_energy, taps
+        for segment in segments:
+            taps += segment.taps
+            yield segment.end_time, segment.end_energy, taps
+        return
+    
+    if step <= 0:
+        raise ValueError("step must be positive")
+    index = 0
+    taps_before = 0.0  # Тапы до начала текущего участка
+    time_point = segments[0].start_time
+    end_time = segments[-1].end_time
+    while True:
+        while index < len(segments) - 1 and segments[index].end_time < time_point:
+            taps_before += segments[index].taps
+            index += 1
+        segment = segments[index]
+        energy, taps = segment.at(time_point)
+        yield time_point, energy, taps_before + taps
+        if time_point >= end_time:
+            return
+        time_point = min(time_point + step, end_time)
+
+
+@dataclass
+class EnergySegment:
+    """Линейный участок кривой энергии сессии тапания."""
+    start_time: int  # Начало участка в секундах
+    end_time: int  # Конец участка в секундах
+    start_energy: float  # Энергия в начале участка
+    end_energy: float  # Энергия в конце участка
+    taps: float = 0  # Тапов на участке (равномерно по времени)
+    
+    def at(self, time_point: float) -> Tuple[float, float]:
+        """
+        Значения участка в момент времени внутри него.
+        
+        Args:
+            time_point: Время в секундах
+            
+        Returns:
+            Tuple[float, float]: Энергия и тапы с начала участка
+        """
+        length = self.end_time - self.start_time
+        if length <= 0:
+            return self.end_energy, self.taps
+        share = (time_point - self.start_time) / length
+        return self.start_energy + (self.end_energy - self.start_energy) * share, self.taps * share
+
+
 @dataclass
 class TapSession:
     """Данные одной игровой сессии тапания."""
@@ -19,8 +139,26 @@ class TapSession:
     energy_used: int = 0  # Потраченная энергия
     taps_count: int = 0  # Количество выполненных тапов
     gold_earned: float = 0  # Заработанное золото
-    energy_history: List[Tuple[int, int]] = field(default_factory=list)  # История энергии (время, значение)
+    start_energy: float = 0  # Энергия в начале сессии
+    energy_segments: List[EnergySegment] = field(default_factory=list)  # Кривая энергии по линейным участкам
     user_level: int = 1  # Уровень персонажа во время сессии
+    
+    def sample_energy(self, step: Optional[float] = None) -> Iterator[Tuple[float, float, float]]:
+        """
+        Лениво выбирает точки кривой энергии сессии с заданным шагом.
+        
+        Args:
+            step: Шаг выборки в секундах (по умолчанию - только точки излома)
+            
+        Yields:
+            Tuple[float, float, float]: Время, энергия и тапы с начала сессии
+        """
+        return sample_energy(self.energy_segments, step)
+    
+    @property
+    def energy_history(self) -> List[Tuple[float, float]]:
+        """Энергия в каждую секунду сессии (время, значение), собирается по участкам."""
+        return [(time_point, energy) for time_point, energy, _ in self.sample_energy(1)]
 
 @dataclass
 class TapDay:
@@ -49,15 +187,53 @@ class TappingEngine:
         self.config = config
         # Устанавливаем значения по умолчанию, если они отсутствуют
         if self.config.tap_coef is None:
-            self.config.tap_coef = 1.0
+            self.config.tap_coef = DEFAULT_TAP_COEF
         if self.config.tap_speed is None:
-            self.config.tap_speed = 3.0
+            self.config.tap_speed = DEFAULT_TAP_SPEED
         if self.config.max_energy_capacity is None:
-            self.config.max_energy_capacity = 700
+            self.config.max_energy_capacity = DEFAULT_MAX_ENERGY
             
         self.days_data: List[TapDay] = []
+        self._days_by_number: Dict[int, TapDay] = {}  # Дни из days_data по номеру
         self.current_energy = self.config.max_energy_capacity
         self.user_level = 1  # Устанавливаем начальный уровень персонажа
+        self.last_session_end: Optional[int] = None  # Конец последней сессии, от него восстанавливается энергия
+    
+    def energy_at(self, time_point: int) -> float:
+        """
+        Энергия к моменту времени с учетом восстановления после последней сессии.
+        
+        Args:
+            time_point: Время в секундах
+            
+        Returns:
+            float: Энергия
+        """
+        if self.last_session_end is None:
+            return self.current_energy
+        time_passed = time_point - self.last_session_end
+        return self.current_energy + min(time_passed * ENERGY_RECOVERY_RATE,
+                                         self.config.max_energy_capacity - self.current_energy)
+    
+    def run_session(self, start_time: int, duration: int, user_level: int,
+                    energy: Optional[float] = None) -> TapSession:
+        """
+        Восстанавливает энергию после прошлой сессии и проводит следующую.
+        
+        Args:
+            start_time: Время начала сессии (в секундах)
+            duration: Длительность сессии (в секундах)
+            user_level: Уровень персонажа (влияет на золото за тап)
+            energy: Энергия в начале сессии (по умолчанию - восстановленная после прошлой сессии)
+            
+        Returns:
+            TapSession: Данные сессии
+        """
+        self.user_level = user_level
+        self.current_energy = self.energy_at(start_time) if energy is None else energy
+        session = self._simulate_session(start_time, duration)
+        self.last_session_end = start_time + duration
+        return session
     
     def simulate_sessions(self, session_times: List[int], session_duration: int, user_level: int = 1, user_levels_by_day: Dict[int, int] = None) -> List[TapDay]:
         """
@@ -77,6 +253,7 @@ class TappingEngine:
             return []
         
         self.days_data = []
+        self._days_by_number = {}
         # Начинаем с полным запасом энергии
         self.current_energy = self.config.max_energy_capacity
         self.user_level = user_level
@@ -87,7 +264,7 @@ class TappingEngine:
         # Сортируем сессии по времени
         session_times.sort()
         
-        last_session_end = 0  # Время окончания последней сессии для расчета восстановления
+        self.last_session_end = None
         
         for session_idx, session_start in enumerate(session_times):
             day_number = session_start // 86400
@@ -99,30 +276,13 @@ class TappingEngine:
             else:
                 current_level = self.user_level
             
-            # Обновляем текущий уровень пользователя для движка
-            self.user_level = current_level
-            
-            # Восстанавливаем энергию медленно между сессиями (0.1 ед/сек)
-            if last_session_end > 0:
-                time_passed = session_start - last_session_end
-                # Восстановление энергии: 0.1 ед/сек (полное восстановление за 2-3 часа)
-                energy_recovery_rate = 0.1
-                energy_recovered = min(time_passed * energy_recovery_rate, 
-                                      self.config.max_energy_capacity - self.current_energy)
-                self.current_energy += energy_recovered
-                
-                logger.info(f"Сессия {session_idx+1}: Восстановлено {energy_recovered:.1f} энергии за {time_passed} секунд между сессиями")
-            
-            # Симулируем текущую сессию с текущим уровнем пользователя
-            session = self._simulate_session(session_start, session_duration_sec)
-            last_session_end = session_start + session_duration_sec
+            # Симулируем текущую сессию с текущим уровнем пользователя,
+            # энергия медленно восстанавливается между сессиями (0.1 ед/сек)
+            session = self.run_session(session_start, session_duration_sec, current_level)
             
             # Добавляем сессию в соответствующий день
             day = self._get_or_create_day(day_number)
             
-            # Обновляем уровень пользователя в объекте сессии, чтобы сохранить эту информацию
-            session.user_level = self.user_level
-            
             day.sessions.append(session)
             day.total_taps += session.taps_count
             day.total_energy += session.energy_used
@@ -134,7 +294,13 @@ class TappingEngine:
     
     def _simulate_session(self, start_time: int, duration: int) -> TapSession:
         """
-        Симулирует одну игровую сессию тапания.
+        Рассчитывает одну игровую сессию тапания аналитически.
+        
+        Расход и восстановление энергии линейны по участкам: сначала игрок тапает
+        с полной скоростью, затем, если энергии или лимита тапов не хватает на
+        полную секунду, делает последние тапы, а до конца сессии энергия только
+        восстанавливается. Результат совпадает с посекундной моделью, но считается
+        за O(1) независимо от длительности сессии.
         
         Args:
             start_time: Время начала сессии (в секундах)
@@ -143,99 +309,84 @@ class TappingEngine:
         Returns:
             TapSession: Данные сессии
         """
-        session = TapSession(start_time=start_time, duration=duration, user_level=self.user_level)
-        
-        # Логируем информацию о текущей сессии для отладки
-        day_number = start_time // 86400
-        logger.info(f"Симуляция сессии для дня {day_number+1}, уровень пользователя: {self.user_level}")
-        
-        # Добавляем начальное состояние энергии
-        session.energy_history.append((start_time, self.current_energy))
+        session = TapSession(start_time=start_time, duration=duration, user_level=self.user_level,
+                             start_energy=self.current_energy)
+        max_energy = self.config.max_energy_capacity
+        tap_speed = self.config.tap_speed
         
         # Определяем эффективное время тапания (максимум 5-7 минут)
         # Для новичков (запас энергии <= 700) - не более 5 минут
         # Для прокачанных (запас энергии > 700) - не более 7 минут
-        max_tapping_time = 300 if self.config.max_energy_capacity <= 700 else 420  # в секундах
+        max_tapping_time = 300 if max_energy <= 700 else 420  # в секундах
+        tapping_time = max(0, min(duration, max_tapping_time))
         
         # Ограничение на количество тапов для новичков (500-700)
-        max_taps_for_beginners = self.config.max_energy_capacity
-        if self.config.max_energy_capacity <= 700:
-            # Случайное значение в диапазоне 500-700 или меньше, если энергии меньше
-            max_taps_for_beginners = min(self.config.max_energy_capacity, 
-                                         500 + int((700-500) * (self.config.max_energy_capacity / 700)))
-        
-        # Скорость восстановления энергии (медленнее, чем расход)
-        # В реальных Tap-to-Earn полное восстановление занимает 2-3 часа
-        # Делаем восстановление в 10 раз медленнее расхода (0.1 ед/сек)
-        energy_recovery_rate = 0.1
+        max_taps = math.inf
+        if max_energy <= 700:
+            max_taps = min(max_energy, 500 + int((700-500) * (max_energy / 700)))
         
-        remaining_time = min(duration, max_tapping_time)
-        current_time = start_time
-        active_tapping = True
+        energy = self.current_energy
+        elapsed = 0  # Секунд сессии уже рассчитано
+        taps = 0
         
-        # Симулируем тапание только в пределах эффективного времени
-        total_taps_in_session = 0
+        if energy <= 0 and tapping_time > 0:
+            # Энергия уходит в минус, если сессии пересекаются: тапание начнется,
+            # когда энергия восстановится выше нуля
+            elapsed = int(-energy // ENERGY_RECOVERY_RATE) + 1
+            while energy + elapsed * ENERGY_RECOVERY_RATE <= 0:  # Поправка на округление деления
+                elapsed += 1
+            elapsed = min(tapping_time, elapsed)
+            energy = _append_linear(session.energy_segments, start_time, energy, ENERGY_RECOVERY_RATE,
+                                    elapsed, max_energy)
         
-        while remaining_time > 0:
-            if active_tapping and self.current_energy > 0:
-                # Сколько тапов можно сделать за 1 секунду (не больше текущей энергии и скорости тапания)
-                taps_per_second = min(self.config.tap_speed, self.current_energy)
-                
-                # Проверка на лимит тапов для новичков
-                if self.config.max_energy_capacity <= 700:
-                    remaining_allowed_taps = max_taps_for_beginners - total_taps_in_session
-                    taps_per_second = min(taps_per_second, remaining_allowed_taps)
-                
-                if taps_per_second <= 0:
-                    # Энергия закончилась или достигнут лимит тапов, заканчиваем активное тапание
-                    active_tapping = False
-                else:
-                    # Обновляем статистику
-                    self.current_energy -= taps_per_second
-                    session.energy_used += taps_per_second
-                    session.taps_count += taps_per_second
-                    total_taps_in_session += taps_per_second
-                    
-                    # Расчет золота за тап с учетом уровня персонажа
-                    gold_per_tap = self.user_level * self.config.tap_coef
-                    session.gold_earned += taps_per_second * gold_per_tap
-                    
-                    # Логирование для отладки
-                    if taps_per_second > 0:
-                        logger.info(f"Уровень пользователя: {self.user_level}, коэффициент: {self.config.tap_coef}, золото за тап: {gold_per_tap:.2f}")
-                        logger.info(f"Тапов: {taps_per_second:.1f}, получено золота: {taps_per_second * gold_per_tap:.1f}")
-                    
-                    # Если энергия закончилась, прекращаем активное тапание
-                    if self.current_energy <= 0 or (self.config.max_energy_capacity <= 700 and 
-                                                  total_taps_in_session >= max_taps_for_beginners):
-                        active_tapping = False
+        if tap_speed > 0 and elapsed < tapping_time and energy > 0 and max_taps > 0:
+            # Секунды тапания с полной скоростью: энергия меняется на (восстановление - скорость) в секунду
+            drain = tap_speed - ENERGY_RECOVERY_RATE
+            if energy < tap_speed:
+                full_seconds = 0
+            elif drain > 0:
+                full_seconds = int((energy - tap_speed) // drain) + 1
+            elif energy == tap_speed:
+                # Энергия обнуляется первым же тапом
+                full_seconds = 1
+            else:
+                full_seconds = tapping_time
+            if max_taps != math.inf:
+                full_seconds = min(full_seconds, int(max_taps // tap_speed))
+            full_seconds = min(full_seconds, tapping_time - elapsed)
             
-            # Восстанавливаем энергию медленнее (0.1 ед/сек)
-            if self.current_energy < self.config.max_energy_capacity:
-                energy_to_recover = min(energy_recovery_rate, 
-                                        self.config.max_energy_capacity - self.current_energy)
-                self.current_energy += energy_to_recover
+            stopped = False
+            if full_seconds > 0:
+                last_energy = _energy_after(energy, -drain, full_seconds - 1, max_energy)
+                # Тапание прекращается, если энергия обнулилась ровно или исчерпан лимит тапов
+                stopped = last_energy <= tap_speed or full_seconds * tap_speed >= max_taps
+                energy = _append_linear(session.energy_segments, start_time + elapsed, energy, -drain,
+                                        full_seconds, max_energy, tap_speed)
+                taps = full_seconds * tap_speed
+                elapsed += full_seconds
             
-            # Обновляем время и записываем состояние энергии
-            current_time += 1
-            remaining_time -= 1
-            session.energy_history.append((current_time, self.current_energy))
+            if not stopped and elapsed < tapping_time:
+                # Последняя неполная секунда: остаток энергии или лимита тапов
+                last_taps = min(tap_speed, energy, max_taps - taps)
+                if last_taps > 0:
+                    last_energy = energy - last_taps
+                    last_energy += min(ENERGY_RECOVERY_RATE, max_energy - last_energy)
+                    session.energy_segments.append(EnergySegment(start_time + elapsed, start_time + elapsed + 1,
+                                                                 energy, last_energy, last_taps))
+                    energy = last_energy
+                    taps += last_taps
+                    elapsed += 1
         
-        # Пользователь проводит в приложении всю сессию, но активно тапает только часть времени
-        # Продолжаем записывать восстановление энергии до конца сессии
-        remaining_session_time = duration - max_tapping_time
-        if remaining_session_time > 0:
-            for i in range(remaining_session_time):
-                current_time += 1
-                
-                # Восстанавливаем энергию со скоростью 0.1 ед/сек
-                if self.current_energy < self.config.max_energy_capacity:
-                    energy_to_recover = min(energy_recovery_rate, 
-                                           self.config.max_energy_capacity - self.current_energy)
-                    self.current_energy += energy_to_recover
-                    
-                session.energy_history.append((current_time, self.current_energy))
+        # Пользователь проводит в приложении всю сессию, но активно тапает только часть времени:
+        # до конца сессии энергия восстанавливается
+        self.current_energy = _append_linear(session.energy_segments, start_time + elapsed, energy,
+                                             ENERGY_RECOVERY_RATE, max(0, duration - elapsed), max_energy)
         
+        # Расчет золота за тап с учетом уровня персонажа
+        gold_per_tap = self.user_level * self.config.tap_coef
+        session.taps_count = taps
+        session.energy_used = taps
+        session.gold_earned = taps * gold_per_tap
         return session
     
     def _get_or_create_day(self, day_number: int) -> TapDay:
@@ -248,14 +399,12 @@ class TappingEngine:
         Returns:
             TapDay: Объект дня
         """
-        for day in self.days_data:
-            if day.day == day_number:
-                return day
-        
-        # День не найден, создаем новый
-        new_day = TapDay(day=day_number)
-        self.days_data.append(new_day)
-        return new_day
+        day = self._days_by_number.get(day_number)
+        if day is None:
+            day = TapDay(day=day_number)
+            self.days_data.append(day)
+            self._days_by_number[day_number] = day
+        return day
     
     def _get_last_session(self) -> Optional[TapSession]:
         """
@@ -271,4 +420,218 @@ class TappingEngine:
         if not last_day.sessions:
             return None
             
-        return max(last_day.sessions, key=lambda x: x.start_time) 
\ No newline at end of file
+        return max(last_day.sessions, key=lambda x: x.start_time) 
+
+def tapping_parameters(config: TappingConfig) -> Tuple[float, float, float]:
+    """
+    Параметры тапания конфигурации с подстановкой значений по умолчанию.
+    
+    В отличие от `TappingEngine`, конфигурация не изменяется.
+    
+    Args:
+        config: Конфигурация механики тапания
+        
+    Returns:
+        Tuple[float, float, float]: Запас энергии, скорость тапания и золото за тап на уровень
+    """
+    max_energy = DEFAULT_MAX_ENERGY if config.max_energy_capacity is None else config.max_energy_capacity
+    tap_speed = DEFAULT_TAP_SPEED if config.tap_speed is None else config.tap_speed
+    tap_coef = DEFAULT_TAP_COEF if config.tap_coef is None else config.tap_coef
+    return max_energy, tap_speed, tap_coef
+
+
+def solve_sessions(energy, duration, user_level, max_energy, tap_speed, tap_coef
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Рассчитывает пачку независимых сессий тапания массивами NumPy.
+    
+    Векторный вариант `TappingEngine._simulate_session` без кривой энергии:
+    те же фазы (ожидание положительной энергии, тапание с полной скоростью,
+    последняя неполная секунда, восстановление) и те же операции с плавающей
+    точкой, поэтому результат совпадает с расчетом по одной сессии.
+    Аргументы приводятся к общей форме по правилам broadcasting.
+    
+    Args:
+        energy: Энергия в начале сессий
+        duration: Длительность сессий в секундах
+        user_level: Уровень персонажа
+        max_energy: Максимальный запас энергии
+        tap_speed: Тапов в секунду
+        tap_coef: Золото за тап на уровень персонажа
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Тапы, энергия в конце сессий и золото
+    """
+    rate = ENERGY_RECOVERY_RATE
+    energy, duration, user_level, max_energy, tap_speed, tap_coef = np.broadcast_arrays(
+        np.asarray(energy, dtype=np.float64), np.asarray(duration, dtype=np.int64),
+        np.asarray(user_level, dtype=np.int64), np.asarray(max_energy, dtype=np.float64),
+        np.asarray(tap_speed, dtype=np.float64), np.asarray(tap_coef, dtype=np.float64)
+    )
+    novice = max_energy <= 700
+    tapping_time = np.maximum(0, np.minimum(duration, np.where(novice, 300, 420)))
+    max_taps = np.where(novice, np.minimum(max_energy, 500 + np.floor((700 - 500) * (max_energy / 700))), np.inf)
+    
+    # Ожидание, пока энергия после пересекающихся сессий не станет положительной
+    elapsed = np.zeros(energy.shape, dtype=np.int64)
+    waiting = (energy <= 0) & (tapping_time > 0)
+    if waiting.any():
+        wait = np.floor_divide(-energy, rate).astype(np.int64) + 1
+        short = waiting & (energy + wait * rate <= 0)  # Поправка на округление деления
+        while short.any():
+            wait += short
+            short = waiting & (energy + wait * rate <= 0)
+        elapsed = np.where(waiting, np.minimum(tapping_time, wait), 0)
+        energy = np.where(elapsed > 0, np.minimum(max_energy, energy + elapsed * rate), energy)
+    
+    # Тапание с полной скоростью
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        tapping = (tap_speed > 0) & (elapsed < tapping_time) & (energy > 0) & (max_taps > 0)
+        drain = tap_speed - rate
+        full_seconds = np.where(
+            energy < tap_speed, 0,
+            np.where(drain > 0, np.floor_divide(energy - tap_speed, np.where(drain > 0, drain, 1)) + 1,
+                     np.where(energy == tap_speed, 1, tapping_time))
+        )
+        taps_limit = np.floor_divide(max_taps, np.where(tap_speed > 0, tap_speed, 1))
+        full_seconds = np.where(np.isfinite(max_taps), np.minimum(full_seconds, taps_limit), full_seconds)
+    full_seconds = np.where(tapping, np.minimum(full_seconds, tapping_time - elapsed), 0).astype(np.int64)
+    
+    running = full_seconds > 0
+    last_energy = np.where(full_seconds > 1,
+                           np.minimum(max_energy, energy + (full_seconds - 1) * -drain), energy)
+    stopped = running & ((last_energy <= tap_speed) | (full_seconds * tap_speed >= max_taps))
+    energy = np.where(running, np.minimum(max_energy, energy + full_seconds * -drain), energy)
+    taps = np.where(running, full_seconds * tap_speed, 0.0)
+    elapsed = elapsed + full_seconds
+    
+    # Последняя неполная секунда
+    last_taps = np.minimum(np.minimum(tap_speed, energy), max_taps - taps)
+    partial = tapping & ~stopped & (elapsed < tapping_time) & (last_taps > 0)
+    last_energy = energy - last_taps
+    last_energy = last_energy + np.minimum(rate, max_energy - last_energy)
+    energy = np.where(partial, last_energy, energy)
+    taps = np.where(partial, taps + last_taps, taps)
+    elapsed = elapsed + partial
+    
+    # Восстановление до конца сессии
+    recovery = duration - elapsed
+    energy = np.where(recovery > 0, np.minimum(max_energy, energy + recovery * rate), energy)
+    return taps, energy, taps * (user_level * tap_coef)
+
+
+@dataclass
+class TapBatchResult:
+    """
+    Итоги пакетной симуляции тапания по сетке (конфигурация x сессия).
+    
+    Дневные итоги хранятся таблицей (конфигурация x день) по возрастанию
+    номеров дней; столбец дня находится по номеру через `day_index`.
+    """
+    session_times: np.ndarray  # Время начала сессий по возрастанию, (S,)
+    start_energy: np.ndarray  # Энергия в начале сессий, (C, S)
+    taps: np.ndarray  # Тапы за сессию (равны потраченной энергии), (C, S)
+    gold: np.ndarray  # Золото за сессию, (C, S)
+    end_energy: np.ndarray  # Энергия после последней сессии, (C,)
+    days: np.ndarray  # Номера дней с сессиями по возрастанию, (D,)
+    daily_sessions: np.ndarray  # Сессий за день, (D,)
+    daily_taps: np.ndarray  # Тапов за день, (C, D)
+    daily_gold: np.ndarray  # Золота за день, (C, D)
+    day_index: Dict[int, int] = field(default_factory=dict)  # Столбец дневных таблиц по номеру дня
+    
+    def day(self, day_number: int) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Итоги всех конфигураций за день.
+        
+        Args:
+            day_number: Номер игрового дня
+            
+        Returns:
+            Optional[Dict[str, np.ndarray]]: Тапы, энергия и золото по конфигурациям
+                или None, если в этот день сессий не было
+        """
+        column = self.day_index.get(day_number)
+        if column is None:
+            return None
+        taps = self.daily_taps[:, column]
+        return {"taps": taps, "energy": taps, "gold": self.daily_gold[:, column]}
+    
+    def to_pandas(self):
+        """
+        Возвращает дневные итоги таблицей с индексом (конфигурация, день).
+        
+        Returns:
+            pd.DataFrame: Тапы, энергия, золото и число сессий за день
+        """
+        import pandas as pd
+        
+        configs, days = self.daily_taps.shape
+        index = pd.MultiIndex.from_arrays(
+            [np.repeat(np.arange(configs), days), np.tile(self.days, configs)], names=["config", "day"]
+        )
+        taps = self.daily_taps.reshape(-1)
+        return pd.DataFrame({
+            "taps": taps,
+            "energy": taps,
+            "gold": self.daily_gold.reshape(-1),
+            "sessions": np.tile(self.daily_sessions, configs),
+        }, index=index)
+
+
+def simulate_sessions_batch(configs: Sequence[TappingConfig], session_times: Sequence[int],
+                            session_duration, user_level=1) -> TapBatchResult:
+    """
+    Симулирует одни и те же сессии для многих конфигураций тапания сразу.
+    
+    Каждая конфигурация начинает с полным запасом энергии и проходит сессии
+    по времени, как `TappingEngine.run_session`; сессии идут по одной, а все
+    конфигурации считаются одной векторной операцией. Подходит для перебора
+    `max_energy_capacity`, `tap_speed` и `tap_coef` по тысячам сочетаний.
+    Флаг `is_tapping` не проверяется: в сетку входят все переданные конфигурации.
+    
+    Args:
+        configs: Конфигурации тапания
+        session_times: Время начала сессий (в секундах)
+        session_duration: Длительность сессий в секундах: число, массив (S,)
+            по сессиям или (C, S) по конфигурациям и сессиям
+        user_level: Уровень персонажа в той же форме, что и длительность
+        
+    Returns:
+        TapBatchResult: Итоги по сессиям и дням
+    """
+    parameters = np.array([tapping_parameters(config) for config in configs], dtype=np.float64).reshape(-1, 3)
+    max_energy, tap_speed, tap_coef = parameters.T
+    times = np.asarray(session_times, dtype=np.int64)
+    order = np.argsort(times, kind="stable")
+    times = times[order]
+    shape = (len(parameters), len(times))
+    durations = np.broadcast_to(np.asarray(session_duration, dtype=np.int64), shape)[:, order]
+    levels = np.broadcast_to(np.asarray(user_level, dtype=np.int64), shape)[:, order]
+    
+    start_energy = np.empty(shape, dtype=np.float64)
+    taps = np.empty(shape, dtype=np.float64)
+    gold = np.empty(shape, dtype=np.float64)
+    energy = max_energy.copy()
+    for session, start_time in enumerate(times.tolist()):
+        if session > 0:
+            # Восстановление после конца прошлой сессии
+            time_passed = start_time - last_end
+            energy = energy + np.minimum(time_passed * ENERGY_RECOVERY_RATE, max_energy - energy)
+        start_energy[:, session] = energy
+        taps[:, session], energy, gold[:, session] = solve_sessions(
+            energy, durations[:, session], levels[:, session], max_energy, tap_speed, tap_coef
+        )
+        last_end = start_time + durations[:, session]
+    
+    # Сессии отсортированы, поэтому сессии одного дня идут подряд
+    days, first_session, daily_sessions = np.unique(times // 86400, return_index=True, return_counts=True)
+    if len(times):
+        daily_taps = np.add.reduceat(taps, first_session, axis=1)
+        daily_gold = np.add.reduceat(gold, first_session, axis=1)
+    else:
+        daily_taps = daily_gold = np.zeros((shape[0], 0), dtype=np.float64)
+    return TapBatchResult(
+        session_times=times, start_energy=start_energy, taps=taps, gold=gold, end_energy=energy,
+        days=days, daily_sessions=daily_sessions, daily_taps=daily_taps, daily_gold=daily_gold,
+        day_index={day: column for column, day in enumerate(days.tolist())}
+    )
@@ -1,12 +1,26 @@
+import heapq
 import logging
+import os
+import pickle
+import threading
+import time
 import uuid
+import zlib
 import copy
-from typing import Dict, List, Optional
+from dataclasses import asdict
+from typing import Any, Callable, Dict, Generator, List, Optional, Set, Tuple, Union
 
-from models.config import UserLevelConfig, EconomyConfig, SimulationAlgorithm, TappingConfig
+import numpy as np
+
+from models.config import (UserLevelConfig, EconomyConfig, SimulationAlgorithm, SimulationEngine, HistoryMode,
+                           PlayerBehaviourConfig, StopCode, TappingConfig)
 from workflow.balance import Balance
+from workflow.compiled_config import CompiledSimulationConfig, TableChanges
+from workflow.event_log import EventLog, LEVEL_UP, LOCATION_UPGRADE, PASSIVE_INCOME, TAPPING_INCOME
 from workflow.location import Location
-from workflow.simulation_response import SimulationResponse
+from workflow.location_index import LocationIndex
+from workflow.sequential_plan import SequentialPlan, build_sequential_plan
+from workflow.simulation_response import SimulationResponse, SimulationSummary
 from workflow.tapping import TappingEngine
 
 logging.basicConfig(
@@ -15,6 +29,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger("Workflow")
 
+# Версия логики симуляции: входит в ключ кэша результатов и увеличивается
+# при любом изменении, после которого та же конфигурация дает другой результат
+ENGINE_VERSION = 4
+
+CHECKPOINT_MAGIC = b"IDADVCKP"  # Заголовок файла контрольной точки
+CHECKPOINT_VERSION = 1  # Версия формата контрольной точки
+
+
+class SimulationCancelled(Exception):
+    """Симуляция остановлена по запросу через `Workflow.cancel_event`."""
+
+
 class Workflow:
     def __init__(self):
         self.locations: Dict[int, Location] = {}
@@ -24,43 +50,271 @@ class Workflow:
         self.balance = Balance()
         self.economy: EconomyConfig = None  # Будет установлено при настройке
         self.simulation_algorithm = SimulationAlgorithm.SEQUENTIAL  # По умолчанию последовательное улучшение
+        self.simulation_engine = SimulationEngine.EVENT  # По умолчанию событийный движок
+        self.fast_forward_idle = False  # Пропуск дней, когда ничего нельзя купить
+        self.max_days: Optional[int] = None  # Предел игровых дней
+        self.max_wall_seconds: Optional[float] = None  # Предел реального времени в секундах
+        self.stop_on_stall = True  # Остановка, если состояние повторяется изо дня в день
+        self.history_mode = HistoryMode.FULL  # Подробность записи истории
+        self.keyframe_interval = 100  # Каждое N-е состояние истории хранит все локации
         self.tapping_config: TappingConfig = None  # Конфигурация тапания
         self.tapping_engine: Optional[TappingEngine] = None  # Движок для тапания
+        self.behaviour: Optional[PlayerBehaviourConfig] = None  # Случайное поведение игрока
+        self.daily_metrics: List[Tuple[int, float, int]] = []  # Уровень, золото и завершенные локации на конец дня
+        self.compiled: Optional[CompiledSimulationConfig] = None  # Табличное представление конфигурации
+        self._location_index: Optional[LocationIndex] = None  # Индекс доступности локаций
+        self._location_order: Dict[int, int] = {}  # Порядок обхода локаций в проходе сессии
+        self._sequential_order: List[int] = []  # ID локаций по возрастанию для последовательного алгоритма
+        self._frontier = 0  # Позиция первой не улучшенной до максимума локации в _sequential_order
+        self._sequential_plan: Optional[SequentialPlan] = None  # План покупок для аналитического движка
+        self._stop_code: Optional[StopCode] = None  # Причина досрочной остановки
+        self._started_at = 0.0  # Реальное время начала симуляции
+        self._day_state = None  # Состояние на начало предыдущего дня для поиска застоя
+        self._location_upgrades = 0  # Количество улучшений локаций за симуляцию
+        self._level_up_times: Dict[int, int] = {}  # Уровень персонажа -> время его получения
+        self._events: Optional[EventLog] = None  # Журнал действий (только в режиме полной истории)
+        self._changed_locations: Set[int] = set()  # Локации, изменившиеся с прошлого состояния истории
+        self._states_since_keyframe = 0  # Состояний истории после последнего полного снимка
+        self._last_recorded_day: Optional[int] = None  # День последнего состояния в режиме контрольных точек
+        self.checkpoint_path: Optional[str] = None  # Файл для периодических контрольных точек
+        self.checkpoint_interval_days = 0  # Период контрольных точек в днях (0 - не сохранять)
+        self._clock: Optional[Dict[str, Any]] = None  # Состояние цикла на начало текущих суток для продолжения
+        self._resuming = False  # Восстановлена ли контрольная точка для следующего simulate()
+        self.keep_day_snapshots = False  # Хранить снимки состояния на начало суток для resimulate()
+        self.day_snapshots: List[Dict[str, Any]] = []  # Снимки состояния на начало суток
+        self._prefix: Optional[Dict[str, Any]] = None  # Общее начало истории для продолжения в resimulate()
+        self.cancel_event: Optional[threading.Event] = None  # Запрос остановки, проверяется между входами
+        self.progress_callback: Optional[Callable[[int], None]] = None  # Получает число прошедших суток
     
     def simulate(self, simulation_id: str = None) -> SimulationResponse:
+        steps = self._run(simulation_id, [])
+        while True:
+            try:
+                next(steps)
+            except StopIteration as finished:
+                return finished.value
+            self._check_cancelled(steps)
+    
+    def iter_states(self, simulation_id: str = None) -> Generator[Dict[str, Any], None, SimulationResponse]:
+        """
+        Симулирует и отдает состояния истории по мере их готовности.
+        
+        Состояние готово, когда записано следующее: до этого в его список
+        действий добавляются действия следующего входа. Отданные состояния
+        и их действия не хранятся, поэтому память не растет с длиной симуляции,
+        а прерванный перебор (например, по достижении нужного уровня) не
+        досчитывает симуляцию.
+        
+        Args:
+            simulation_id: ID симуляции
+            
+        Yields:
+            Dict[str, Any]: Состояние в виде `SimulationResponse.history_dicts()`:
+                действия собраны в список словарей, локации - полный снимок
+                в состояниях с "keyframe", иначе только изменившиеся
+            
+        Returns:
+            SimulationResponse: Итоги симуляции с пустой историей
+            
+        Raises:
+            ValueError: Если история не записывается (режим "none")
+            SimulationCancelled: Если установлен `cancel_event`
+        """
+        if self.history_mode == HistoryMode.NONE:
+            raise ValueError("States are not recorded with history mode 'none'")
+        
+        history: List[Dict] = []
+        steps = self._run(simulation_id, history)
+        response = None
+        while response is None:
+            try:
+                next(steps)
+            except StopIteration as finished:
+                response = finished.value
+            else:
+                self._check_cancelled(steps)
+            
+            # Действия последнего состояния еще дописываются, пока симуляция идет
+            ready = len(history) if response is not None else len(history) - 1
+            for state in history[:ready]:
+                yield {**state, "actions": list(state["actions"])}
+            del history[:ready]
+            if self._events is not None and history:
+                self._events.discard_before(history[0]["actions"].start)
+        return response
+    
+    def _check_cancelled(self, steps: Generator) -> None:
+        """
+        Прерывает симуляцию, если запрошена остановка.
+        
+        Args:
+            steps: Генератор шагов симуляции
+            
+        Raises:
+            SimulationCancelled: Если установлен `cancel_event`
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            steps.close()
+            logger.info("Simulation cancelled")
+            raise SimulationCancelled("Simulation cancelled")
+    
+    def _run(self, simulation_id: Optional[str],
+             history: List[Dict]) -> Generator[int, None, SimulationResponse]:
+        """
+        Проводит симуляцию, останавливаясь после каждого входа игрока.
+        
+        Args:
+            simulation_id: ID симуляции (по умолчанию генерируется)
+            history: Список, в который записываются состояния истории
+            
+        Yields:
+            int: Время очередного входа
+            
+        Returns:
+            SimulationResponse: Результат симуляции
+        """
         if not simulation_id:
             simulation_id = str(uuid.uuid4())
         
-        timestamp = 0
-        history = []
-        stop_reason = ""  # Причина остановки
+        # resimulate() продолжает историю предыдущего запуска, иначе история начинается заново
+        prefix = self._prefix
+        self._prefix = None
+        if prefix:
+            history.extend(prefix["history"])
         
-        logger.info("Starting simulation...")
+        # После restore() симуляция продолжается с сохраненных суток
+        resuming = self._resuming
+        self._resuming = False
+        timestamp = self._clock["day"] * 86400 if resuming else 0
+        
+        logger.info("Resuming simulation..." if resuming else "Starting simulation...")
         
         # Инициализируем баланс из экономической конфигурации
-        if self.economy and self.economy.starting_balance:
+        if not resuming and self.economy and self.economy.starting_balance:
             self.balance.gold = self.economy.starting_balance.gold
             self.balance.xp = self.economy.starting_balance.xp
             self.balance.keys = self.economy.starting_balance.keys
         
-        self.balance.earn_per_sec = self.user_levels[self.balance.user_level].gold_per_sec
+        self._compile()
+        
+        self.balance.earn_per_sec = self.compiled.gold_per_sec.item(self.balance.user_level)
+        
+        # Готовим структуры сессионного цикла: границу для последовательного
+        # алгоритма и индекс доступности для остальных
+        self._sequential_order = sorted(self.locations.keys())
+        self._frontier = 0
+        self._sequential_plan = None
+        if (self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL
+                and self.simulation_engine == SimulationEngine.ANALYTIC):
+            self._sequential_plan = build_sequential_plan(self.compiled)
+        self._location_order = {loc_id: position for position, loc_id in enumerate(self.locations)}
+        self._location_index = None
+        if self.simulation_algorithm != SimulationAlgorithm.SEQUENTIAL:
+            self._location_index = LocationIndex(
+                self.locations,
+                {loc_id: self.compiled.unlock_level.item(row) for loc_id, row in self.compiled.location_rows.items()},
+                self._location_order,
+                self._next_upgrade_cost,
+                self.balance.user_level,
+                timestamp
+            )
+        
+        self._stop_code = None
+        self._started_at = time.perf_counter()
+        if prefix:
+            self._events = prefix["events"]
+            self._changed_locations = prefix["changed_locations"]
+            self._states_since_keyframe = prefix["states_since_keyframe"]
+            self._last_recorded_day = history[-1]["timestamp"] // 86400 if len(history) > 1 else None
+        else:
+            self._events = EventLog() if self.history_mode == HistoryMode.FULL else None
+            self._changed_locations = set()
+            self._states_since_keyframe = 0
+            self._last_recorded_day = None
+            # Снимки прошлых суток относятся к другой истории
+            self.day_snapshots = []
+        if not resuming:
+            # Восстановленная контрольная точка продолжает накопленные итоги
+            self._reset_tapping()
+            self._day_state = None
+            self._location_upgrades = 0
+            self._level_up_times = {}
+            self.daily_metrics = []
+            self._clock = None
+        clock = self._clock
         
         # Создаем начальное состояние
-        state = {
-            "timestamp": timestamp,
-            "balance": copy.deepcopy(self.__dict__["balance"].__dict__),
-            "locations": {
-                loc_id: {
-                    "current_level": loc.current_level,
-                    "available": loc.available,
-                    "cooldown_until": loc.cooldown_until
-                } for loc_id, loc in self.locations.items()
-            },
-            "actions": []
-        }
-        history.append(state)
+        if self.history_mode != HistoryMode.NONE and not prefix:
+            history.append(self._make_state(timestamp))
+        
+        if self.behaviour is not None:
+            timestamp = yield from self._run_behaviour_loop(history, clock)
+        elif self.simulation_engine in (SimulationEngine.EVENT, SimulationEngine.ANALYTIC):
+            timestamp = yield from self._run_event_loop(history, clock)
+        else:
+            timestamp = yield from self._run_tick_loop(history, clock)
+        
+        # Контрольные точки заканчиваются состоянием на момент остановки
+        if self.history_mode == HistoryMode.CHECKPOINTS:
+            history.append(self._make_state(timestamp))
+        
+        # Определяем причину остановки
+        stop_code = self._stop_code
+        if stop_code is None:
+            stop_code = StopCode.NO_PROGRESS if self._has_available_locations() else StopCode.COMPLETED
+        stop_reason = self._get_stop_reason(stop_code)
+        
+        # Продолжить можно только симуляцию, остановленную пределом на границе суток
+        if stop_code not in (StopCode.MAX_DAYS, StopCode.MAX_WALL_SECONDS):
+            self._clock = None
+        
+        logger.info(f"Finished simulation.\nTime passed: {self._timestamp_to_human_readable(timestamp)}\nBalances:\n{self.balance}")
+        logger.info(f"Stop reason: {stop_reason}")
         
-        while any(location.available for location in self.locations.values()):
+        response = SimulationResponse(simulation_id, timestamp)
+        response.history = history
+        response.events = self._events
+        response.stop_reason = stop_reason
+        response.stop_code = stop_code
+        response.summary = SimulationSummary(
+            simulation_id=simulation_id,
+            timestamp=timestamp,
+            user_level=self.balance.user_level,
+            gold=self.balance.gold,
+            xp=self.balance.xp,
+            keys=self.balance.keys,
+            earn_per_sec=self.balance.earn_per_sec,
+            location_upgrades=self._location_upgrades,
+            level_up_times=dict(self._level_up_times),
+            stop_reason=stop_reason,
+            stop_code=stop_code
+        )
+        return response
+    
+    def _run_tick_loop(self, history: List[Dict],
+                       clock: Optional[Dict[str, Any]] = None) -> Generator[int, None, int]:
+        """
+        Эталонный движок: перебирает игровое время посекундно.
+        
+        Args:
+            history: История симуляции, в которую добавляются состояния
+            clock: Состояние цикла из контрольной точки (None - с начала)
+            
+        Yields:
+            int: Время очередного входа
+            
+        Returns:
+            int: Время остановки симуляции
+        """
+        timestamp = clock["day"] * 86400 if clock else 0
+        
+        while self._has_available_locations():
+            if timestamp % 86400 == 0:
+                self._start_day(timestamp // 86400, history)
+                self._stop_code = self._check_horizon(timestamp)
+                if self._stop_code is not None:
+                    break
+            
             try:
                 # Проверяем, является ли текущий timestamp проверкой
                 is_check_time = timestamp % 86400 in self.check_schedule
@@ -69,26 +323,569 @@ class Workflow:
                 
                 # Если это была проверка, создаем новое состояние после всех действий
                 if is_check_time:
-                    state = {
-                        "timestamp": timestamp,
-                        "balance": copy.deepcopy(self.__dict__["balance"].__dict__),
-                        "locations": {
-                            loc_id: {
-                                "current_level": loc.current_level,
-                                "available": loc.available,
-                                "cooldown_until": loc.cooldown_until
-                            } for loc_id, loc in self.locations.items()
-                        },
-                        "actions": []  # Новый список действий для следующего периода
-                    }
-                    history.append(state)
+                    self._record_state(timestamp, history)
                 
             except Exception as e:
                 logger.error(f"Error while doing actions on timestamp {timestamp}", exc_info=e)
             
+            if is_check_time:
+                yield timestamp
             timestamp += 1
         
-        # Определяем причину остановки
+        return timestamp
+    
+    def _run_event_loop(self, history: List[Dict],
+                        clock: Optional[Dict[str, Any]] = None) -> Generator[int, None, int]:
+        """
+        Событийный движок: переходит сразу от одного входа игрока к следующему.
+        
+        Очередь с приоритетом хранит ближайшее время каждой проверки из расписания.
+        Кулдауны, истекающие во время сессии, перематываются внутри `_do_actions`,
+        а истекшие между сессиями учитываются при следующем входе, поэтому
+        результат совпадает с посекундным движком.
+        
+        Args:
+            history: История симуляции, в которую добавляются состояния
+            clock: Состояние цикла из контрольной точки (None - с начала)
+            
+        Yields:
+            int: Время очередного входа
+            
+        Returns:
+            int: Время остановки симуляции
+        """
+        timestamp = 0
+        
+        if clock:
+            events = list(clock["logins"])
+        else:
+            # Посекундный движок реагирует только на значения в пределах суток
+            schedule = sorted({check for check in self.check_schedule if 0 <= check < 86400})
+            events = [(check_time, check_time) for check_time in schedule]
+        heapq.heapify(events)
+        day = -1
+
+        # Без записи действий и без тапания аналитический движок перескакивает
+        # сразу к входу со следующей покупкой
+        skip_to_purchase = (self._sequential_plan is not None and self.history_mode != HistoryMode.FULL
+                            and self.tapping_engine is None)
+
+        while events and self._has_available_locations():
+            event_time, check_time = heapq.heappop(events)
+
+            if skip_to_purchase:
+                event_time, check_time = self._skip_to_purchase(event_time, check_time, events, history)
+            elif self.fast_forward_idle:
+                event_time += self._fast_forward_idle(event_time, events, history)
+            
+            # Пределы и застой проверяются на границе суток, как в посекундном движке
+            if event_time // 86400 != day:
+                day = event_time // 86400
+                # Очередь входов с текущим входом - точка продолжения с этих суток
+                self._start_day(day, history, logins=[(event_time, check_time)] + events)
+                self._stop_code = self._check_horizon(day * 86400)
+                if self._stop_code is not None:
+                    # Посекундный движок останавливается на начале этих суток
+                    timestamp = day * 86400
+                    break
+            
+            timestamp = event_time
+            
+            try:
+                self._do_actions(timestamp, history)
+                self._record_state(timestamp, history)
+            except Exception as e:
+                logger.error(f"Error while doing actions on timestamp {timestamp}", exc_info=e)
+            
+            # Та же проверка повторится на следующий день
+            heapq.heappush(events, (event_time + 86400, check_time))
+            
+            yield timestamp
+            
+            # Посекундный движок останавливается на секунду позже последнего действия
+            timestamp += 1
+        
+        return timestamp
+    
+    def _run_behaviour_loop(self, history: List[Dict],
+                            clock: Optional[Dict[str, Any]] = None) -> Generator[int, None, int]:
+        """
+        Движок случайного поведения игрока.
+        
+        Каждый день игрок с заданной вероятностью пропускает игру, а время
+        каждого входа отклоняется от расписания по нормальному распределению.
+        Длительность сессии умножается на логнормальный множитель. Все величины
+        берутся из генератора с зерном `behaviour.seed`, поэтому запуск
+        воспроизводим. В конце каждого дня записываются `daily_metrics`.
+        
+        Args:
+            history: История симуляции, в которую добавляются состояния
+            clock: Состояние цикла из контрольной точки (None - с начала)
+            
+        Yields:
+            int: Время очередного входа
+            
+        Returns:
+            int: Время остановки симуляции
+        """
+        behaviour = self.behaviour
+        rng = np.random.default_rng(behaviour.seed)
+        schedule = np.array(sorted({check for check in self.check_schedule if 0 <= check < 86400}), dtype=np.int64)
+        
+        timestamp = 0
+        last_login = None
+        played = True  # Играл ли игрок в предыдущий день
+        day = 0
+        if clock:
+            day, last_login, played = clock["day"], clock["last_login"], clock["played"]
+            rng.bit_generator.state = clock["rng"]
+        
+        while len(schedule) and self._has_available_locations():
+            day_start = day * 86400
+            self._start_day(day, history, last_login=last_login, played=played, rng=rng.bit_generator.state)
+            
+            # В пропущенный день состояние не меняется, поэтому застой ищем только после игровых дней
+            self._stop_code = self._check_horizon(day_start, check_stall=played)
+            if self._stop_code is not None:
+                timestamp = day_start
+                break
+            
+            # Случайные величины тянутся каждый день, чтобы пропуск дня не сдвигал следующие
+            skip = rng.random() < behaviour.skip_day_probability
+            offsets = np.rint(rng.normal(0.0, behaviour.login_jitter, len(schedule))).astype(np.int64)
+            factors = rng.lognormal(0.0, behaviour.session_sigma, len(schedule))
+            played = day == 0 or not skip
+            
+            if played:
+                logins = np.sort(np.clip(day_start + schedule + offsets, day_start, day_start + 86399))
+                for t, factor in zip(logins.tolist(), factors.tolist()):
+                    if not self._has_available_locations():
+                        break
+                    if last_login is not None:
+                        t = max(t, last_login + 1)
+                    session_end = t + max(1, round(self.economy.game_duration * factor))
+                    
+                    try:
+                        self._login(t, last_login, session_end, history)
+                        self._record_state(t, history)
+                    except Exception as e:
+                        logger.error(f"Error while doing actions on timestamp {t}", exc_info=e)
+                    
+                    last_login = t
+                    timestamp = t + 1
+                    yield t
+            
+            completed = sum(1 for location in self.locations.values() if not location.available)
+            self.daily_metrics.append((self.balance.user_level, self.balance.gold, completed))
+            day += 1
+        
+        return timestamp
+    
+    def _compile(self) -> None:
+        """Компилирует таблицы из словарей, если они не были переданы заранее."""
+        if self.compiled is None:
+            self.compiled = CompiledSimulationConfig.from_tables(
+                {loc_id: (loc.levels, loc.min_character_level, loc.keys) for loc_id, loc in self.locations.items()},
+                self.cooldowns,
+                self.user_levels
+            )
+    
+    def _start_day(self, day: int, history: List[Dict], **loop_state) -> None:
+        """
+        Запоминает состояние цикла на начало суток, с которого можно продолжить симуляцию.
+        
+        Вызывается до проверки пределов, поэтому остановка по пределу оставляет
+        точку продолжения ровно на начале этих суток. Каждые
+        `checkpoint_interval_days` суток контрольная точка пишется в `checkpoint_path`,
+        а при `keep_day_snapshots` снимок состояния добавляется в `day_snapshots`.
+        
+        Args:
+            day: Номер суток
+            history: История симуляции
+            **loop_state: Состояние цикла, нужное для продолжения (очередь входов, генератор и т.п.)
+        """
+        self._clock = {"day": day, **loop_state}
+        if self.progress_callback is not None:
+            self.progress_callback(day)
+        if self.keep_day_snapshots:
+            snapshot = self._capture_state()
+            snapshot["history_size"] = len(history)
+            snapshot["events_size"] = len(self._events) if self._events is not None else 0
+            snapshot["changed_locations"] = set(self._changed_locations)
+            snapshot["states_since_keyframe"] = self._states_since_keyframe
+            self.day_snapshots.append(snapshot)
+        if (self.checkpoint_path and self.checkpoint_interval_days > 0
+                and day > 0 and day % self.checkpoint_interval_days == 0):
+            self.checkpoint(self.checkpoint_path)
+    
+    def _capture_state(self) -> Dict[str, Any]:
+        """
+        Собирает состояние симуляции на начало текущих суток.
+        
+        Returns:
+            Dict[str, Any]: Баланс, состояние локаций, положение цикла и накопленные итоги
+        """
+        loc_ids = list(self.locations.keys())
+        return {
+            "engine_version": ENGINE_VERSION,
+            "clock": self._clock,
+            "balance": asdict(self.balance),
+            "location_ids": np.array(loc_ids, dtype=np.int64),
+            "current_level": np.array([self.locations[i].current_level for i in loc_ids], dtype=np.int32),
+            "cooldown_until": np.array([self.locations[i].cooldown_until for i in loc_ids], dtype=np.int64),
+            "available": np.array([self.locations[i].available for i in loc_ids], dtype=bool),
+            "location_upgrades": self._location_upgrades,
+            "level_up_times": dict(self._level_up_times),
+            "day_state": self._day_state,
+            "daily_metrics": list(self.daily_metrics),
+            "tapping": (self.tapping_engine.current_energy, self.tapping_engine.user_level,
+                        self.tapping_engine.last_session_end)
+                       if self.tapping_engine else None
+        }
+    
+    def _apply_state(self, state: Dict[str, Any]) -> None:
+        """
+        Восстанавливает состояние, собранное `_capture_state`; следующий `simulate()` продолжит с него.
+        
+        Args:
+            state: Состояние симуляции
+            
+        Raises:
+            ValueError: Если состояние не подходит к локациям
+        """
+        loc_ids = state["location_ids"].tolist()
+        if set(loc_ids) != set(self.locations.keys()):
+            raise ValueError("Checkpoint locations do not match the configured locations")
+        if state["engine_version"] != ENGINE_VERSION:
+            logger.warning(f"Checkpoint was made by engine version {state['engine_version']}, "
+                           f"current version is {ENGINE_VERSION}")
+        
+        for name, value in state["balance"].items():
+            setattr(self.balance, name, value)
+        for loc_id, level, cooldown_until, available in zip(
+                loc_ids, state["current_level"].tolist(), state["cooldown_until"].tolist(),
+                state["available"].tolist()):
+            location = self.locations[loc_id]
+            location.current_level = level
+            location.cooldown_until = cooldown_until
+            location.available = available
+        
+        self._reset_tapping()
+        if state["tapping"] is not None and self.tapping_engine is not None:
+            (self.tapping_engine.current_energy, self.tapping_engine.user_level,
+             self.tapping_engine.last_session_end) = state["tapping"]
+        
+        self._clock = state["clock"]
+        self._location_upgrades = state["location_upgrades"]
+        self._level_up_times = dict(state["level_up_times"])
+        self._day_state = state["day_state"]
+        self.daily_metrics = list(state["daily_metrics"])
+        self._resuming = True
+    
+    def checkpoint(self, path: Optional[str] = None) -> bytes:
+        """
+        Сохраняет состояние симуляции для продолжения через `restore`.
+        
+        Состояние берется на начало суток, на которых симуляция остановилась
+        по пределу дней или реального времени (или на начало текущих суток
+        при периодическом сохранении). В него входят баланс, уровни и кулдауны
+        локаций, энергия тапания, состояние генератора случайного поведения,
+        очередь входов и накопленные итоги. Данные сжимаются zlib.
+        
+        Args:
+            path: Файл для записи (None - только вернуть данные)
+            
+        Returns:
+            bytes: Содержимое контрольной точки
+            
+        Raises:
+            RuntimeError: Если симуляцию нельзя продолжить (она не запускалась или уже завершилась)
+        """
+        if self._clock is None:
+            raise RuntimeError("Simulation can only be checkpointed after it stops on a days or wall time limit")
+        
+        data = (CHECKPOINT_MAGIC + CHECKPOINT_VERSION.to_bytes(2, "little")
+                + zlib.compress(pickle.dumps(self._capture_state(), protocol=pickle.HIGHEST_PROTOCOL)))
+        
+        if path:
+            # Запись во временный файл и переименование: сбой во время записи не портит прошлую точку
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+            logger.info(f"Checkpoint for day {self._clock['day'] + 1} written to {path}")
+        return data
+    
+    def restore(self, source: Union[str, bytes]) -> None:
+        """
+        Восстанавливает состояние из контрольной точки; следующий `simulate()` продолжит с нее.
+        
+        Локации, расписание и остальные параметры должны быть уже настроены
+        (например, через `Simulator.setup_workflow`). Пределы симуляции можно
+        изменить перед продолжением, например увеличить `max_days`.
+        
+        Args:
+            source: Путь к файлу или содержимое контрольной точки
+            
+        Raises:
+            ValueError: Если данные не являются контрольной точкой или не подходят к локациям
+        """
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                source = f.read()
+        
+        header = len(CHECKPOINT_MAGIC)
+        if source[:header] != CHECKPOINT_MAGIC:
+            raise ValueError("Not a simulation checkpoint")
+        version = int.from_bytes(source[header:header + 2], "little")
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {version}")
+        self._apply_state(pickle.loads(zlib.decompress(source[header + 2:])))
+    
+    def resimulate(self, previous: SimulationResponse, previous_compiled: CompiledSimulationConfig,
+                   simulation_id: str = None) -> SimulationResponse:
+        """
+        Повторяет симуляцию после изменения таблиц, пересчитывая только дни после первого использования изменений.
+        
+        Предыдущий запуск должен идти с `keep_day_snapshots` и с теми же
+        параметрами, кроме таблиц локаций, кулдаунов и уровней персонажа
+        (они уже настроены в workflow). Симуляция продолжается со снимка
+        последних суток, до начала которых ни одно измененное значение
+        не использовалось: до этого момента обе конфигурации дают одно и то же
+        состояние. История до снимка берется из предыдущего результата.
+        
+        Args:
+            previous: Результат предыдущего запуска этого workflow
+            previous_compiled: Таблицы конфигурации предыдущего запуска
+            simulation_id: ID симуляции
+            
+        Returns:
+            SimulationResponse: Результат, совпадающий с запуском `simulate()` с начала
+        """
+        self._compile()
+        changes = self.compiled.diff(previous_compiled)
+        index = self._last_unaffected_snapshot(changes) if changes is not None else -1
+        if index < 0:
+            return self.simulate(simulation_id)
+        
+        snapshot = self.day_snapshots[index]
+        logger.info(f"Reusing {snapshot['clock']['day']} simulated days, resimulating from day {snapshot['clock']['day'] + 1}")
+        self.day_snapshots = self.day_snapshots[:index]
+        self._apply_state(snapshot)
+        
+        history = [dict(state) for state in previous.history[:snapshot["history_size"]]]
+        events = None
+        if self.history_mode == HistoryMode.FULL:
+            events, groups = previous.events.copy_prefix(
+                snapshot["events_size"], [state["actions"] for state in history]
+            )
+            for state, group in zip(history, groups):
+                state["actions"] = group
+        self._prefix = {
+            "history": history,
+            "events": events,
+            "changed_locations": set(snapshot["changed_locations"]),
+            "states_since_keyframe": snapshot["states_since_keyframe"]
+        }
+        return self.simulate(simulation_id)
+    
+    def _last_unaffected_snapshot(self, changes: TableChanges) -> int:
+        """
+        Находит последний снимок, до которого измененные значения таблиц не использовались.
+        
+        Уровни локаций и персонажа только растут, а локации только закрываются,
+        поэтому признак "изменение уже могло использоваться" монотонен по снимкам
+        и снимок находится двоичным поиском.
+        
+        Args:
+            changes: Различия таблиц с предыдущим запуском
+            
+        Returns:
+            int: Номер снимка в `day_snapshots` или -1, если подходящего снимка нет
+        """
+        if not self.day_snapshots:
+            return -1
+        if changes.empty:
+            return len(self.day_snapshots) - 1
+        
+        tables = self.compiled
+        loc_ids = self.day_snapshots[0]["location_ids"].tolist()
+        rows = np.array([tables.location_rows[loc_id] for loc_id in loc_ids], dtype=np.int64)
+        changed_level = changes.location_level[rows]
+        unlock_level = changes.unlock_level[rows]
+        changed = changed_level > 0
+        # Последовательный алгоритм читает только первую не улучшенную до максимума локацию
+        position = np.argsort(np.argsort(loc_ids, kind="stable"), kind="stable")
+        
+        def affected(snapshot: Dict[str, Any]) -> bool:
+            user_level = snapshot["balance"]["user_level"]
+            if changes.user_level and user_level >= changes.user_level - 1:
+                return True
+            used = changed & (snapshot["current_level"] >= changed_level - 1) & (user_level >= unlock_level)
+            if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+                open_positions = position[snapshot["available"]]
+                frontier = open_positions.min() if len(open_positions) else len(loc_ids)
+                used &= position <= frontier
+            return bool(used.any())
+        
+        low, high = 0, len(self.day_snapshots)
+        while low < high:
+            middle = (low + high) // 2
+            if affected(self.day_snapshots[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low - 1
+    
+    def _has_available_locations(self) -> bool:
+        """
+        Проверяет, остались ли локации, не улучшенные до максимума.
+        
+        Returns:
+            bool: True, если симуляцию нужно продолжать
+        """
+        if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+            return self._frontier_location() is not None
+        return self._location_index.has_available()
+    
+    def _check_horizon(self, day_start: int, check_stall: bool = True) -> Optional[StopCode]:
+        """
+        Проверяет пределы симуляции и застой в начале игровых суток.
+        
+        Args:
+            day_start: Время начала суток
+            check_stall: Проверять ли застой
+            
+        Returns:
+            Optional[StopCode]: Причина остановки или None, если симуляцию нужно продолжать
+        """
+        if self.max_days is not None and day_start >= self.max_days * 86400:
+            return StopCode.MAX_DAYS
+        if self.max_wall_seconds is not None and time.perf_counter() - self._started_at >= self.max_wall_seconds:
+            return StopCode.MAX_WALL_SECONDS
+        if check_stall and self.stop_on_stall and self._is_stalled(day_start):
+            return StopCode.NO_PROGRESS
+        return None
+    
+    def _is_stalled(self, day_start: int) -> bool:
+        """
+        Определяет, повторяет ли прошедшие сутки состояние предыдущих.
+        
+        Если за сутки не изменились уровни локаций, уровень персонажа, опыт и ключи,
+        а кулдаунов не осталось, следующие сутки пройдут так же: золото либо тоже
+        не изменилось, либо тратить его не на что, пока не вырастет уровень персонажа.
+        
+        Args:
+            day_start: Время начала суток
+            
+        Returns:
+            bool: True, если прогресс больше невозможен
+        """
+        state = (
+            self.balance.user_level,
+            self.balance.xp,
+            self.balance.keys,
+            tuple(location.current_level for location in self.locations.values())
+        )
+        previous_state, previous_gold = self._day_state or (None, None)
+        self._day_state = (state, self.balance.gold)
+        
+        if state != previous_state:
+            return False
+        
+        # Пока идет кулдаун, улучшение еще может случиться
+        if any(location.cooldown_until > day_start for location in self.locations.values() if location.available):
+            return False
+        
+        return self.balance.gold == previous_gold or self._cheapest_upgrade_cost() is None
+    
+    def _make_state(self, timestamp: int) -> Dict:
+        """
+        Создает снимок текущего состояния для истории симуляции.
+        
+        Каждое `keyframe_interval`-е состояние (начиная с первого) хранит все
+        локации, остальные - только изменившиеся с предыдущего состояния.
+        Полную таблицу локаций для любого состояния восстанавливает
+        `workflow.simulation_response.rebuild_locations`.
+        
+        Args:
+            timestamp: Текущее игровое время
+            
+        Returns:
+            Dict: Состояние с балансом, локациями и пустым списком действий
+            (группой журнала действий в режиме полной истории)
+        """
+        keyframe = self._states_since_keyframe == 0
+        if keyframe:
+            loc_ids = self.locations.keys()
+        else:
+            loc_ids = sorted(self._changed_locations)
+        self._changed_locations.clear()
+        self._states_since_keyframe = (self._states_since_keyframe + 1) % max(self.keyframe_interval, 1)
+        
+        return {
+            "timestamp": timestamp,
+            "balance": copy.deepcopy(self.__dict__["balance"].__dict__),
+            "keyframe": keyframe,  # Хранит ли состояние все локации
+            "locations": {
+                loc_id: {
+                    "current_level": self.locations[loc_id].current_level,
+                    "available": self.locations[loc_id].available,
+                    "cooldown_until": self.locations[loc_id].cooldown_until
+                } for loc_id in loc_ids
+            },
+            "actions": self._events.new_group() if self._events is not None else []  # Новый список действий для следующего периода
+        }
+    
+    def _record_state(self, timestamp: int, history: List[Dict]) -> None:
+        """
+        Добавляет в историю состояние после входа в соответствии с режимом истории.
+        
+        В режиме контрольных точек сохраняется только первый вход каждого дня.
+        
+        Args:
+            timestamp: Время входа
+            history: История симуляции
+        """
+        if self.history_mode == HistoryMode.FULL:
+            history.append(self._make_state(timestamp))
+        elif self.history_mode == HistoryMode.CHECKPOINTS:
+            if self._last_recorded_day != timestamp // 86400:
+                self._last_recorded_day = timestamp // 86400
+                history.append(self._make_state(timestamp))
+    
+    def _get_stop_reason(self, stop_code: StopCode = StopCode.COMPLETED) -> str:
+        """
+        Определяет причину остановки симуляции.
+        
+        Args:
+            stop_code: Код причины остановки
+            
+        Returns:
+            str: Описание причины остановки
+        """
+        if stop_code == StopCode.MAX_DAYS:
+            return f"Reached the limit of {self.max_days} days. Simulation stopped"
+        if stop_code == StopCode.MAX_WALL_SECONDS:
+            return f"Reached the limit of {self.max_wall_seconds} sec of wall time. Simulation stopped"
+        if stop_code == StopCode.NO_PROGRESS:
+            # Прогресс остановил недостаток золота на самое дешевое доступное улучшение
+            cheapest = self._cheapest_upgrade()
+            if cheapest is not None:
+                loc_id, cost = cheapest
+                return (f"No progress: location {loc_id} upgrade costs {cost:,.0f} gold, "
+                        f"current gold {self.balance.gold:,.0f}, "
+                        f"income {self.balance.earn_per_sec * 86400:,.0f} gold/day. "
+                        f"Simulation stopped")
+            # Иначе все доступные локации закрыты уровнем персонажа
+            for loc_id in sorted(self.locations.keys()):
+                location = self.locations[loc_id]
+                if location.available and self.balance.user_level < location.min_character_level:
+                    return (f"No progress: current level {self.balance.user_level}, "
+                            f"location {loc_id} requires level {location.min_character_level}. "
+                            f"Simulation stopped")
+            return "No progress: the state repeats every day. Simulation stopped"
+
         max_location_id = max(self.locations.keys())
         current_location = None
         next_location = None
@@ -103,22 +900,14 @@ class Workflow:
         
         if not current_location:
             # Все локации улучшены до максимума
-            stop_reason = f"Location {max_location_id} - received, reached the limit of locations"
+            return f"Location {max_location_id} - received, reached the limit of locations"
         elif next_location:
             # Есть следующая локация, но не хватает уровня
-            stop_reason = (f"Location {current_location[0]}, Current level {self.balance.user_level}, "
-                         f"for opening location {next_location[0]} requires level {next_location[1].min_character_level}. "
-                         f"Simulation stopped")
+            return (f"Location {current_location[0]}, Current level {self.balance.user_level}, "
+                    f"for opening location {next_location[0]} requires level {next_location[1].min_character_level}. "
+                    f"Simulation stopped")
         else:
-            stop_reason = "Simulation stopped"
-        
-        logger.info(f"Finished simulation.\nTime passed: {self._timestamp_to_human_readable(timestamp)}\nBalances:\n{self.balance}")
-        logger.info(f"Stop reason: {stop_reason}")
-        
-        response = SimulationResponse(simulation_id, timestamp)
-        response.history = history
-        response.stop_reason = stop_reason
-        return response
+            return "Simulation stopped"
     
     @staticmethod
     def _format_game_time(timestamp: int) -> str:
@@ -141,302 +930,834 @@ class Workflow:
     def _do_actions(self, t: int, history: List[Dict] = None) -> None:
         # Check the game on specified timestamps (5 times per day with 8-hour sleep interval)
         if t % 86400 in self.check_schedule:
-            game_time = self._format_game_time(t)
-            logger.info(f"=== {game_time} === Player logged in ===")
-            logger.info(f"{game_time}: Current earnings: {self.balance.earn_per_sec:.2f} gold/sec")
+            current_day_start = t - (t % 86400)  # Начало текущего дня
             
-            # Получаем текущее состояние из истории
-            current_history = history[-1] if history else None
+            # Проверяем, является ли это первой сессией в текущем дне
+            is_first_session_of_day = t == min(self.check_schedule) + current_day_start
             
-            # Определяем время с последней проверки
-            last_check = 0
-            current_day_start = t - (t % 86400)  # Начало текущего дня
+            # При первом входе в игру пассивный доход не начисляется
+            is_first_login = is_first_session_of_day and t < 86400
+            last_check = None if is_first_login else self._previous_check(t)
             
-            # Находим последнюю проверку в текущем дне
-            for check_time in reversed(sorted(self.check_schedule)):
-                check_timestamp = current_day_start + check_time
-                if check_timestamp < t:
-                    last_check = check_timestamp
-                    break
+            self._login(t, last_check, t + self.economy.game_duration, history)
+    
+    def _login(self, t: int, last_check: Optional[int], session_end: int,
+               history: List[Dict] = None) -> None:
+        """
+        Проводит вход игрока: начисляет доход и проводит игровую сессию.
+        
+        Args:
+            t: Время входа
+            last_check: Время предыдущего входа (None для первого входа в игру)
+            session_end: Время окончания сессии
+            history: История симуляции
+        """
+        game_time = self._format_game_time(t)
+        logger.info(f"=== {game_time} === Player logged in ===")
+        logger.info(f"{game_time}: Current earnings: {self.balance.earn_per_sec:.2f} gold/sec")
+        
+        # Получаем текущее состояние из истории
+        current_history = history[-1] if history and self.history_mode == HistoryMode.FULL else None
+        
+        # Если тапание включено, игрок тапает в начале каждой сессии, пока хватает энергии
+        if self.tapping_engine is not None:
+            self._tap(t, session_end, current_history)
+        
+        # Начисляем пассивный доход за период, но только если это не первый вход в игру
+        time_passed = t - last_check if last_check is not None else 0
+        
+        if time_passed > 0:
+            passive_income = self.balance.earn_per_sec * time_passed
+            old_balance = self.balance.gold
+            self.balance.gold += passive_income
             
-            if last_check == 0:  # Если это первая проверка дня
-                if t < 86400:  # Если это первый день симуляции
-                    last_check = 0  # Начинаем с нуля
-                else:
-                    # Берем последнюю проверку предыдущего дня
-                    prev_day_start = current_day_start - 86400
-                    last_check = prev_day_start + max(self.check_schedule)
+            logger.info(
+                f"{game_time}: Earned income for {time_passed} sec:\n"
+                f"  - Old balance: {old_balance:.2f} gold\n"
+                f"  - Income: {passive_income:.2f} gold\n"
+                f"  - New balance: {self.balance.gold:.2f} gold"
+            )
             
-            # Проверяем, является ли это первой сессией в текущем дне
-            is_first_session_of_day = t == min(self.check_schedule) + current_day_start
+            # Записываем действие начисления дохода
+            if current_history is not None:
+                self._events.append(
+                    PASSIVE_INCOME, t,
+                    old_balance, passive_income, self.balance.gold,
+                    self.balance.xp, 0, self.balance.xp,
+                    self.balance.keys, 0, self.balance.keys,
+                    duration=time_passed
+                )
+        elif last_check is None:
+            logger.info(f"{game_time}: First login, passive income not earned")
+        
+        game_time = self._format_game_time(t)
+        logger.info(f"{game_time}: Session duration: {session_end - t} sec (until {self._format_game_time(session_end)})")
+        
+        # Step 1. Try to upgrade locations while session is active
+        if self._sequential_plan is not None:
+            t = self._run_analytic_session(t, session_end, current_history)
+        elif self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+            t = self._run_sequential_session(t, session_end, current_history)
+        else:
+            t = self._run_indexed_session(t, session_end, current_history)
+        
+        game_time = self._format_game_time(t)
+        remaining_time = session_end - t
+        if remaining_time > 0:
+            logger.info(f"{game_time}: Session ended earlier (remaining {remaining_time} sec)")
+        logger.info(f"=== {game_time} === Player finished the session ===\n")
+    
+    def _previous_check(self, t: int) -> int:
+        """
+        Находит время предыдущей проверки, от которой начисляется пассивный доход.
+        
+        Args:
+            t: Время текущей проверки
             
-            # Если это первая сессия дня и тапание включено, добавляем доход от тапания
-            if is_first_session_of_day and self.tapping_config and self.tapping_config.is_tapping:
-                # Важно: дополнительная проверка, что тапание действительно включено
-                if not hasattr(self.tapping_config, 'is_tapping') or self.tapping_config.is_tapping is not True:
-                    logger.info(f"{game_time}: Tapping is disabled, no tapping income added")
-                    pass
-                else:
-                    day_number = t // 86400
-                    
-                    # Проверяем, что все параметры тапания существуют
-                    max_energy = self.tapping_config.max_energy_capacity
-                    tap_coef = self.tapping_config.tap_coef
-                    
-                    if max_energy is None:
-                        max_energy = 700
-                    if tap_coef is None:
-                        tap_coef = 1.0
-                        
-                    # Примерное количество золота, которое можно получить при полном использовании энергии
-                    # Используем новую формулу: энергия * коэффициент тапа * (уровень персонажа * tap_coef)
-                    gold_per_tap = self.balance.user_level * tap_coef
-                    tapping_gold = max_energy * 0.7 * gold_per_tap
-                    
-                    old_balance = self.balance.gold
-                    self.balance.gold += tapping_gold
-                    
-                    logger.info(
-                        f"{game_time}: Added tapping income for day {day_number + 1}:\n"
-                        f"  - Old balance: {old_balance:.2f} gold\n"
-                        f"  - Tapping income: {tapping_gold:.2f} gold (level {self.balance.user_level} * tap_coef {tap_coef} = {gold_per_tap:.2f} gold per tap)\n"
-                        f"  - New balance: {self.balance.gold:.2f} gold"
-                    )
-                    
-                    # Записываем действие получения дохода от тапания
-                    if current_history is not None:
-                        action = {
-                            "type": "tapping_income",
-                            "timestamp": t,
-                            "description": f"Tapping income for day {day_number + 1}",
-                            "gold_before": old_balance,
-                            "gold_change": tapping_gold,
-                            "gold_after": self.balance.gold,
-                            "xp_before": self.balance.xp,
-                            "xp_change": 0,
-                            "xp_after": self.balance.xp,
-                            "keys_before": self.balance.keys,
-                            "keys_change": 0,
-                            "keys_after": self.balance.keys
-                        }
-                        current_history["actions"].append(action)
-            
-            # Начисляем пассивный доход за период, но только если это не первый вход в игру
-            time_passed = t - last_check
-            is_first_login = t == min(self.check_schedule) + current_day_start and t < 86400
-            
-            if time_passed > 0 and not is_first_login:  # Не начисляем доход при первом входе
-                passive_income = self.balance.earn_per_sec * time_passed
-                old_balance = self.balance.gold
-                self.balance.gold += passive_income
-                
-                logger.info(
-                    f"{game_time}: Earned income for {time_passed} sec:\n"
-                    f"  - Old balance: {old_balance:.2f} gold\n"
-                    f"  - Income: {passive_income:.2f} gold\n"
-                    f"  - New balance: {self.balance.gold:.2f} gold"
+        Returns:
+            int: Время предыдущей проверки (0 для первой проверки симуляции)
+        """
+        last_check = 0
+        current_day_start = t - (t % 86400)  # Начало текущего дня
+        
+        # Находим последнюю проверку в текущем дне
+        for check_time in reversed(sorted(self.check_schedule)):
+            check_timestamp = current_day_start + check_time
+            if check_timestamp < t:
+                last_check = check_timestamp
+                break
+        
+        if last_check == 0:  # Если это первая проверка дня
+            if t < 86400:  # Если это первый день симуляции
+                last_check = 0  # Начинаем с нуля
+            else:
+                # Берем последнюю проверку предыдущего дня
+                prev_day_start = current_day_start - 86400
+                last_check = prev_day_start + max(self.check_schedule)
+        
+        return last_check
+    
+    def _reset_tapping(self) -> None:
+        """Создает движок тапания с полным запасом энергии, если тапание включено."""
+        if self.tapping_config and self.tapping_config.is_tapping is True:
+            self.tapping_engine = TappingEngine(self.tapping_config)
+        else:
+            self.tapping_engine = None
+    
+    def _tap(self, t: int, session_end: int, current_history: Dict = None) -> None:
+        """
+        Проводит сессию тапания в начале входа и начисляет золото за тапы.
+        
+        Энергия восстанавливается с конца предыдущей сессии, золото за тап
+        зависит от уровня персонажа на момент входа. Итоги сессии (тапы,
+        энергия в начале и золото) записываются в журнал действий.
+        
+        Args:
+            t: Время входа
+            session_end: Время окончания сессии
+            current_history: Текущее состояние истории (None - действия не записываются)
+        """
+        session = self.tapping_engine.run_session(t, session_end - t, self.balance.user_level)
+        
+        old_balance = self.balance.gold
+        self.balance.gold += session.gold_earned
+        
+        logger.info(
+            f"{self._format_game_time(t)}: Tapping session:\n"
+            f"  - Taps: {session.taps_count:.0f} (energy {session.start_energy:.1f} -> {self.tapping_engine.current_energy:.1f})\n"
+            f"  - Tapping income: {session.gold_earned:.2f} gold (level {self.balance.user_level} * tap_coef {self.tapping_config.tap_coef})\n"
+            f"  - New balance: {self.balance.gold:.2f} gold"
+        )
+        
+        if current_history is not None:
+            self._events.append(
+                TAPPING_INCOME, t,
+                old_balance, session.gold_earned, self.balance.gold,
+                self.balance.xp, 0, self.balance.xp,
+                self.balance.keys, 0, self.balance.keys,
+                duration=session.duration, taps=session.taps_count, energy=session.start_energy
+            )
+    
+    def _idle_tapping_cycle(self, cycle: List[int]) -> Optional[Tuple[float, float, TappingEngine]]:
+        """
+        Проводит сессии тапания одних суток простоя на копии движка тапания.
+        
+        Сутки повторяются, только если энергия к первому входу следующих суток
+        та же, что к первому входу этих: тогда тапы и золото каждых пропущенных
+        суток одинаковы.
+        
+        Args:
+            cycle: Входы одних суток по порядку
+            
+        Returns:
+            Optional[Tuple[float, float, TappingEngine]]: Золото и тапы за сутки и движок
+            после них или None, если энергия еще не вышла на суточный цикл
+        """
+        engine = copy.copy(self.tapping_engine)
+        start_energy = engine.energy_at(cycle[0])
+        gold = 0.0
+        taps = 0.0
+        for login in cycle:
+            session = engine.run_session(login, self.economy.game_duration, self.balance.user_level)
+            gold += session.gold_earned
+            taps += session.taps_count
+        if engine.energy_at(cycle[0] + 86400) != start_energy:
+            return None
+        return gold, taps, engine
+    
+    def _cheapest_upgrade_cost(self) -> Optional[int]:
+        """
+        Находит минимальную стоимость улучшения, которое алгоритм может выбрать.
+        
+        Returns:
+            Optional[int]: Стоимость или None, если без повышения уровня персонажа
+            улучшать нечего
+        """
+        cheapest = self._cheapest_upgrade()
+        return None if cheapest is None else cheapest[1]
+    
+    def _cheapest_upgrade(self) -> Optional[Tuple[int, int]]:
+        """
+        Находит самое дешевое улучшение, которое алгоритм может выбрать без повышения уровня персонажа.
+        
+        Для последовательного алгоритма это граница - первая не улучшенная до
+        максимума локация, для остальных - все доступные локации (при равной
+        стоимости берется меньший ID).
+        
+        Returns:
+            Optional[Tuple[int, int]]: ID локации и стоимость улучшения или None,
+            если без повышения уровня персонажа улучшать нечего
+        """
+        tables = self.compiled
+        if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
+            candidates = [self._frontier_location()]
+        else:
+            candidates = sorted(loc_id for loc_id, location in self.locations.items() if location.available)
+        
+        cheapest = None
+        for loc_id in candidates:
+            if loc_id is None:
+                continue
+            row = tables.location_rows[loc_id]
+            if self.balance.user_level < tables.unlock_level.item(row):
+                continue
+            cost = tables.cost.item(row, self.locations[loc_id].current_level + 1)
+            if cheapest is None or cost < cheapest[1]:
+                cheapest = (loc_id, cost)
+        return cheapest
+    
+    def _fast_forward_idle(self, event_time: int, events: List, history: List[Dict]) -> int:
+        """
+        Пропускает целые сутки входов, в которые игрок ничего не может купить.
+        
+        Без покупок уровень персонажа не растет, поэтому за каждые сутки входов
+        (одна проверка из расписания и все остальные после нее) золото растет
+        на одну и ту же величину: пассивный доход за 86400 секунд и доход от
+        тапания за сессии суток, если энергия к началу суток повторяется.
+        Число суток, после которых самое дешевое улучшение все еще недоступно,
+        находится делением. Пропущенные входы записываются в историю одним
+        состоянием с суммарным доходом.
+        
+        Args:
+            event_time: Время текущего входа (уже извлечен из очереди)
+            events: Очередь остальных входов, сдвигается на пропущенные сутки
+            history: История симуляции
+            
+        Returns:
+            int: На сколько секунд сдвинуто время текущего входа
+        """
+        # Первые сутки пропускать нельзя: первый вход не приносит дохода
+        if event_time < 86400:
+            return 0
+        
+        cheapest = self._cheapest_upgrade_cost()
+        if cheapest is None:
+            return 0
+        
+        # Входы одних суток, начиная с текущего
+        cycle = [event_time] + sorted(login for login, _ in events)
+        passive_per_cycle = 0.0
+        for login in cycle:
+            passive_per_cycle += self.balance.earn_per_sec * (login - self._previous_check(login))
+        
+        tapping_per_cycle = 0.0
+        if self.tapping_engine is not None:
+            tapping_cycle = self._idle_tapping_cycle(cycle)
+            if tapping_cycle is None:
+                return 0
+            tapping_per_cycle, taps_per_cycle, tapping_after_cycle = tapping_cycle
+        
+        gold_per_cycle = passive_per_cycle + tapping_per_cycle
+        if gold_per_cycle <= 0:
+            return 0
+        
+        gold = self.balance.gold
+        cycles = int((cheapest - gold) // gold_per_cycle)
+        while cycles > 0 and gold + cycles * gold_per_cycle >= cheapest:
+            cycles -= 1
+        
+        # Пропущенные входы не должны выходить за предел игровых дней
+        if self.max_days is not None:
+            cycles = min(cycles, (self.max_days * 86400 - cycle[-1] - 1) // 86400 + 1)
+        if cycles < 1:
+            return 0
+        
+        shift = cycles * 86400
+        last_login = cycle[-1] + shift - 86400
+        current_history = history[-1] if history and self.history_mode == HistoryMode.FULL else None
+        
+        old_balance = self.balance.gold
+        self.balance.gold += cycles * passive_per_cycle
+        if current_history is not None:
+            self._events.append(
+                PASSIVE_INCOME, last_login,
+                old_balance, self.balance.gold - old_balance, self.balance.gold,
+                self.balance.xp, 0, self.balance.xp,
+                self.balance.keys, 0, self.balance.keys,
+                duration=shift, span_start=event_time, idle_logins=cycles * len(cycle)
+            )
+        
+        if self.tapping_engine is not None:
+            # Энергия после пропущенных суток та же, что после первых из них
+            self.tapping_engine.current_energy = tapping_after_cycle.current_energy
+            self.tapping_engine.last_session_end = tapping_after_cycle.last_session_end + shift - 86400
+            old_balance = self.balance.gold
+            self.balance.gold += cycles * tapping_per_cycle
+            if current_history is not None:
+                self._events.append(
+                    TAPPING_INCOME, last_login,
+                    old_balance, self.balance.gold - old_balance, self.balance.gold,
+                    self.balance.xp, 0, self.balance.xp,
+                    self.balance.keys, 0, self.balance.keys,
+                    duration=shift, span_start=event_time, idle_logins=cycles * len(cycle),
+                    taps=cycles * taps_per_cycle
                 )
+        
+        self._record_state(last_login, history)
+        
+        # Остальные входы сдвигаются на те же сутки
+        events[:] = [(login + shift, check_time) for login, check_time in events]
+        heapq.heapify(events)
+        
+        logger.info(
+            f"{self._format_game_time(event_time)}: Idle for {cycles} days, "
+            f"fast-forwarded to {self._format_game_time(event_time + shift)}"
+        )
+        return shift
+
+    def _skip_to_purchase(self, event_time: int, check_time: int, events: List,
+                          history: List[Dict]) -> Tuple[int, int]:
+        """
+        Пропускает входы, на которых аналитический движок ничего не купит.
+
+        Без записи действий и без тапания между покупками меняется только золото:
+        на каждом входе к нему прибавляется пассивный доход с предыдущего входа,
+        и эти прибавки повторяются по суткам. Граница плана покупается на первом
+        входе, к концу сессии которого истекает ее кулдаун и на котором золото
+        после дохода не меньше ее стоимости. Времена входов и золото после
+        каждого из них (последовательным накоплением, как при пошаговом
+        начислении) строятся массивами, а этот вход находится через searchsorted.
+        Доход пропущенных входов начисляется разом; в режиме контрольных точек
+        записываются состояния на первый вход каждых пропущенных суток.
+
+        Пропуск не заходит за предел игровых дней и за сутки периодической
+        контрольной точки, чтобы они обработались как обычно.
+
+        Args:
+            event_time: Время текущего входа (уже извлечен из очереди)
+            check_time: Проверка расписания текущего входа
+            events: Очередь остальных входов, сдвигается к найденному входу
+            history: История симуляции
+
+        Returns:
+            Tuple[int, int]: Время и проверка расписания входа, с которого продолжается цикл
+        """
+        # Первые сутки пропускать нельзя: первый вход не приносит дохода
+        if event_time < 86400:
+            return event_time, check_time
+
+        idx = self._frontier_location()
+        plan = self._sequential_plan
+        location = self.locations[idx]
+        j = plan.location_start[idx] + location.current_level
+        # Закрытую уровнем персонажа границу не купить без покупок - это застой
+        if self.balance.user_level < plan.unlock_level[j]:
+            return event_time, check_time
+
+        cost = plan.cost[j]
+        # Вход t подходит по кулдауну, если кулдаун истекает до конца его сессии
+        ready_after = location.cooldown_until - self.economy.game_duration
+        gold = self.balance.gold
+        if (event_time > ready_after
+                and gold + self.balance.earn_per_sec * (event_time - self._previous_check(event_time)) >= cost):
+            return event_time, check_time
+
+        # Входы одних суток, начиная с текущего, и доход каждого из них
+        cycle = sorted([(event_time, check_time)] + events)
+        size = len(cycle)
+        logins = np.array([login for login, _ in cycle], dtype=np.int64)
+        income = np.array([self.balance.earn_per_sec * (login - self._previous_check(login))
+                           for login, _ in cycle], dtype=np.float64)
+        if income.min() < 0 or (gold < cost and income.max() <= 0):
+            return event_time, check_time
+
+        limit = None
+        if self.max_days is not None:
+            limit = self.max_days * 86400
+        if self.checkpoint_path and self.checkpoint_interval_days > 0:
+            interval = self.checkpoint_interval_days
+            checkpoint_day = -(-(event_time // 86400) // interval) * interval
+            limit = checkpoint_day * 86400 if limit is None else min(limit, checkpoint_day * 86400)
+
+        # Входы перебираются блоками, блок растет, пока нужный вход не найден
+        start = 0
+        block = size * 8
+        while True:
+            index = np.arange(start, start + block)
+            times = logins[index % size] + index // size * 86400
+            balance = np.add.accumulate(np.concatenate(([gold], income[index % size])))[1:]
+
+            found = max(int(np.searchsorted(balance, cost, side="left")),
+                        int(np.searchsorted(times, ready_after, side="right")))
+            if limit is not None:
+                found = min(found, int(np.searchsorted(times, limit, side="left")))
+            # Доход меньше точности золота: дальше баланс не растет, застой найдет цикл
+            stalled = found == block and balance[-1] == gold
+            skipped = found if found < block or stalled else block
+
+            if self.history_mode == HistoryMode.CHECKPOINTS and skipped:
+                days = times[:skipped] // 86400
+                for i in np.flatnonzero(np.concatenate(([True], days[1:] != days[:-1]))).tolist():
+                    self.balance.gold = balance.item(i)
+                    self._record_state(times.item(i), history)
+            if skipped:
+                gold = balance.item(skipped - 1)
+
+            start += skipped
+            if skipped < block or stalled:
+                break
+            block = min(block * 2, 1 << 16)
+
+        if start == 0:
+            return event_time, check_time
+        self.balance.gold = gold
+
+        # Очередь сдвигается так, чтобы в ней остались входы после найденного
+        position, days = start % size, start // size
+        events[:] = [(login + -((i - start) // size) * 86400, check) for i, (login, check) in enumerate(cycle)
+                     if i != position]
+        heapq.heapify(events)
+        next_time = cycle[position][0] + days * 86400
+
+        logger.info(
+            f"{self._format_game_time(event_time)}: Skipped {start} logins without purchases, "
+            f"next login {self._format_game_time(next_time)}"
+        )
+        return next_time, cycle[position][1]
+
+    def _run_sequential_session(self, t: int, session_end: int, current_history: Dict = None) -> int:
+        """
+        Проводит игровую сессию для последовательного алгоритма.
+        
+        Последовательный алгоритм всегда улучшает локацию с наименьшим ID среди
+        не улучшенных до максимума, поэтому вместо проверки всех предыдущих
+        локаций движок держит указатель на эту границу и сдвигает его только
+        при достижении локацией максимального уровня.
+        
+        Args:
+            t: Время начала сессии
+            session_end: Время окончания сессии
+            current_history: Текущее состояние для записи истории
+            
+        Returns:
+            int: Время, на котором закончились действия в сессии
+        """
+        tables = self.compiled
+        
+        while t < session_end:  # Продолжаем цикл пока не истечет время сессии
+            idx = self._frontier_location()
+            if idx is None:
+                break
+            
+            location = self.locations[idx]
+            row = tables.location_rows[idx]
+            game_time = self._format_game_time(t)
+            
+            if location.cooldown_until > t:
+                # Пока граница в кулдауне, остальные локации улучшать нельзя
+                if location.cooldown_until >= session_end:
+                    logger.info(f"{game_time}: No more upgrades in this session")
+                    break
                 
-                # Записываем действие начисления дохода
-                if current_history is not None:
-                    action = {
-                        "type": "passive_income",
-                        "timestamp": t,
-                        "description": f"Passive income for {time_passed} sec",
-                        "gold_before": old_balance,
-                        "gold_change": passive_income,
-                        "gold_after": self.balance.gold,
-                        "xp_before": self.balance.xp,
-                        "xp_change": 0,
-                        "xp_after": self.balance.xp,
-                        "keys_before": self.balance.keys,
-                        "keys_change": 0,
-                        "keys_after": self.balance.keys
-                    }
-                    current_history["actions"].append(action)
-            elif is_first_login:
-                logger.info(f"{game_time}: First login, passive income not earned")
-            
-            # Определяем конец игровой сессии
-            session_end = t + self.economy.game_duration
+                # Перематываем время вперед до окончания кулдауна
+                old_t = t
+                t = location.cooldown_until
+                logger.info(f"{self._format_game_time(t)}: Waiting for cooldown to end ({t - old_t} sec), next action will be in {self._format_game_time(t)}")
+                continue
+            
+            # Уровень персонажа и золото в течение сессии растут только от улучшений,
+            # поэтому если граница недоступна сейчас, она недоступна до конца сессии
+            if self.balance.user_level < tables.unlock_level.item(row):
+                logger.info(f"{game_time}: No locations available for upgrade at the moment")
+                break
+            
+            if self.balance.gold < tables.cost.item(row, location.current_level + 1):
+                logger.info(f"{game_time}: No locations available for upgrade at the moment")
+                break
+            
+            self._upgrade_location(idx, location, row, t, session_end, current_history)
+            
+            # Сразу проверяем возможность повышения уровня персонажа
+            self._try_upgrade_character(t, current_history)
+        
+        return t
+    
+    def _run_analytic_session(self, t: int, session_end: int, current_history: Dict = None) -> int:
+        """
+        Аналитически проводит игровую сессию последовательного алгоритма.
+        
+        Покупки внутри локации идут цепочкой: каждая следующая происходит ровно
+        по окончании кулдауна предыдущей. Поэтому время покупки m равно
+        `start + W[m] - W[j]`, где W - префиксная сумма кулдаунов плана, а число
+        покупок, успевающих до конца сессии, находится через searchsorted.
+        Момент следующего повышения уровня находится так же по префиксной сумме
+        опыта. Без записи действий цепочка применяется массивами (`_apply_chain`),
+        иначе покупки проводятся по одной с записью в журнал (`_record_chain`).
+        Золото в обоих случаях меняется теми же вычитаниями, что и в пошаговом
+        движке, чтобы баланс совпадал до последнего бита.
+        
+        Args:
+            t: Время начала сессии
+            session_end: Время окончания сессии
+            current_history: Текущее состояние для записи истории
+            
+        Returns:
+            int: Время последней покупки в сессии
+        """
+        plan = self._sequential_plan
+        cum_cooldown = plan.cum_cooldown
+        
+        while True:
+            idx = self._frontier_location()
+            if idx is None:
+                break
+            
+            location = self.locations[idx]
+            j = plan.location_start[idx] + location.current_level
+            segment_end = plan.segment_end[j]
+            start = max(t, location.cooldown_until)
+            
+            if start >= session_end or self.balance.user_level < plan.unlock_level[j]:
+                break
+            
+            # Покупки цепочки, успевающие до конца сессии
+            offset = cum_cooldown.item(j)
+            stop = j + int(np.searchsorted(cum_cooldown[j:segment_end], session_end - start + offset, side="left"))
+            level_up_at = self._next_level_up_purchase(j, segment_end)
+
+            if current_history is None:
+                m = self._apply_chain(j, stop, start - offset, level_up_at, segment_end)
+            else:
+                m = self._record_chain(idx, j, stop, start - offset, level_up_at, segment_end, current_history)
+
+            if m == j:
+                break
+
+            self._location_upgrades += m - j
+            self._changed_locations.add(idx)
+            
+            # Применяем результат цепочки к состоянию локации
+            t = start + cum_cooldown.item(m - 1) - offset
+            location.current_level = plan.levels[m - 1]
+            location.cooldown_until = t + plan.cooldown[m - 1]
+            if m == segment_end:
+                location.available = False
+            
             game_time = self._format_game_time(t)
-            logger.info(f"{game_time}: Session duration: {self.economy.game_duration} sec (until {self._format_game_time(session_end)})")
+            logger.info(f"{game_time}: Location {idx} upgraded to level {location.current_level} ({m - j} upgrades in chain)")
+            
+            if m < segment_end:
+                # Цепочка оборвалась по времени или золоту, следующая локация недоступна
+                break
+        
+        return t
+
+    def _apply_chain(self, j: int, stop: int, base: int, level_up_at: int, segment_end: int) -> int:
+        """
+        Применяет покупки цепочки к балансу без записи действий.
+
+        Золото перед каждой покупкой получается последовательным накоплением
+        стоимостей (те же вычитания, что и по одной покупке), и цепочка
+        обрывается на первой покупке, на которую его не хватает. Опыт и ключи
+        прибавляются разностью префиксных сумм, а `_try_upgrade_character`
+        вызывается только на покупках, после которых опыт достигает порога.
+
+        Args:
+            j: Индекс первой покупки цепочки
+            stop: Граница покупок, успевающих до конца сессии
+            base: Время покупки m равно `base + cum_cooldown[m]`
+            level_up_at: Покупка, после которой повысится уровень персонажа
+            segment_end: Граница цепочки покупок текущей локации
+
+        Returns:
+            int: Индекс первой невыполненной покупки
+        """
+        plan = self._sequential_plan
+        if j == stop or self.balance.gold < plan.cost[j]:
+            return j
+
+        costs = np.diff(plan.cum_cost[j:stop + 1])
+        gold = np.add.accumulate(np.concatenate((np.array([self.balance.gold]), -costs)))
+        short = np.flatnonzero(gold[:-1] < costs)
+        m = j + (int(short[0]) if len(short) else stop - j)
+        self.balance.gold = gold.item(m - j)
+
+        xp = self.balance.xp - plan.cum_xp.item(j)
+        while level_up_at < m:
+            self.balance.xp = xp + plan.cum_xp.item(level_up_at + 1)
+            self._try_upgrade_character(base + plan.cum_cooldown.item(level_up_at))
+            level_up_at = self._next_level_up_purchase(level_up_at + 1, segment_end)
+        self.balance.xp = xp + plan.cum_xp.item(m)
+        self.balance.keys += sum(plan.keys[j:m])
+        return m
+
+    def _record_chain(self, idx: int, j: int, stop: int, base: int, level_up_at: int,
+                      segment_end: int, current_history: Dict) -> int:
+        """
+        Проводит покупки цепочки по одной с записью каждой в журнал действий.
+
+        Args:
+            idx: ID локации
+            j: Индекс первой покупки цепочки
+            stop: Граница покупок, успевающих до конца сессии
+            base: Время покупки m равно `base + cum_cooldown[m]`
+            level_up_at: Покупка, после которой повысится уровень персонажа
+            segment_end: Граница цепочки покупок текущей локации
+            current_history: Текущее состояние для записи истории
+
+        Returns:
+            int: Индекс первой невыполненной покупки
+        """
+        plan = self._sequential_plan
+        m = j
+        while m < stop and self.balance.gold >= plan.cost[m]:
+            purchase_time = base + plan.cum_cooldown.item(m)
+            cost = plan.cost[m]
+            reward_xp = plan.xp[m]
+            reward_keys = plan.keys[m]
+
+            gold_before = self.balance.gold
+            xp_before = self.balance.xp
+            keys_before = self.balance.keys
+            self.balance.gold -= cost
+            self.balance.xp += reward_xp
+            self.balance.keys += reward_keys
+
+            self._record_upgrade(
+                idx, plan.levels[m], purchase_time, cost, reward_xp, reward_keys,
+                gold_before, xp_before, keys_before
+            )
+
+            if m == level_up_at:
+                self._try_upgrade_character(purchase_time, current_history)
+                level_up_at = self._next_level_up_purchase(m + 1, segment_end)
+
+            m += 1
+        return m
+
+    def _next_level_up_purchase(self, j: int, segment_end: int) -> int:
+        """
+        Находит покупку плана, после которой опыт достигнет следующего уровня персонажа.
+        
+        Args:
+            j: Индекс первой рассматриваемой покупки
+            segment_end: Граница цепочки покупок текущей локации
+            
+        Returns:
+            int: Индекс покупки или segment_end, если повышения в цепочке не будет
+        """
+        tables = self.compiled
+        if self.balance.user_level >= tables.max_user_level:
+            return segment_end
+        
+        cum_xp = self._sequential_plan.cum_xp
+        required_xp = tables.xp_threshold.item(self.balance.user_level + 1)
+        target = required_xp - self.balance.xp + cum_xp.item(j)
+        return j + int(np.searchsorted(cum_xp[j + 1:segment_end + 1], target, side="left"))
+    
+    def _next_upgrade_cost(self, loc_id: int) -> int:
+        """
+        Возвращает стоимость следующего улучшения локации.
+        
+        Args:
+            loc_id: ID локации
+            
+        Returns:
+            int: Стоимость
+        """
+        return self.compiled.cost.item(self.compiled.location_rows[loc_id], self.locations[loc_id].current_level + 1)
+    
+    def _frontier_location(self) -> Optional[int]:
+        """
+        Возвращает ID первой локации, не улучшенной до максимума.
+        
+        Returns:
+            Optional[int]: ID локации или None, если все локации улучшены
+        """
+        order = self._sequential_order
+        while self._frontier < len(order) and not self.locations[order[self._frontier]].available:
+            self._frontier += 1
+        return order[self._frontier] if self._frontier < len(order) else None
+    
+    def _run_indexed_session(self, t: int, session_end: int, current_history: Dict = None) -> int:
+        """
+        Проводит игровую сессию для алгоритма "Первое доступное улучшение".
+        
+        Args:
+            t: Время начала сессии
+            session_end: Время окончания сессии
+            current_history: Текущее состояние для записи истории
+            
+        Returns:
+            int: Время, на котором закончились действия в сессии
+        """
+        tables = self.compiled
+        index = self._location_index
+        
+        while t < session_end:  # Продолжаем цикл пока не истечет время сессии
+            # Переносим локации с истекшим кулдауном в число готовых к улучшению
+            index.release_expired(t)
             
-            # Step 1. Try to upgrade locations while session is active
-            while t < session_end:  # Продолжаем цикл пока не истечет время сессии
-                # Проверяем, есть ли локации готовые для улучшения прямо сейчас
-                available_locations = {idx: loc for idx, loc in self.locations.items() 
-                                    if loc.available and loc.cooldown_until <= t}
+            # Флаг для отслеживания успешных улучшений
+            any_upgrade_made = False
+            
+            # Первое доступное улучшение: берем первую по порядку локацию, на которую хватает золота
+            idx = index.first_affordable(self.balance.gold)
+            if idx is not None:
+                location = self.locations[idx]
+                self._upgrade_location(idx, location, tables.location_rows[idx], t, session_end, current_history)
+                index.on_upgrade(idx, location, t)
                 
-                if not available_locations:
-                    # Нет доступных локаций прямо сейчас, проверяем, будут ли они в рамках сессии
-                    locations_in_cooldown = {idx: loc for idx, loc in self.locations.items() 
-                                          if loc.available and loc.cooldown_until > t and loc.cooldown_until < session_end}
-                    
-                    if not locations_in_cooldown:
-                        logger.info(f"{game_time}: No locations that will be available in this session")
-                        break  # Выходим из цикла, если нет локаций, которые станут доступны в рамках сессии
-                    
-                    # Находим ближайшее время окончания кулдауна
-                    next_available_time = min(loc.cooldown_until for loc in locations_in_cooldown.values())
-                    
-                    # Перематываем время вперед до окончания ближайшего кулдауна
-                    old_t = t
-                    t = next_available_time
-                    game_time = self._format_game_time(t)
-                    next_available = self._format_game_time(next_available_time)
-                    logger.info(f"{game_time}: Waiting for cooldown to end ({t - old_t} sec), next action will be in {next_available}")
-                    
-                    # После перемотки продолжаем цикл с новой проверкой доступных локаций
-                    continue
+                # Сразу проверяем возможность повышения уровня персонажа
+                self._try_upgrade_character(t, current_history)
+                if self.balance.user_level != index.user_level:
+                    index.unlock(self.balance.user_level)
                 
-                # Сортируем локации в зависимости от алгоритма
-                if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
-                    # Последовательное улучшение: сортируем по ID локации
-                    sorted_locations = sorted(available_locations.items())
-                else:
-                    # Первое доступное улучшение (как в Kotlin): просто берем локации в том порядке, в котором они есть
-                    sorted_locations = list(available_locations.items())
+                any_upgrade_made = True
+            
+            if not any_upgrade_made:
+                # Если у пользователя есть деньги, но нет доступных локаций для улучшения,
+                # значит есть какие-то ограничения (например, не хватает уровня персонажа)
+                game_time = self._format_game_time(t)
+                logger.info(f"{game_time}: No locations available for upgrade at the moment")
                 
-                # Флаг для отслеживания успешных улучшений
-                any_upgrade_made = False
+                # Находим ближайшее время окончания кулдауна
+                next_available_time = index.next_expiry()
                 
-                for index, location in sorted_locations:
-                    # Проверяем условия в зависимости от алгоритма
-                    if self.simulation_algorithm == SimulationAlgorithm.SEQUENTIAL:
-                        # Для последовательного алгоритма проверяем, что предыдущие локации полностью улучшены
-                        previous_locations_maxed = True
-                        for prev_idx, prev_loc in self.locations.items():
-                            if prev_idx < index and prev_loc.available:
-                                previous_locations_maxed = False
-                                break
-                        
-                        if not previous_locations_maxed:
-                            continue
-                    
-                    # Skip locations that require higher user level
-                    if self.balance.user_level < location.min_character_level:
-                        continue
-                    
-                    # Get cost of the location upgrade
-                    cost = location.get_upgrade_cost()
-                    
-                    if self.balance.gold >= cost:
-                        game_time = self._format_game_time(t)
-                        # Сохраняем состояние до улучшения
-                        gold_before = self.balance.gold
-                        xp_before = self.balance.xp
-                        keys_before = self.balance.keys
-                        
-                        # Upgrade location
-                        logger.info(
-                            f"{game_time}: Location upgrade {index} "
-                            f"(level {location.current_level + 1}), "
-                            f"cost: {cost:.2f} gold, "
-                            f"cooldown: {self.cooldowns[location.current_level + 1]} sec"
-                        )
-                        
-                        reward_xp = location.get_upgrade_xp_reward()
-                        reward_keys = location.get_upgrade_keys_reward()
-                        cooldown = self.cooldowns[location.current_level + 1]
-                        
-                        # Charge the cost from the balance
-                        self.balance.gold -= cost
-                        
-                        # Add experience
-                        self.balance.xp += reward_xp
-                        
-                        # Add keys
-                        self.balance.keys += reward_keys
-                        
-                        # Добавляем запись о действии в историю
-                        if current_history is not None:
-                            action = {
-                                "type": "location_upgrade",
-                                "timestamp": t,
-                                "description": f"Location upgrade {index} (level {location.current_level + 1})",
-                                "location_id": index,
-                                "new_level": location.current_level + 1,
-                                "gold_before": gold_before,
-                                "gold_change": -cost,
-                                "gold_after": self.balance.gold,
-                                "xp_before": xp_before,
-                                "xp_change": reward_xp,
-                                "xp_after": self.balance.xp,
-                                "keys_before": keys_before,
-                                "keys_change": reward_keys,
-                                "keys_after": self.balance.keys
-                            }
-                            current_history["actions"].append(action)
-                        
-                        logger.info(
-                            f"{game_time}: Получено: {reward_xp} опыта, "
-                            f"{reward_keys} ключей. "
-                            f"Баланс: {self.balance.gold:.2f} золота"
-                        )
-                        
-                        # Update location
-                        location.current_level += 1
-                        
-                        # If this was the last upgrade, deactivate location
-                        if location.current_level >= max(location.levels.keys()):
-                            location.available = False
-                            logger.info(f"{game_time}: Location {index} upgraded to the maximum level")
-                        
-                        # Set the cooldown
-                        location.cooldown_until = t + cooldown
-                        
-                        # Проверяем, успеем ли мы выполнить следующее улучшение в рамках сессии
-                        next_upgrade_time = t + cooldown
-                        if next_upgrade_time < session_end:
-                            next_available = self._format_game_time(next_upgrade_time)
-                            logger.info(f"{game_time}: Cooldown: {cooldown} sec. Next location upgrade {index} will be available in {next_available} (within the current session)")
-                        else:
-                            next_available = self._format_game_time(next_upgrade_time)
-                            logger.info(f"{game_time}: Cooldown: {cooldown} sec. Next location upgrade {index} will be available in {next_available} (after the current session)")
-                        
-                        # Сразу проверяем возможность повышения уровня персонажа
-                        self._try_upgrade_character(t, current_history)
-                        
-                        any_upgrade_made = True
-                        
-                        # Для алгоритма "Первое доступное улучшение" завершаем цикл после первого успешного улучшения
-                        if self.simulation_algorithm == SimulationAlgorithm.FIRST_AVAILABLE:
-                            break
+                if next_available_time < 0 or next_available_time >= session_end:
+                    # Если нет локаций, которые могут стать доступными до конца сессии, выходим
+                    logger.info(f"{game_time}: No more upgrades in this session")
+                    break
                 
-                if not any_upgrade_made:
-                    # Если у пользователя есть деньги, но нет доступных локаций для улучшения,
-                    # значит есть какие-то ограничения (например, предыдущие локации не максимальны)
-                    game_time = self._format_game_time(t)
-                    logger.info(f"{game_time}: No locations available for upgrade at the moment")
-                    
-                    # Проверяем, есть ли локации в кулдауне, которые могут стать доступными в рамках сессии
-                    locations_in_cooldown = {idx: loc for idx, loc in self.locations.items() 
-                                          if loc.available and loc.cooldown_until > t and loc.cooldown_until < session_end}
-                    
-                    if not locations_in_cooldown:
-                        # Если нет локаций, которые могут стать доступными до конца сессии, выходим
-                        logger.info(f"{game_time}: No more upgrades in this session")
-                        break
-                    
-                    # Находим ближайшее время окончания кулдауна
-                    next_available_time = min(loc.cooldown_until for loc in locations_in_cooldown.values())
-                    
-                    # Перематываем время вперед до окончания ближайшего кулдауна
-                    old_t = t
-                    t = next_available_time
-                    game_time = self._format_game_time(t)
-                    next_available = self._format_game_time(next_available_time)
-                    logger.info(f"{game_time}: Waiting for cooldown to end ({t - old_t} sec), next action will be in {next_available}")
-                    
-                    # После перемотки продолжаем цикл без увеличения времени
-                    continue
-            
-            game_time = self._format_game_time(t)
-            remaining_time = session_end - t
-            if remaining_time > 0:
-                logger.info(f"{game_time}: Session ended earlier (remaining {remaining_time} sec)")
-            logger.info(f"=== {game_time} === Player finished the session ===\n")
+                # Перематываем время вперед до окончания ближайшего кулдауна
+                old_t = t
+                t = next_available_time
+                game_time = self._format_game_time(t)
+                next_available = self._format_game_time(next_available_time)
+                logger.info(f"{game_time}: Waiting for cooldown to end ({t - old_t} sec), next action will be in {next_available}")
+        
+        return t
+    
+    def _upgrade_location(self, idx: int, location: Location, row: int, t: int,
+                          session_end: int, current_history: Dict = None) -> None:
+        """
+        Улучшает локацию: списывает золото, начисляет награды и ставит кулдаун.
+        
+        Args:
+            idx: ID локации
+            location: Состояние локации
+            row: Строка локации в скомпилированных таблицах
+            t: Текущее игровое время
+            session_end: Время окончания сессии
+            current_history: Текущее состояние для записи истории
+        """
+        tables = self.compiled
+        game_time = self._format_game_time(t)
+        next_level = location.current_level + 1
+        cost = tables.cost.item(row, next_level)
+        
+        # Сохраняем состояние до улучшения
+        gold_before = self.balance.gold
+        xp_before = self.balance.xp
+        keys_before = self.balance.keys
+        
+        # Upgrade location
+        logger.info(
+            f"{game_time}: Location upgrade {idx} "
+            f"(level {next_level}), "
+            f"cost: {cost:.2f} gold, "
+            f"cooldown: {tables.cooldown.item(next_level)} sec"
+        )
+        
+        max_level = tables.max_level.item(row)
+        reward_xp = tables.xp.item(row, next_level)
+        reward_keys = tables.keys.item(row) if next_level == max_level else 0
+        cooldown = tables.cooldown.item(next_level)
+        
+        # Charge the cost from the balance
+        self.balance.gold -= cost
+        
+        # Add experience
+        self.balance.xp += reward_xp
+        
+        # Add keys
+        self.balance.keys += reward_keys
+        
+        # Добавляем запись о действии в историю
+        if current_history is not None:
+            self._record_upgrade(
+                idx, next_level, t, cost, reward_xp, reward_keys, gold_before, xp_before, keys_before
+            )
+        
+        logger.info(
+            f"{game_time}: Получено: {reward_xp} опыта, "
+            f"{reward_keys} ключей. "
+            f"Баланс: {self.balance.gold:.2f} золота"
+        )
+        
+        # Update location
+        location.current_level = next_level
+        self._location_upgrades += 1
+        self._changed_locations.add(idx)
+        
+        # If this was the last upgrade, deactivate location
+        if location.current_level >= max_level:
+            location.available = False
+            logger.info(f"{game_time}: Location {idx} upgraded to the maximum level")
+        
+        # Set the cooldown
+        location.cooldown_until = t + cooldown
+        
+        # Проверяем, успеем ли мы выполнить следующее улучшение в рамках сессии
+        next_upgrade_time = t + cooldown
+        next_available = self._format_game_time(next_upgrade_time)
+        if next_upgrade_time < session_end:
+            logger.info(f"{game_time}: Cooldown: {cooldown} sec. Next location upgrade {idx} will be available in {next_available} (within the current session)")
+        else:
+            logger.info(f"{game_time}: Cooldown: {cooldown} sec. Next location upgrade {idx} will be available in {next_available} (after the current session)")
+    
+    def _record_upgrade(self, idx: int, next_level: int, t: int, cost: int, reward_xp: int,
+                        reward_keys: int, gold_before: float, xp_before: int, keys_before: int) -> None:
+        """
+        Записывает в журнал действие "location_upgrade" по уже обновленному балансу.
+        """
+        self._events.append(
+            LOCATION_UPGRADE, t,
+            gold_before, -cost, self.balance.gold,
+            xp_before, reward_xp, self.balance.xp,
+            keys_before, reward_keys, self.balance.keys,
+            location_id=idx, new_level=next_level
+        )
     
     def _try_upgrade_character(self, t: int, current_history: Dict = None) -> None:
         """
@@ -446,8 +1767,10 @@ class Workflow:
             t: Текущее игровое время
             current_history: Текущее состояние для записи истории
         """
-        if self.balance.user_level < max(self.user_levels.keys()):
-            required_xp = self.user_levels[self.balance.user_level + 1].xp_required
+        tables = self.compiled
+        
+        if self.balance.user_level < tables.max_user_level:
+            required_xp = tables.xp_threshold.item(self.balance.user_level + 1)
             
             # Upgrade as many times as needed
             while self.balance.xp >= required_xp:
@@ -459,41 +1782,32 @@ class Workflow:
                 
                 logger.info(
                     f"{game_time}: Level up to {self.balance.user_level + 1}. "
-                    f"New earnings: {self.user_levels[self.balance.user_level + 1].gold_per_sec:.2f}/sec"
+                    f"New earnings: {tables.gold_per_sec.item(self.balance.user_level + 1):.2f}/sec"
                 )
                 
                 self.balance.user_level += 1
-                self.balance.earn_per_sec = self.user_levels[self.balance.user_level].gold_per_sec
-                keys_reward = self.user_levels[self.balance.user_level].keys_reward
+                self.balance.earn_per_sec = tables.gold_per_sec.item(self.balance.user_level)
+                self._level_up_times[self.balance.user_level] = t
+                keys_reward = tables.level_keys.item(self.balance.user_level)
                 self.balance.keys += keys_reward
                 
                 # Добавляем запись о повышении уровня в историю
                 if current_history is not None:
-                    action = {
-                        "type": "level_up",
-                        "timestamp": t,
-                        "description": f"Level up to {self.balance.user_level}",
-                        "old_level": self.balance.user_level - 1,
-                        "new_level": self.balance.user_level,
-                        "gold_before": gold_before,
-                        "gold_change": 0,
-                        "gold_after": self.balance.gold,
-                        "xp_before": xp_before,
-                        "xp_change": 0,
-                        "xp_after": self.balance.xp,
-                        "keys_before": keys_before,
-                        "keys_change": keys_reward,
-                        "keys_after": self.balance.keys,
-                        "new_earn_per_sec": self.balance.earn_per_sec
-                    }
-                    current_history["actions"].append(action)
+                    self._events.append(
+                        LEVEL_UP, t,
+                        gold_before, 0, self.balance.gold,
+                        xp_before, 0, self.balance.xp,
+                        keys_before, keys_reward, self.balance.keys,
+                        new_level=self.balance.user_level,
+                        earn_per_sec=self.balance.earn_per_sec
+                    )
                 
                 logger.info(
                     f"{game_time}: Earned {keys_reward} keys for the new level"
                 )
                 
-                if self.balance.user_level < max(self.user_levels.keys()):
-                    required_xp = self.user_levels[self.balance.user_level + 1].xp_required
+                if self.balance.user_level < tables.max_user_level:
+                    required_xp = tables.xp_threshold.item(self.balance.user_level + 1)
                 else:
                     break
     